@@ -1,13 +1,41 @@
 import os
+import hmac
 import logging
-from typing import List
+import time
+from typing import TYPE_CHECKING, List, Literal, Optional
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from .recommender import AssessmentRecommender
-from .config import CATALOG_PATH, MAX_K
+from .cache import ResponseCache, make_key
+from .filters import RecommendFilters
+from .metrics import REGISTRY, MetricsMiddleware, RequestTrace, SlowRequestSampler, activate, observe_stage, stage
+from .reloader import NotReady, RecommenderReloader
+from .config import (
+    CATALOG_PATH,
+    MAX_K,
+    MAX_BATCH_QUERIES,
+    INDEX_DIR,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SECONDS,
+    CACHE_RESPONSE_BYTES,
+    SCORING_WORKERS,
+    SCORING_QUEUE_DEPTH,
+    OVERLOAD_RETRY_AFTER_SECONDS,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_KEEP,
+)
+from .executor import BoundedExecutor, ExecutorSaturated
+
+# The recommender (pandas, scikit-learn or sentence-transformers) is imported by
+# the background loader, not at import time, so the app starts answering
+# /health right away
+if TYPE_CHECKING:
+    from .recommender import AssessmentRecommender
 
 # ----- logging -----
 logging.basicConfig(level=logging.INFO)
@@ -35,12 +63,59 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# In-flight gauge + per-route latency/status metrics (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# ----- admin API token (catalog updates); admin endpoints are off when unset -----
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# ----- worker processes serving this app -----
+# Catalog updates only reach the worker that handles them, so with several
+# workers the admin write endpoints are off and data/catalog.csv is the way in.
+# scripts/serve.py exports API_WORKER_PROCESSES; plain `uvicorn --workers N`
+# sets neither variable, so set API_WORKER_PROCESSES (or WEB_CONCURRENCY,
+# which uvicorn uses as its --workers default) yourself in that case.
+WORKER_PROCESSES = int(os.environ.get("API_WORKER_PROCESSES") or os.environ.get("WEB_CONCURRENCY") or "1")
+
+# ----- recommender (loaded in the background at startup, hot-swapped on catalog changes) -----
+def _build_recommender() -> "AssessmentRecommender":
+    from .recommender import AssessmentRecommender
+
+    # Memory-maps prebuilt artifacts when present (see scripts/build_index.py)
+    return AssessmentRecommender(catalog_path=CATALOG_PATH, max_k=MAX_K, index_dir=INDEX_DIR)
+
+
+reloader = RecommenderReloader(_build_recommender, catalog_path=CATALOG_PATH)
+
+# ----- response cache for /recommend -----
+response_cache = ResponseCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS)
+
+# ----- dedicated pool for CPU-bound scoring (keeps the event loop free) -----
+scoring_executor = BoundedExecutor(max_workers=SCORING_WORKERS, max_queue=SCORING_QUEUE_DEPTH)
 
-# ----- recommender (initialized at startup) -----
-recommender = None
+# ----- opt-in profiler: stage breakdowns of the slowest sampled /recommend calls -----
+profiler = SlowRequestSampler(sample_rate=PROFILE_SAMPLE_RATE, keep=PROFILE_KEEP)
 
 
-class RecommendRequest(BaseModel):
+class FilterFields(BaseModel):
+    """Optional structured filters; rows with unknown values only pass with include_unknown."""
+    max_duration: Optional[int] = None
+    remote_support: Optional[Literal["Yes", "No"]] = None
+    adaptive_support: Optional[Literal["Yes", "No"]] = None
+    test_type: Optional[List[str]] = None  # any of these test types
+    include_unknown: bool = False
+
+    def filters(self) -> Optional[RecommendFilters]:
+        return RecommendFilters.build(
+            max_duration=self.max_duration,
+            remote_support=self.remote_support,
+            adaptive_support=self.adaptive_support,
+            test_types=self.test_type,
+            include_unknown=self.include_unknown,
+        )
+
+
+class RecommendRequest(FilterFields):
     query: str
 
 
@@ -58,36 +133,307 @@ class RecommendResponse(BaseModel):
     recommended_assessments: List[Assessment]
 
 
+class BatchRecommendRequest(FilterFields):
+    queries: List[str]
+    k: int = 10
+
+
+class BatchRecommendResponse(BaseModel):
+    results: List[RecommendResponse]
+
+
+class CatalogUpsertRequest(BaseModel):
+    assessments: List[Assessment]
+
+
+class CatalogDeleteRequest(BaseModel):
+    urls: List[str]
+
+
+class CatalogUpdateResponse(BaseModel):
+    index_version: str
+    items: int
+
+
 # ----- startup handler -----
 @app.on_event("startup")
 def startup():
-    global recommender
-    try:
-        logger.info("Initializing AssessmentRecommender (catalog=%s, max_k=%s)", CATALOG_PATH, MAX_K)
-        recommender = AssessmentRecommender(catalog_path=CATALOG_PATH, max_k=MAX_K)
-        logger.info("Recommender initialized: %d items", len(recommender.catalog_df))
-    except Exception as e:
-        logger.exception("Failed to initialize recommender: %s", e)
-        # Re-raise so the process fails to start (Render/Proc manager will show logs)
-        raise
+    # Returns immediately: /health answers while the index (and model) load,
+    # /ready turns 200 once recommendations can be served
+    logger.info(
+        "Loading AssessmentRecommender in the background (catalog=%s, index_dir=%s, max_k=%s)",
+        CATALOG_PATH, INDEX_DIR, MAX_K,
+    )
+    reloader.load_in_background()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    scoring_executor.shutdown(wait=False)
+    reloader.close()
+
+
+def _overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is at capacity, please retry shortly",
+        headers={"Retry-After": str(OVERLOAD_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.exception_handler(NotReady)
+async def not_ready(request: Request, exc: NotReady):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Recommender is not ready yet, please retry shortly"},
+        headers={"Retry-After": str(OVERLOAD_RETRY_AFTER_SECONDS)},
+    )
 
 
 @app.get("/health")
-def health():
-    return {"status": "healthy"}
+async def health():
+    """Liveness: answers as soon as the process is up. A failed initial load makes it 503 so the process is restarted."""
+    stats = reloader.stats()
+    if stats["load_error"]:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "error": stats["load_error"]})
+    return {
+        "status": "healthy" if stats["ready"] else "starting",
+        "index_version": stats["index_version"],
+        "rebuilding": stats["rebuilding"],
+    }
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the index is loaded and warmed up, 503 before."""
+    stats = reloader.stats()
+    if not stats["ready"]:
+        status = "failed" if stats["load_error"] else "loading"
+        return JSONResponse(status_code=503, content={"status": status, "error": stats["load_error"]})
+    return {"status": "ready", "index_version": stats["index_version"]}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition format."""
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _runtime_metrics():
+    """Scrape-time values owned by the cache, executor and reloader."""
+    cache = response_cache.stats()
+    for name in ("hits", "misses", "evictions", "expirations"):
+        yield f"recommender_cache_{name}_total", "counter", f"Response cache {name}.", [("", {}, cache[name])]
+    yield "recommender_cache_entries", "gauge", "Responses currently cached.", [("", {}, cache["size"])]
+
+    pool = scoring_executor.stats()
+    yield "recommender_scoring_pending", "gauge", "Scoring jobs running or queued.", [("", {}, pool["pending"])]
+    yield "recommender_scoring_rejected_total", "counter", "Requests rejected with 503.", [
+        ("", {}, pool["rejected"])
+    ]
+
+    index = reloader.stats()
+    yield "recommender_index_swaps_total", "counter", "Index hot swaps.", [("", {}, index["swaps"])]
+    yield "recommender_index_rebuilding", "gauge", "1 while a replacement index is built.", [
+        ("", {}, int(index["rebuilding"]))
+    ]
+    rec = reloader.current
+    if rec is not None:
+        yield "recommender_index_items", "gauge", "Live catalog rows in the index.", [("", {}, len(rec))]
+        yield "recommender_index_pending_changes", "gauge", "Catalog updates not yet compacted.", [
+            ("", {}, rec.pending_changes)
+        ]
+        yield "recommender_index_info", "gauge", "Active index version and retrieval mode.", [
+            ("", {"version": rec.index_version, "mode": rec.retrieval_mode}, 1)
+        ]
+
+
+REGISTRY.add_collector(_runtime_metrics)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
 
 
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend(req: RecommendRequest, request: Request):
+async def recommend(req: RecommendRequest, request: Request):
     if not req.query or not req.query.strip():
         raise HTTPException(status_code=400, detail="query must be a non-empty string")
 
+    if req.max_duration is not None and req.max_duration < 1:
+        raise HTTPException(status_code=400, detail="max_duration must be >= 1")
+
+    # default k=10 (still limited by recommender.max_k internally)
+    k = 10
+    filters = req.filters()
+    key = make_key(req.query, k, filters)
+    start = time.perf_counter()
+    trace = profiler.start("/recommend", query=req.query[:200])
+    # The instance (and index version) this request started with serves it to the end
+    with reloader.use() as rec:
+        version = rec.index_version
+        cached = response_cache.get(key, version)
+        if cached is not None:
+            if trace is not None:
+                trace.info["cache"] = "hit"
+            profiler.finish(trace, time.perf_counter() - start)
+            if isinstance(cached, bytes):
+                return Response(content=cached, media_type="application/json")
+            return cached
+
+        try:
+            result = await scoring_executor.run(
+                _render_recommendations, rec, req.query, k, trace, time.perf_counter(), filters
+            )
+        except ExecutorSaturated:
+            raise _overloaded()
+        except Exception as e:
+            logger.exception("Error while generating recommendations for query=%r: %s", req.query, e)
+            # Surface a clear error to the client
+            raise HTTPException(status_code=500, detail="Internal error generating recommendations")
+
+    # Stored under the version it was computed with; later versions never see it
+    response_cache.put(key, result, version)
+    profiler.finish(trace, time.perf_counter() - start)
+    if isinstance(result, bytes):
+        return Response(content=result, media_type="application/json")
+    return result
+
+
+def _render_recommendations(
+    rec: "AssessmentRecommender",
+    query: str,
+    k: int,
+    trace: Optional[RequestTrace] = None,
+    submitted: Optional[float] = None,
+    filters: Optional[RecommendFilters] = None,
+):
+    """Scoring + response construction; runs on the scoring executor."""
+    with activate(trace):
+        if submitted is not None:
+            observe_stage("queue_wait", time.perf_counter() - submitted)
+        recs = rec.recommend(query, k=k, filters=filters)
+        with stage("serialize"):
+            assessments = [Assessment(**r) for r in recs]
+            response = RecommendResponse(recommended_assessments=assessments)
+            if CACHE_RESPONSE_BYTES:
+                return JSONResponse(content=jsonable_encoder(response)).body
+            return response
+
+
+@app.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_batch(req: BatchRecommendRequest):
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="queries must be a non-empty list")
+    if len(req.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400, detail=f"at most {MAX_BATCH_QUERIES} queries per batch"
+        )
+    if any(not q or not q.strip() for q in req.queries):
+        raise HTTPException(status_code=400, detail="every query must be a non-empty string")
+    if req.k < 1:
+        raise HTTPException(status_code=400, detail="k must be >= 1")
+    if req.max_duration is not None and req.max_duration < 1:
+        raise HTTPException(status_code=400, detail="max_duration must be >= 1")
+
     try:
-        # default k=10 (still limited by recommender.max_k internally)
-        recs = recommender.recommend(req.query, k=10)
-        assessments = [Assessment(**r) for r in recs]
-        return RecommendResponse(recommended_assessments=assessments)
+        with reloader.use() as rec:
+            return await scoring_executor.run(_render_batch, rec, req.queries, req.k, req.filters())
+    except ExecutorSaturated:
+        raise _overloaded()
     except Exception as e:
-        logger.exception("Error while generating recommendations for query=%r: %s", req.query, e)
-        # Surface a clear error to the client
+        logger.exception("Error while generating batch recommendations (%d queries): %s", len(req.queries), e)
         raise HTTPException(status_code=500, detail="Internal error generating recommendations")
+
+
+def _render_batch(
+    rec: "AssessmentRecommender", queries: List[str], k: int, filters: Optional[RecommendFilters] = None
+) -> BatchRecommendResponse:
+    batch = rec.recommend_many(queries, k=k, filters=filters)
+    return BatchRecommendResponse(
+        results=[
+            RecommendResponse(recommended_assessments=[Assessment(**r) for r in recs])
+            for recs in batch
+        ]
+    )
+
+
+# ----- admin: live catalog updates -----
+def require_admin(x_admin_token: str = Header(default="")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="admin API disabled (set ADMIN_TOKEN)")
+    if not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="invalid admin token")
+
+
+def require_single_worker():
+    if WORKER_PROCESSES > 1:
+        raise HTTPException(
+            status_code=409,
+            detail=f"catalog updates are disabled with {WORKER_PROCESSES} workers; "
+            "update the catalog file or serve with --workers 1",
+        )
+
+
+async def _catalog_update(method: str, *args) -> CatalogUpdateResponse:
+    # Updates encode the new rows, so keep them off the event loop (but out of
+    # the scoring pool, whose slots belong to /recommend traffic)
+    def update(rec: "AssessmentRecommender"):
+        return getattr(rec, method)(*args), len(rec)
+
+    try:
+        version, items = await run_in_threadpool(reloader.write, update)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return CatalogUpdateResponse(index_version=version, items=items)
+
+
+@app.post("/admin/assessments", response_model=CatalogUpdateResponse, dependencies=[Depends(require_admin), Depends(require_single_worker)])
+async def add_assessments(req: CatalogUpsertRequest):
+    if not req.assessments:
+        raise HTTPException(status_code=400, detail="assessments must be a non-empty list")
+    return await _catalog_update("add_assessments", [a.model_dump() for a in req.assessments])
+
+
+@app.put("/admin/assessments", response_model=CatalogUpdateResponse, dependencies=[Depends(require_admin), Depends(require_single_worker)])
+async def update_assessments(req: CatalogUpsertRequest):
+    if not req.assessments:
+        raise HTTPException(status_code=400, detail="assessments must be a non-empty list")
+    return await _catalog_update("update_assessments", [a.model_dump() for a in req.assessments])
+
+
+@app.post("/admin/assessments/delete", response_model=CatalogUpdateResponse, dependencies=[Depends(require_admin), Depends(require_single_worker)])
+async def delete_assessments(req: CatalogDeleteRequest):
+    if not req.urls:
+        raise HTTPException(status_code=400, detail="urls must be a non-empty list")
+    return await _catalog_update("delete_assessments", req.urls)
+
+
+@app.post("/admin/compact", response_model=CatalogUpdateResponse, dependencies=[Depends(require_admin), Depends(require_single_worker)])
+async def compact_catalog():
+    return await _catalog_update("compact")
+
+
+@app.post("/admin/reload", status_code=202, dependencies=[Depends(require_admin)])
+async def reload_index():
+    """Rebuild the index from the catalog file in the background; /health shows the new version once live."""
+    reloader.request_rebuild()
+    return {"status": "rebuilding", "index_version": reloader.stats()["index_version"]}
+
+
+@app.get("/admin/index", dependencies=[Depends(require_admin)])
+async def index_status():
+    return reloader.stats()
+
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile(reset: bool = False):
+    """Stage breakdowns of the slowest sampled /recommend requests (PROFILE_SAMPLE_RATE > 0)."""
+    slowest = profiler.slowest()
+    result = {"sample_rate": profiler.sample_rate, "sampled": profiler.sampled, "slowest": slowest}
+    if reset:
+        profiler.reset()
+    return result
@@ -0,0 +1,111 @@
+# app/batching.py
+"""
+Request coalescing for the embedding path.
+
+Concurrent callers each submit one item; a background thread gathers whatever
+arrives within ``max_wait_ms`` (or until ``max_batch_size`` items are queued),
+runs the batch function once, and hands each caller its own row of the result.
+Encoding 16-64 sentences in one SentenceTransformer call is far cheaper on CPU
+than encoding them one at a time.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence
+
+_STOP = object()
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+    ):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, item: Any) -> Any:
+        """Block until the batch containing `item` has been processed; return its result."""
+        fut: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, fut))
+        return fut.result()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first) -> tuple:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                nxt = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if nxt is _STOP:
+                return batch, True
+            batch.append(nxt)
+        return batch, False
+
+    def _loop(self) -> None:
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    return
+                batch, stop = self._collect(first)
+                self._run(batch)
+                if stop:
+                    return
+        finally:
+            with self._lock:
+                self._closed = True
+            # Only left behind when fn raised a BaseException; don't strand their callers
+            while True:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is not _STOP:
+                    pending[1].set_exception(RuntimeError("MicroBatcher is closed"))
+
+    def _run(self, batch: List[tuple]) -> None:
+        error: BaseException = RuntimeError("batch function returned fewer results than items")
+        try:
+            results = self.fn([item for item, _ in batch])
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+        except BaseException as e:
+            error = e
+            if not isinstance(e, Exception):
+                raise  # stops the loop
+        finally:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(error)
+            self.batches += 1
+            self.items += len(batch)
@@ -0,0 +1,128 @@
+# app/bm25.py
+"""
+Okapi BM25 over an inverted index.
+
+The per-(document, term) BM25 weight does not depend on the query, so it is
+computed once at build time and stored term-major. Scoring a query is then a
+sparse product that touches only the postings of the query's terms.
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class BM25Index:
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        postings: sp.csr_matrix,
+        idf: np.ndarray,
+        avg_len: float,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.vectorizer = CountVectorizer(stop_words="english", vocabulary=vocabulary)
+        self.postings = postings  # (n_terms, n_rows)
+        self.idf = idf
+        self.avg_len = avg_len
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        counter = CountVectorizer(stop_words="english")
+        try:
+            tf = sp.csr_matrix(counter.fit_transform(texts), dtype=np.float32)
+        except ValueError:
+            # Every text empty / stop words only: nothing to index
+            empty = np.zeros(0, dtype=np.float32)
+            return cls({}, sp.csr_matrix((0, len(texts)), dtype=np.float32), empty, 0.0, k1, b)
+
+        n_rows = tf.shape[0]
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = float(doc_len.mean()) if n_rows else 0.0
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log1p((n_rows - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        index = cls({term: int(col) for term, col in counter.vocabulary_.items()}, None, idf, avg_len, k1, b)
+        index.postings = sp.csr_matrix(index._weights(tf).T)
+        return index
+
+    def _weights(self, tf: sp.csr_matrix) -> sp.csr_matrix:
+        """Doc-major BM25 weights for term counts `tf`, using this index's idf and average length."""
+        # tf * (k1 + 1) / (tf + k1 * (1 - b + b * |d| / avgdl)), scaled by idf
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        row_of_nnz = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+        norm = self.k1 * (1 - self.b + self.b * doc_len[row_of_nnz] / (self.avg_len or 1.0))
+        weights = tf.copy()
+        weights.data = self.idf[tf.indices] * tf.data * (self.k1 + 1) / (tf.data + norm)
+        return weights
+
+    def weigh(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        Doc-major BM25 weights for new documents against the existing corpus
+        statistics (used for rows appended by live catalog updates). Terms
+        outside the vocabulary are ignored until the index is rebuilt.
+        """
+        if not self.vectorizer.vocabulary:
+            return sp.csr_matrix((len(texts), 0), dtype=np.float32)
+        return self._weights(sp.csr_matrix(self.vectorizer.transform(texts), dtype=np.float32))
+
+    @property
+    def n_rows(self) -> int:
+        return self.postings.shape[1]
+
+    def encode(self, queries: List[str]) -> sp.csr_matrix:
+        """Binary query-term vectors: each distinct query term counts once."""
+        q = self.vectorizer.transform(queries).astype(np.float32)
+        q.data[:] = 1
+        return q
+
+    def score(self, queries: List[str]) -> np.ndarray:
+        """BM25 score of every query against every row, shape (n_queries, n_rows)."""
+        if not self.vectorizer.vocabulary:
+            return np.zeros((len(queries), self.n_rows), dtype=np.float32)
+        return (self.encode(queries) @ self.postings).toarray()
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "bm25_data": self.postings.data,
+            "bm25_indices": self.postings.indices,
+            "bm25_indptr": self.postings.indptr,
+            "bm25_idf": self.idf,
+            "bm25_stats": np.array([self.avg_len, self.k1, self.b], dtype=np.float64),
+        }
+
+    def vocabulary(self) -> Dict[str, int]:
+        return dict(self.vectorizer.vocabulary)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict, n_rows: int) -> "BM25Index":
+        vocabulary = arrays["bm25_vocabulary"]
+        postings = sp.csr_matrix(
+            (arrays["bm25_data"], arrays["bm25_indices"], arrays["bm25_indptr"]),
+            shape=(len(vocabulary), n_rows),
+            copy=False,
+        )
+        avg_len, k1, b = (float(x) for x in arrays["bm25_stats"])
+        return cls(vocabulary, postings, np.asarray(arrays["bm25_idf"]), avg_len, k1, b)
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], n_rows: int, k: int = 60) -> np.ndarray:
+    """
+    Fuse ranked row-index lists (best first) into one score per row:
+    sum over lists of 1 / (k + rank), with rank starting at 1.
+    Rows absent from every list score 0.
+    """
+    fused = np.zeros(n_rows, dtype=np.float32)
+    for ranked in rankings:
+        if len(ranked):
+            fused[ranked] += 1.0 / (k + np.arange(1, len(ranked) + 1, dtype=np.float32))
+    return fused
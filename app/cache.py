@@ -0,0 +1,127 @@
+# app/cache.py
+"""
+Bounded in-process response cache for /recommend.
+
+Entries are keyed on the index version they were computed with, the
+normalized query text, k and the request's structured filters (see
+app/filters.py), evicted least-recently-used when the cache is full, and
+expire after a TTL. A request only ever sees entries of the index version
+serving it, so a new catalog never serves stale recommendations. During a hot
+swap requests on the old and the new index run side by side, so the entries
+of the CACHE_VERSIONS most recently used versions are kept; an older
+version's entries are dropped when a newer one shows up.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Index versions whose entries are kept (the active one and the one being swapped out)
+CACHE_VERSIONS = 2
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used as the cache key."""
+    return " ".join(query.lower().split())
+
+
+def make_key(query: str, k: int, filters: Hashable = None) -> Tuple[str, int, Hashable]:
+    return normalize_query(query), k, filters
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._versions: "OrderedDict[str, None]" = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _touch_version(self, version: str) -> None:
+        """Mark `version` in use, dropping the entries of versions that fell out of CACHE_VERSIONS."""
+        if version in self._versions:
+            self._versions.move_to_end(version)
+            return
+        self._versions[version] = None
+        if len(self._versions) <= CACHE_VERSIONS:
+            return
+        stale = set()
+        while len(self._versions) > CACHE_VERSIONS:
+            stale.add(self._versions.popitem(last=False)[0])
+        for entry_key in [k for k in self._data if k[0] in stale]:
+            del self._data[entry_key]
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        """The value cached for `key` under index `version`, if any."""
+        if not self.enabled:
+            return None
+        now = self._clock()
+        entry_key = (version, key)
+        with self._lock:
+            self._touch_version(version)
+            entry = self._data.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[entry_key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(entry_key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: str) -> None:
+        """Store `value` computed with index `version`; dropped if that version's entries were already let go."""
+        if not self.enabled:
+            return
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            if version not in self._versions:
+                return
+            entry_key = (version, key)
+            self._data[entry_key] = (expires_at, value)
+            self._data.move_to_end(entry_key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def versions(self) -> List[str]:
+        """Index versions with entries kept, most recently used last."""
+        with self._lock:
+            return list(self._versions)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "versions": self.versions(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
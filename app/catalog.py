@@ -0,0 +1,338 @@
+# app/catalog.py
+"""
+Typed, columnar catalog.
+
+load_catalog reads data/catalog.csv with declared column dtypes and keeps the
+result column-wise instead of as an object DataFrame:
+
+- url, name, description: lists of str
+- duration: int32 (0 = unknown)
+- remote_support / adaptive_support: integer codes into a small list of values
+- test_type: integer codes into the distinct test-type combinations of the
+  catalog (the parsed tuples are shared between rows), and a uint64 bitset
+  per row over the distinct test type names, for filtering and balancing
+
+Only the distinct categorical values are parsed in Python; everything else is
+vectorized. A parsed catalog is cached in a binary columnar file keyed by the
+CSV content hash: Parquet when pyarrow is installed, otherwise NumPy .npz, so
+a rebuild of the index skips the CSV parse.
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .index_store import file_sha256
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pyarrow is optional (the .npz cache needs only NumPy); it is imported only
+# when a Parquet file is read or written, to keep it off the startup path
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+logger = logging.getLogger(__name__)
+
+# Columns of data/catalog.csv, in file order
+CATALOG_COLUMNS = (
+    "url",
+    "name",
+    "description",
+    "duration",
+    "test_type",
+    "remote_support",
+    "adaptive_support",
+)
+
+CSV_DTYPES = {
+    "url": str,
+    "name": str,
+    "description": str,
+    "duration": str,  # coerced to int below; blanks and junk become 0
+    "test_type": "category",
+    "remote_support": "category",
+    "adaptive_support": "category",
+}
+
+UNKNOWN = "Unknown"
+
+# Test type names a bitset can hold
+MAX_TEST_TYPES = 64
+
+# Bump whenever the cache layout changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_EXTENSION = ".parquet" if HAS_PYARROW else ".npz"
+
+
+def split_test_types(value) -> tuple:
+    """'Knowledge & Skills;Personality & Behavior' -> ('Knowledge & Skills', 'Personality & Behavior')"""
+    return tuple(x.strip() for x in str(value).split(";") if x.strip())
+
+
+def vocab_index(vocab: list, key) -> int:
+    try:
+        return vocab.index(key)
+    except ValueError:
+        vocab.append(key)
+        return len(vocab) - 1
+
+
+def encode(values, vocab: list, missing, parse=str) -> np.ndarray:
+    """
+    int32 codes of `values` into `vocab`, which is extended in place with
+    unseen values (existing codes stay valid). Missing values get the code of
+    `missing`; `parse` turns each distinct raw value into its vocab entry.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    lookup = np.array([vocab_index(vocab, parse(u)) for u in uniques] + [vocab_index(vocab, missing)], dtype=np.int32)
+    return lookup[codes]  # the NA sentinel -1 picks the last entry
+
+
+def type_set_bits(type_sets: Sequence[tuple], type_names: list) -> np.ndarray:
+    """Bitset of each test-type combination over `type_names` (extended in place)."""
+    bits = np.zeros(len(type_sets), dtype=np.uint64)
+    for i, types in enumerate(type_sets):
+        for t in types:
+            bits[i] |= np.uint64(1) << np.uint64(vocab_index(type_names, t))
+    if len(type_names) > MAX_TEST_TYPES:
+        raise ValueError(f"At most {MAX_TEST_TYPES} distinct test types are supported, got {len(type_names)}")
+    return bits
+
+
+def _utf8_columns(strings: List[str]):
+    """One str column as (UTF-8 bytes, character offsets): decoded once, then sliced."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    return np.frombuffer("".join(strings).encode("utf-8"), dtype=np.uint8), offsets
+
+
+def _from_utf8(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    text = data.tobytes().decode("utf-8")
+    bounds = offsets.tolist()
+    return [text[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+@dataclass
+class Catalog:
+    url: List[str]
+    name: List[str]
+    description: List[str]
+    duration: np.ndarray  # int32
+    remote_codes: np.ndarray  # int32 codes into remote_values
+    remote_values: List[str]
+    adaptive_codes: np.ndarray
+    adaptive_values: List[str]
+    type_codes: np.ndarray  # int32 codes into type_sets
+    type_sets: List[tuple]  # distinct test-type combinations
+    type_names: List[str]  # bit i of type_bits
+
+    def __len__(self) -> int:
+        return len(self.url)
+
+    @cached_property
+    def type_bits(self) -> np.ndarray:
+        """uint64 bitset of each row's test types over type_names."""
+        return type_set_bits(self.type_sets, list(self.type_names))[self.type_codes]
+
+    def rows(self) -> List[tuple]:
+        """Result tuples in RESULT_FIELDS order (see app/row_store.py)."""
+        remote = np.array(self.remote_values, dtype=object)[self.remote_codes].tolist()
+        adaptive = np.array(self.adaptive_values, dtype=object)[self.adaptive_codes].tolist()
+        types = [self.type_sets[c] for c in self.type_codes.tolist()]
+        return list(
+            zip(self.url, self.name, adaptive, self.description, self.duration.tolist(), remote, types)
+        )
+
+    @classmethod
+    def from_frame(cls, df: "pd.DataFrame") -> "Catalog":
+        """From a frame with the catalog.csv columns (raw strings, NaN for blanks)."""
+        import pandas as pd
+
+        for col in CATALOG_COLUMNS:
+            if col not in df.columns:
+                raise ValueError(f"Missing column {col} in catalog.csv")
+
+        def strings(col: str) -> List[str]:
+            return df[col].fillna("").astype(str).tolist()
+
+        remote_values, adaptive_values, type_sets = [UNKNOWN], [UNKNOWN], [()]
+        type_codes = encode(df["test_type"], type_sets, (), parse=split_test_types)
+        type_names: List[str] = []
+        type_set_bits(type_sets, type_names)
+        return cls(
+            url=strings("url"),
+            name=strings("name"),
+            description=strings("description"),
+            duration=pd.to_numeric(df["duration"], errors="coerce").fillna(0).to_numpy(dtype=np.int32),
+            remote_codes=encode(df["remote_support"], remote_values, UNKNOWN),
+            remote_values=remote_values,
+            adaptive_codes=encode(df["adaptive_support"], adaptive_values, UNKNOWN),
+            adaptive_values=adaptive_values,
+            type_codes=type_codes,
+            type_sets=type_sets,
+            type_names=type_names,
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "Catalog":
+        """From result tuples (RESULT_FIELDS order), e.g. the rows of a snapshot."""
+        rows = list(rows)
+        remote_values, adaptive_values = [UNKNOWN], [UNKNOWN]
+        # Tuples would become a 2-D object array, so combinations are coded with a dict
+        combos = {(): 0}
+        type_codes = np.fromiter(
+            (combos.setdefault(tuple(r[6]), len(combos)) for r in rows), dtype=np.int32, count=len(rows)
+        )
+        type_sets = list(combos)
+        type_names: List[str] = []
+        type_set_bits(type_sets, type_names)
+        return cls(
+            url=[r[0] for r in rows],
+            name=[r[1] for r in rows],
+            description=[r[3] for r in rows],
+            duration=np.fromiter((r[4] for r in rows), dtype=np.int32, count=len(rows)),
+            remote_codes=encode(np.array([r[5] for r in rows], dtype=object), remote_values, UNKNOWN),
+            remote_values=remote_values,
+            adaptive_codes=encode(np.array([r[2] for r in rows], dtype=object), adaptive_values, UNKNOWN),
+            adaptive_values=adaptive_values,
+            type_codes=type_codes,
+            type_sets=type_sets,
+            type_names=type_names,
+        )
+
+    # ----- binary cache -----
+
+    def _vocab(self) -> str:
+        return json.dumps(
+            {
+                "format": CACHE_FORMAT_VERSION,
+                "remote_values": self.remote_values,
+                "adaptive_values": self.adaptive_values,
+                "type_sets": [list(t) for t in self.type_sets],
+                "type_names": self.type_names,
+            }
+        )
+
+    @classmethod
+    def _with_vocab(cls, vocab: str, **columns) -> Optional["Catalog"]:
+        meta = json.loads(vocab)
+        if meta.get("format") != CACHE_FORMAT_VERSION:
+            return None
+        return cls(
+            remote_values=meta["remote_values"],
+            adaptive_values=meta["adaptive_values"],
+            type_sets=[tuple(t) for t in meta["type_sets"]],
+            type_names=meta["type_names"],
+            **columns,
+        )
+
+    def save(self, path: str) -> None:
+        """Write the cache file atomically; Parquet or .npz by the extension of `path`."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".catalog-", suffix=os.path.splitext(path)[1], dir=directory)
+        os.close(fd)
+        try:
+            if path.endswith(".parquet"):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.table(
+                    {
+                        "url": self.url,
+                        "name": self.name,
+                        "description": self.description,
+                        "duration": self.duration,
+                        "remote_codes": self.remote_codes,
+                        "adaptive_codes": self.adaptive_codes,
+                        "type_codes": self.type_codes,
+                    }
+                )
+                pq.write_table(table.replace_schema_metadata({"catalog": self._vocab()}), tmp)
+            else:
+                arrays = {}
+                for col in ("url", "name", "description"):
+                    arrays[f"{col}_data"], arrays[f"{col}_offsets"] = _utf8_columns(getattr(self, col))
+                with open(tmp, "wb") as f:
+                    np.savez(
+                        f,
+                        duration=self.duration,
+                        remote_codes=self.remote_codes,
+                        adaptive_codes=self.adaptive_codes,
+                        type_codes=self.type_codes,
+                        vocab=np.array(self._vocab()),
+                        **arrays,
+                    )
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Catalog"]:
+        """Read a cache file written by `save`; None if it is from another cache format."""
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(path)
+            return cls._with_vocab(
+                table.schema.metadata[b"catalog"].decode("utf-8"),
+                url=table.column("url").to_pylist(),
+                name=table.column("name").to_pylist(),
+                description=table.column("description").to_pylist(),
+                duration=table.column("duration").to_numpy(),
+                remote_codes=table.column("remote_codes").to_numpy(),
+                adaptive_codes=table.column("adaptive_codes").to_numpy(),
+                type_codes=table.column("type_codes").to_numpy(),
+            )
+        with np.load(path) as npz:
+            return cls._with_vocab(
+                str(npz["vocab"]),
+                url=_from_utf8(npz["url_data"], npz["url_offsets"]),
+                name=_from_utf8(npz["name_data"], npz["name_offsets"]),
+                description=_from_utf8(npz["description_data"], npz["description_offsets"]),
+                duration=npz["duration"],
+                remote_codes=npz["remote_codes"],
+                adaptive_codes=npz["adaptive_codes"],
+                type_codes=npz["type_codes"],
+            )
+
+
+def read_catalog_csv(path: str) -> Catalog:
+    import pandas as pd
+
+    engine = "pyarrow" if HAS_PYARROW else "c"
+    return Catalog.from_frame(pd.read_csv(path, dtype=CSV_DTYPES, engine=engine))
+
+
+def load_catalog(path: str, cache_dir: Optional[str] = None) -> Catalog:
+    """The catalog at `path`, through the binary cache in `cache_dir` when one is given."""
+    if not cache_dir:
+        return read_catalog_csv(path)
+
+    cache_path = os.path.join(cache_dir, file_sha256(path)[:16] + CACHE_EXTENSION)
+    if os.path.isfile(cache_path):
+        try:
+            catalog = Catalog.load(cache_path)
+            if catalog is not None:
+                return catalog
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable catalog cache %s: %s", cache_path, e)
+
+    catalog = read_catalog_csv(path)
+    try:
+        catalog.save(cache_path)
+    except OSError as e:
+        logger.warning("Could not write catalog cache %s: %s", cache_path, e)
+    return catalog
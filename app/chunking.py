@@ -0,0 +1,62 @@
+# app/chunking.py
+"""
+Long-query handling: whole job descriptions pasted as queries.
+
+A query longer than `chunk_words` words is split into overlapping word
+windows. The windows are scored like separate queries (one batched encode /
+matrix product together with the rest of the batch) and their score rows are
+pooled back into one row per query: "max" keeps each catalog row's best chunk
+score, "mean" averages over chunks.
+
+The embedding model truncates its input at a fixed token count, so without
+chunking everything past the first ~200 words of a JD is ignored. The chunk
+budget (`max_chunks`) bounds the cost of one query at `max_chunks` short
+queries: windows beyond it are dropped evenly across the text, so the
+beginning, middle and end of the JD are all still represented.
+"""
+from __future__ import annotations
+
+from typing import List, Sequence
+
+import numpy as np
+import scipy.sparse as sp
+
+POOLINGS = ("max", "mean")
+
+
+def split_query(text: str, chunk_words: int, overlap: int = 0, max_chunks: int = 8) -> List[str]:
+    """Chunks of `text` (the text itself when it is short enough or `chunk_words` is 0)."""
+    words = text.split()
+    if chunk_words <= 0 or len(words) <= chunk_words:
+        return [text]
+    step = max(1, chunk_words - overlap)
+    starts = list(range(0, len(words) - overlap, step))
+    if len(starts) > max_chunks:
+        keep = np.unique(np.linspace(0, len(starts) - 1, max(1, max_chunks)).round().astype(int))
+        starts = [starts[i] for i in keep]
+    return [" ".join(words[s : s + chunk_words]) for s in starts]
+
+
+def pool_scores(scores: np.ndarray, counts: Sequence[int], method: str = "max") -> np.ndarray:
+    """
+    Collapse a (total_chunks, n_rows) score block (dense, or CSR from the IVF
+    backend) into (len(counts), n_rows), where query i owns the next counts[i]
+    rows of `scores`.
+    """
+    counts = np.asarray(counts)
+    if (counts == 1).all():
+        return scores
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    if sp.issparse(scores):
+        # Candidate-only blocks (IVF): rows no chunk scored stay implicit zeros, as in the dense case
+        pooled = []
+        for start, count in zip(offsets, counts):
+            block = scores[start : start + count]
+            if method == "max":
+                pooled.append(block.max(axis=0))
+            else:
+                pooled.append(sp.csr_matrix(np.full((1, count), 1.0 / count, dtype=scores.dtype)) @ block)
+        return sp.vstack(pooled, format="csr")
+    if method == "max":
+        return np.maximum.reduceat(scores, offsets, axis=0)
+    return np.add.reduceat(scores, offsets, axis=0) / counts[:, None].astype(scores.dtype)
@@ -3,11 +3,129 @@
 # Whether to use sentence-transformer embeddings instead of TF-IDF
 USE_EMBEDDINGS = False  # keep False for now unless you've installed sentence-transformers
 
+# Retrieval mode: "tfidf", "embeddings", or "hybrid" (BM25 + embeddings,
+# fused with reciprocal-rank fusion). Defaults follow USE_EMBEDDINGS.
+RETRIEVAL_MODE = "embeddings" if USE_EMBEDDINGS else "tfidf"
+
+# Hybrid mode: candidates taken from each retriever, the RRF constant, BM25
+# parameters, and the catalog size above which the exact backend no longer
+# runs a full dense scan (dense scoring is then limited to BM25 candidates;
+# use INDEX_BACKEND = "ivf" to also get dense-only candidates cheaply).
+HYBRID_CANDIDATES = 100
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_FULL_SCAN_MAX_ROWS = 50000
+
 # Name of the sentence-transformers model (used only if USE_EMBEDDINGS = True)
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Storage for the normalized document embeddings: "float32" (exact),
+# "float16" (half the scanned memory) or "int8" (a quarter). Reduced precisions
+# rescore their best EMBEDDING_RESCORE_CANDIDATES rows per query against the
+# float32 matrix, which is kept too: memory-mapped from INDEX_DIR (only rescored
+# rows are paged in), but fully resident, i.e. 1.5x / 1.25x float32, when the
+# index is built in memory only (INDEX_DIR = None) and for rows added since the
+# last compaction.
+EMBEDDING_PRECISION = "float32"
+EMBEDDING_RESCORE_CANDIDATES = 100
+
+# Search backend for the embedding scan: "exact" (brute force) or "ivf"
+# (approximate; k-means clusters, only the IVF_NPROBE nearest are scanned).
+# TF-IDF mode always uses the exact inverted index.
+INDEX_BACKEND = "exact"
+IVF_NLIST = None  # None -> sqrt(catalog rows)
+IVF_NPROBE = 8
+IVF_TRAIN_ITERS = 10
+
+# Embedding-mode request coalescing: concurrent queries arriving within
+# EMBED_BATCH_MAX_WAIT_MS are encoded and scored together (up to
+# EMBED_BATCH_MAX_SIZE per batch). Set the wait to 0 to encode per request.
+# Batches can only be as large as the number of concurrent scoring workers.
+EMBED_BATCH_MAX_SIZE = 32
+EMBED_BATCH_MAX_WAIT_MS = 5.0
+
+# Long queries (pasted job descriptions, see app/chunking.py): queries over
+# QUERY_CHUNK_WORDS words are split into windows of that many words
+# (QUERY_CHUNK_OVERLAP shared between neighbours), scored in one batch and
+# pooled per catalog row with QUERY_CHUNK_POOLING ("max" or "mean"). At most
+# QUERY_MAX_CHUNKS windows are scored per query. 0 words disables chunking.
+QUERY_CHUNK_WORDS = 128
+QUERY_CHUNK_OVERLAP = 16
+QUERY_MAX_CHUNKS = 8
+QUERY_CHUNK_POOLING = "max"
+
 # Path to your scraped/built catalog
 CATALOG_PATH = "data/catalog.csv"
 
+# Parsed, typed copies of catalog files (Parquet with pyarrow, else .npz), keyed
+# by file content hash, so a rebuild skips the CSV parse. None disables it.
+CATALOG_CACHE_DIR = "data/catalog_cache"
+
+# Where prebuilt index artifacts are stored (one subdirectory per catalog/index hash).
+# Set to None to always rebuild the index in memory.
+INDEX_DIR = "data/index"
+
+# Live catalog updates (admin API / add_assessments & co.): appended rows and
+# tombstones are folded into a freshly built index by a background compaction
+# every COMPACTION_INTERVAL_SECONDS, or as soon as COMPACTION_MAX_PENDING
+# changes pile up. With CATALOG_WRITE_BACK, compaction also rewrites
+# CATALOG_PATH and the index artifacts (replacing the previous ones) so a
+# restart serves the updated catalog; off by default, updates then live in
+# memory only and a restart serves CATALOG_PATH as is.
+COMPACTION_INTERVAL_SECONDS = 60.0
+COMPACTION_MAX_PENDING = 1000
+CATALOG_WRITE_BACK = False
+
+# Hot index swap: CATALOG_PATH is polled every CATALOG_POLL_SECONDS (0 turns
+# polling off; POST /admin/reload still works) and a replacement index is built
+# in the background when its content hash changes. The new index answers
+# WARMUP_QUERIES before it starts serving traffic.
+CATALOG_POLL_SECONDS = 5.0
+WARMUP_QUERIES = [
+    "Java developer who can collaborate with business teams",
+    "Sales manager with strong communication skills",
+    "Entry level Python and SQL data analyst",
+]
+
 # Maximum number of recommendations to return
 MAX_K = 10
+
+# Balancing of queries that are both technical and behavioral (see app/diversify.py):
+# - "quota": CATEGORY_QUOTAS is the share of the k results reserved for each
+#   category ("knowledge" = Knowledge & Skills, "personality" = Personality &
+#   Behavior), filled alternately with each category's best rows; slots left
+#   over are filled by score.
+# - "mmr": maximal marginal relevance, trading score (weight MMR_LAMBDA)
+#   against test-type overlap with the rows already picked.
+DIVERSIFICATION = "quota"
+CATEGORY_QUOTAS = {"knowledge": 0.5, "personality": 0.5}
+MMR_LAMBDA = 0.7
+
+# Maximum number of queries accepted by a single /recommend/batch call
+MAX_BATCH_QUERIES = 1000
+
+# /recommend response cache: LRU entries (0 disables), time-to-live, and whether
+# to keep the serialized JSON bytes so cache hits skip pydantic entirely
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL_SECONDS = 300.0
+CACHE_RESPONSE_BYTES = True
+
+# Scoring thread pool: worker threads, extra queued requests allowed beyond them,
+# and the Retry-After (seconds) sent with 503 once both are full
+SCORING_WORKERS = 32 if USE_EMBEDDINGS else 4  # embedding workers mostly wait on the batcher
+SCORING_QUEUE_DEPTH = 32
+OVERLOAD_RETRY_AFTER_SECONDS = 1
+
+# scripts/serve.py: uvicorn worker processes (None -> one per CPU). Workers
+# memory-map the same index artifacts, so each adds little beyond the
+# embedding model.
+SERVE_WORKERS = None
+
+# Observability: per-stage timing histograms exported at /metrics (False turns
+# the stage timers into no-ops). PROFILE_SAMPLE_RATE is the fraction of
+# /recommend requests whose stage breakdown is recorded; the PROFILE_KEEP
+# slowest are served by GET /admin/profile. 0 disables the profiler.
+METRICS_ENABLED = True
+PROFILE_SAMPLE_RATE = 0.0
+PROFILE_KEEP = 20
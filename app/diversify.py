@@ -0,0 +1,91 @@
+# app/diversify.py
+"""
+Diversification of a query's candidate rows into the final top-k.
+
+Both strategies only look at the candidates already selected for the query
+(row ids in score order), so their cost depends on the number of candidates,
+never on the catalog size.
+
+- quota: each category gets a share of the k slots, filled with its best
+  candidates (categories take turns), then free slots are topped up in score
+  order. A single pass over the candidates: O(candidates).
+- mmr: maximal marginal relevance. Each pick maximises
+  lam * relevance - (1 - lam) * max overlap with the rows already picked,
+  where relevance is the candidate's (min-max scaled) similarity score and
+  overlap is the Jaccard similarity of the two rows' test types.
+  O(k * candidates), vectorized per pick.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import List, Sequence
+
+import numpy as np
+
+
+def quota_targets(quotas: Sequence[float], k: int) -> List[int]:
+    """
+    Slots reserved per category. Every category but the last gets
+    floor(share * k); the last gets the rest of round(sum(shares) * k), so
+    shares summing to 1 reserve all k slots.
+    """
+    total = min(k, int(round(sum(quotas) * k)))
+    targets = [int(q * k) for q in quotas[:-1]]
+    targets.append(max(0, total - sum(targets)))
+    return targets
+
+
+def select_quota(candidates: np.ndarray, members: np.ndarray, quotas: Sequence[float], k: int) -> List[int]:
+    """
+    `members` is a (n_categories, n_candidates) boolean array. A candidate
+    counts for a category only if it belongs to no other listed category.
+    """
+    candidates = np.asarray(candidates)
+    exclusive = members & (members.sum(axis=0) == 1)
+    picked = [
+        candidates[np.flatnonzero(exclusive[c])[:target]].tolist()
+        for c, target in enumerate(quota_targets(quotas, k))
+    ]
+    # Categories take turns: first of each, then second of each, ...
+    selected = [i for turn in itertools.zip_longest(*picked, fillvalue=-1) for i in turn if i >= 0]
+
+    if len(selected) < k:
+        taken = set(selected)
+        for i in candidates.tolist():
+            if i not in taken:
+                selected.append(i)
+                if len(selected) >= k:
+                    break
+    return selected
+
+
+def select_mmr(candidates: np.ndarray, scores: np.ndarray, type_bits: np.ndarray, k: int, lam: float) -> List[int]:
+    """
+    `scores` and `type_bits` (uint64 test-type bitsets, see app/catalog.py) are
+    aligned with `candidates`.
+    """
+    candidates = np.asarray(candidates)
+    n = len(candidates)
+    if n == 0:
+        return []
+    scores = np.asarray(scores, dtype=np.float64)
+    spread = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / spread if spread > 0 else np.ones(n)
+
+    bits = np.asarray(type_bits, dtype=np.uint64)
+    onehot = ((bits[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)).astype(np.float64)
+    inter = onehot @ onehot.T
+    sizes = onehot.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - inter
+    overlap = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+    selected = []
+    redundancy = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    for _ in range(min(k, n)):
+        gain = np.where(available, lam * relevance - (1.0 - lam) * redundancy, -np.inf)
+        best = int(np.argmax(gain))
+        selected.append(int(candidates[best]))
+        available[best] = False
+        np.maximum(redundancy, overlap[best], out=redundancy)
+    return selected
@@ -0,0 +1,65 @@
+# app/executor.py
+"""
+Dedicated, bounded thread pool for CPU-bound scoring.
+
+Async handlers hand work to the pool and await it, so the event loop (and
+endpoints like /health) stay responsive. The pool admits at most
+``max_workers + max_queue`` jobs at once; beyond that ``run`` fails fast with
+ExecutorSaturated instead of letting the queue, and latency, grow without bound.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor is already running/queueing its maximum number of jobs."""
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int, max_queue: int, thread_name_prefix: str = "scoring"):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _fut: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturated()
+            self._pending += 1
+
+        try:
+            fut = self._pool.submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # Released when the job really finishes, even if the awaiting request is cancelled
+        fut.add_done_callback(self._release)
+        return await asyncio.wrap_future(fut)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
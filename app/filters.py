@@ -0,0 +1,182 @@
+# app/filters.py
+"""
+Structured filters for recommendations (duration limit, remote / adaptive
+support, test type).
+
+A FilterIndex is built with each IndexSnapshot from the typed catalog columns
+(app/catalog.py): durations as an int array, remote / adaptive support as
+small integer codes and test types as one uint64 bitset per row. A request's
+filters are resolved to a single row mask with vectorized comparisons on those
+arrays; the result is cached per distinct filter combination. The
+recommender applies that mask before top-k selection, so a filtered request
+scores like an unfiltered one and still gets k results when k rows match.
+
+Rows whose attribute is unknown (duration 0, "Unknown" flags, no test types)
+only pass a filter on that attribute when `include_unknown` is set.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalog import UNKNOWN, Catalog, type_set_bits, vocab_index
+
+# Distinct filter combinations whose row mask is kept per snapshot
+MASK_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class RecommendFilters:
+    max_duration: Optional[int] = None
+    remote_support: Optional[str] = None  # "Yes" / "No"
+    adaptive_support: Optional[str] = None
+    test_types: Tuple[str, ...] = ()  # lowercased, sorted; a row needs any one of them
+    include_unknown: bool = False
+
+    @classmethod
+    def build(
+        cls,
+        max_duration: Optional[int] = None,
+        remote_support: Optional[str] = None,
+        adaptive_support: Optional[str] = None,
+        test_types: Optional[Iterable[str]] = None,
+        include_unknown: bool = False,
+    ) -> Optional["RecommendFilters"]:
+        """Canonical filters (usable as a cache key), or None when nothing is filtered."""
+        types = tuple(sorted({t.strip().lower() for t in test_types or () if t.strip()}))
+        if max_duration is None and remote_support is None and adaptive_support is None and not types:
+            return None
+        return cls(max_duration, remote_support, adaptive_support, types, include_unknown)
+
+
+def _remap(values: List[str], new_values: Sequence[str], codes: np.ndarray) -> np.ndarray:
+    """Re-express `codes` into `new_values` as codes into `values` (extended in place)."""
+    lookup = np.array([vocab_index(values, v) for v in new_values], dtype=np.int32)
+    return lookup[codes]
+
+
+class FilterIndex:
+    def __init__(
+        self,
+        durations: np.ndarray,
+        remote_codes: np.ndarray,
+        remote_values: List[str],
+        adaptive_codes: np.ndarray,
+        adaptive_values: List[str],
+        type_bits: np.ndarray,
+        type_names: List[str],
+    ):
+        self.durations = durations
+        self.remote_codes = remote_codes  # codes into remote_values
+        self.remote_values = remote_values
+        self.adaptive_codes = adaptive_codes
+        self.adaptive_values = adaptive_values
+        self.type_bits = type_bits  # uint64 bitset over type_names; 0 = no test type
+        self.type_names = type_names
+        self._masks: "OrderedDict[RecommendFilters, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.durations)
+
+    @classmethod
+    def from_catalog(cls, catalog: Catalog) -> "FilterIndex":
+        return cls(
+            durations=catalog.duration,
+            remote_codes=catalog.remote_codes,
+            remote_values=list(catalog.remote_values),
+            adaptive_codes=catalog.adaptive_codes,
+            adaptive_values=list(catalog.adaptive_values),
+            type_bits=catalog.type_bits,
+            type_names=list(catalog.type_names),
+        )
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict, values: Dict) -> "FilterIndex":
+        return cls(
+            durations=arrays["filter_duration"],
+            remote_codes=arrays["filter_remote_codes"],
+            remote_values=values["remote"],
+            adaptive_codes=arrays["filter_adaptive_codes"],
+            adaptive_values=values["adaptive"],
+            type_bits=arrays["filter_type_bits"],
+            type_names=values["test_types"],
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist in the index artifacts (with `values()` as a blob)."""
+        return {
+            "filter_duration": self.durations,
+            "filter_remote_codes": self.remote_codes,
+            "filter_adaptive_codes": self.adaptive_codes,
+            "filter_type_bits": self.type_bits,
+        }
+
+    def values(self) -> Dict[str, List[str]]:
+        return {"remote": self.remote_values, "adaptive": self.adaptive_values, "test_types": self.type_names}
+
+    def extend(self, catalog: Catalog) -> "FilterIndex":
+        """A new index over this one's rows followed by the rows of `catalog`; existing codes are kept."""
+        remote_values, adaptive_values = list(self.remote_values), list(self.adaptive_values)
+        type_names = list(self.type_names)
+        type_bits = type_set_bits(catalog.type_sets, type_names)[catalog.type_codes]
+        return FilterIndex(
+            durations=np.concatenate([self.durations, catalog.duration]),
+            remote_codes=np.concatenate(
+                [self.remote_codes, _remap(remote_values, catalog.remote_values, catalog.remote_codes)]
+            ),
+            remote_values=remote_values,
+            adaptive_codes=np.concatenate(
+                [self.adaptive_codes, _remap(adaptive_values, catalog.adaptive_values, catalog.adaptive_codes)]
+            ),
+            adaptive_values=adaptive_values,
+            type_bits=np.concatenate([self.type_bits, type_bits]),
+            type_names=type_names,
+        )
+
+    def _matches(self, codes: np.ndarray, values: List[str], wanted: List[str]) -> np.ndarray:
+        wanted_codes = [values.index(v) for v in wanted if v in values]
+        return np.isin(codes, wanted_codes)
+
+    def mask(self, filters: RecommendFilters) -> np.ndarray:
+        """Boolean row mask of the rows passing `filters` (cached)."""
+        with self._lock:
+            cached = self._masks.get(filters)
+            if cached is not None:
+                self._masks.move_to_end(filters)
+                return cached
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        unknown_ok = filters.include_unknown
+
+        if filters.max_duration is not None:
+            known = self.durations > 0
+            passes = known & (self.durations <= filters.max_duration)
+            mask &= passes | ~known if unknown_ok else passes
+        for value, codes, values in (
+            (filters.remote_support, self.remote_codes, self.remote_values),
+            (filters.adaptive_support, self.adaptive_codes, self.adaptive_values),
+        ):
+            if value is None:
+                continue
+            mask &= self._matches(codes, values, [value, UNKNOWN] if unknown_ok else [value])
+        if filters.test_types:
+            wanted = 0
+            for bit, name in enumerate(self.type_names):
+                if name.lower() in filters.test_types:
+                    wanted |= 1 << bit
+            passes = (self.type_bits & np.uint64(wanted)) != 0
+            if unknown_ok:
+                passes |= self.type_bits == 0
+            mask &= passes
+
+        with self._lock:
+            self._masks[filters] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
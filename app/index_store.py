@@ -0,0 +1,163 @@
+# app/index_store.py
+"""
+On-disk index artifacts, so processes can memory-map a prebuilt index instead
+of re-reading the catalog and refitting/re-encoding it on every start.
+
+Layout of one artifact directory (``<index_dir>/<key>/``):
+
+    meta.json          format version, key, retrieval mode, row count
+    rows_*.npy         per-row result metadata, column-wise (see app/row_store.py)
+    row_test_types.json  test type names for rows_test_type_codes
+    filter_*.npy       typed filter columns: durations, remote/adaptive codes,
+                       test-type bitsets (see app/filters.py)
+    filter_values.json code -> value lists for the filter columns
+    is_knowledge.npy   boolean category arrays used by balancing
+    is_personality.npy
+    vocabulary.json    TF-IDF term -> column            (tfidf mode)
+    idf.npy            TF-IDF idf weights                (tfidf mode)
+    tfidf_data.npy     CSR components of doc_matrix      (tfidf mode)
+    tfidf_indices.npy
+    tfidf_indptr.npy
+    postings_*.npy     term-major copy of doc_matrix     (tfidf mode)
+    embeddings.npy     L2-normalized float32 doc_matrix  (embedding mode)
+    embeddings_codes.npy   float16/int8 scoring copy     (reduced precision)
+    embeddings_scales.npy  per-row int8 scales           (int8)
+    ivf_*.npy          centroids and inverted lists      (ivf backend)
+    bm25_*.npy         term-major BM25 weights, idf and corpus stats (hybrid mode)
+    bm25_vocabulary.json
+
+The key is a hash of the catalog file contents plus every setting that changes
+the index, so a changed catalog or model never picks up stale artifacts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the artifact layout changes
+ARTIFACT_FORMAT_VERSION = 6
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def index_key(catalog_path: str, params: Dict) -> str:
+    """Content hash of the catalog plus the index-shaping parameters."""
+    h = hashlib.sha256()
+    h.update(file_sha256(catalog_path).encode())
+    h.update(json.dumps({"format": ARTIFACT_FORMAT_VERSION, **params}, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+
+def artifact_path(index_dir: str, key: str) -> str:
+    return os.path.join(index_dir, key)
+
+
+@contextmanager
+def build_lock(index_dir: str, key: str) -> Iterator[None]:
+    """
+    Exclusive cross-process lock for building the artifacts of `key`. Best
+    effort: without fcntl or a writable index_dir the block runs unlocked.
+    """
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        f = open(os.path.join(index_dir, f".{key}.lock"), "a")
+    except OSError as e:
+        logger.warning("Could not create index build lock in %s: %s", index_dir, e)
+        yield
+        return
+    try:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+    finally:
+        f.close()  # releases the lock
+
+
+def save_artifacts(index_dir: str, key: str, meta: Dict, arrays: Dict[str, np.ndarray], blobs: Dict) -> str:
+    """
+    Write one artifact directory atomically: everything goes to a temporary
+    sibling directory which is renamed into place, so concurrent readers (or
+    workers racing to build the same key) never see a half-written index.
+    """
+    final = artifact_path(index_dir, key)
+    if os.path.isdir(final):
+        return final
+
+    os.makedirs(index_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{key}-", dir=index_dir)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+        for name, obj in blobs.items():
+            with open(os.path.join(tmp, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(obj, f, ensure_ascii=False)
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": ARTIFACT_FORMAT_VERSION, "key": key, **meta}, f, indent=2)
+
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            # Another process won the race; its copy is equivalent
+            if not os.path.isdir(final):
+                raise
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+    return final
+
+
+def remove_artifacts(index_dir: str, key: str) -> None:
+    """
+    Best-effort removal of an artifact directory. Processes that still map its
+    arrays keep working: unlinked files stay readable until they are unmapped.
+    The build lock file is left alone, a concurrent builder may hold it.
+    """
+    shutil.rmtree(artifact_path(index_dir, key), ignore_errors=True)
+
+
+def load_artifacts(index_dir: str, key: str) -> Optional[Dict]:
+    """
+    Open an artifact directory, or return None if it does not exist.
+    Arrays are memory-mapped read-only, so every process using the same
+    artifacts shares one copy of the pages through the OS page cache.
+    """
+    path = artifact_path(index_dir, key)
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.isfile(meta_path):
+        return None
+
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != ARTIFACT_FORMAT_VERSION:
+        return None
+
+    out = {"meta": meta}
+    for fname in os.listdir(path):
+        name, ext = os.path.splitext(fname)
+        if ext == ".npy":
+            out[name] = np.load(os.path.join(path, fname), mmap_mode="r")
+        elif ext == ".json" and name != "meta":
+            with open(os.path.join(path, fname), encoding="utf-8") as f:
+                out[name] = json.load(f)
+    return out
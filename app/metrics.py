@@ -0,0 +1,313 @@
+# app/metrics.py
+"""
+In-process metrics exported in the Prometheus text exposition format.
+
+Histograms, counters and gauges are updated on the request path; values that
+already live elsewhere (cache counters, index size) are read by collector
+callbacks only when /metrics is scraped.
+
+Stage timing: ``with stage("score"):`` observes the block's duration in
+recommender_stage_seconds{stage="score"} and, if a RequestTrace is active in
+the current context, adds it to that request's breakdown. Traces are only
+created for the requests picked by the SlowRequestSampler.
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .config import METRICS_ENABLED
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# (metric name suffix, label dict, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield "_bucket", {**labels, "le": _number(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        # Each collector returns (name, type, help, samples) families at scrape time
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        families = [(m.name, m.type, m.documentation, m.samples()) for m in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+
+        lines = []
+        for name, type_, documentation, samples in families:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {type_}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("recommender_stage_seconds", "Time spent in each stage of a recommendation.", ("stage",))
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram("recommender_http_request_seconds", "HTTP request latency by route.", ("method", "route"))
+)
+REQUESTS = REGISTRY.register(
+    Counter("recommender_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+)
+IN_FLIGHT = REGISTRY.register(Gauge("recommender_http_requests_in_flight", "HTTP requests being served."))
+
+
+# ----- per-request stage breakdowns -----
+
+
+class RequestTrace:
+    __slots__ = ("label", "started", "seconds", "stages", "info")
+
+    def __init__(self, label: str, **info):
+        self.label = label
+        self.started = time.time()
+        self.seconds = 0.0
+        self.stages: Dict[str, float] = {}
+        self.info = info
+
+    def add(self, stage_name: str, seconds: float) -> None:
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def as_dict(self) -> Dict:
+        return {
+            "label": self.label,
+            "started": self.started,
+            "ms": self.seconds * 1000.0,
+            "stages_ms": {name: s * 1000.0 for name, s in self.stages.items()},
+            **self.info,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def activate(trace: Optional[RequestTrace]) -> Iterator[None]:
+    """Make `trace` collect the stages timed in this context (e.g. on a worker thread)."""
+    token = _current_trace.set(trace)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Record a stage duration measured by the caller."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def _timed_stage(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def _untimed_stage(name: str) -> Iterator[None]:
+    yield
+
+
+stage = _timed_stage if METRICS_ENABLED else _untimed_stage
+
+
+class SlowRequestSampler:
+    """
+    Opt-in profiler: traces a random `sample_rate` fraction of requests and
+    keeps the `keep` slowest of them, with their stage breakdowns.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, keep: int = 20):
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self._heap: List[Tuple[float, int, RequestTrace]] = []  # min-heap on duration
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.sampled = 0
+
+    def start(self, label: str, **info) -> Optional[RequestTrace]:
+        """A new trace if this request is sampled, else None."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        return RequestTrace(label, **info)
+
+    def finish(self, trace: Optional[RequestTrace], seconds: float) -> None:
+        if trace is None:
+            return
+        trace.seconds = seconds
+        entry = (seconds, next(self._seq), trace)
+        with self._lock:
+            self.sampled += 1
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, entry)
+            elif seconds > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def slowest(self) -> List[Dict]:
+        with self._lock:
+            entries = sorted(self._heap, reverse=True)
+        return [trace.as_dict() for _, _, trace in entries]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self.sampled = 0
+
+
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge, request latency and status counts per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            # The router records the matched route in the scope; label by its
+            # template so path parameters don't explode the series count
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=method, route=path)
+            REQUESTS.inc(method=method, route=path, status=str(status["code"]))
@@ -1,8 +1,17 @@
 # app/query_analysis.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    keyword: str
+    category: str
+    start: int
+    end: int
 
 
 @dataclass
@@ -11,6 +20,7 @@ class QueryProfile:
     has_technical: bool
     has_behavioral: bool
     seniority: str  # "junior", "mid", "senior", "unknown"
+    matches: List[KeywordMatch] = field(default_factory=list)
 
 
 TECH_KEYWORDS = [
@@ -30,24 +40,103 @@ JUNIOR_WORDS = ["junior", "entry level", "graduate"]
 SENIOR_WORDS = ["senior", "lead", "principal", "head of"]
 
 
+KEYWORD_CATEGORIES = {
+    "technical": TECH_KEYWORDS,
+    "behavioral": BEHAVIORAL_KEYWORDS,
+    "junior": JUNIOR_WORDS,
+    "senior": SENIOR_WORDS,
+}
+
+_SEPARATORS = re.compile(r"[\s\-]+")
+
+
+def _normalize_keyword(text: str) -> str:
+    return _SEPARATORS.sub(" ", text.strip().lower())
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    One regex alternation for all `words`, factored by common prefix so the
+    engine never re-tries a shared prefix once per keyword. A space in a
+    keyword matches any run of whitespace or hyphens.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [
+            (r"[\s\-]+" if ch == " " else re.escape(ch)) + emit(child)
+            for ch, child in sorted(node.items())
+            if ch
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ends here but longer ones continue: greedy, so the longest wins
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Single-pass, case-insensitive matcher for categorized keywords.
+
+    All keywords are compiled once into one prefix-factored regex. Matches are
+    whole words (an optional plural "s" is allowed), so "java" does not fire
+    on "javascript" and "lead" does not fire on "leadership".
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self._categories: Dict[str, Tuple[str, ...]] = {}
+        for category, words in categories.items():
+            for word in words:
+                key = _normalize_keyword(word)
+                if key and category not in self._categories.get(key, ()):
+                    self._categories[key] = self._categories.get(key, ()) + (category,)
+        self._pattern = re.compile(
+            r"(?<!\w)(" + _trie_pattern(self._categories) + r")s?(?!\w)",
+            re.IGNORECASE,
+        )
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        matches = []
+        for m in self._pattern.finditer(text):
+            keyword = _normalize_keyword(m.group(1))
+            for category in self._categories[keyword]:
+                matches.append(KeywordMatch(keyword, category, m.start(), m.end()))
+        return matches
+
+
+KEYWORD_MATCHER = KeywordMatcher(KEYWORD_CATEGORIES)
+
+
+def match_keywords(text: str) -> List[KeywordMatch]:
+    """Every keyword occurrence in `text`, with its category, in text order."""
+    return KEYWORD_MATCHER.find_all(text)
+
+
 def analyze_query_rule_based(query: str) -> QueryProfile:
-    q = query.lower()
-    has_technical = any(k in q for k in TECH_KEYWORDS)
-    has_behavioral = any(k in q for k in BEHAVIORAL_KEYWORDS)
+    matches = match_keywords(query)
+    found = {m.category for m in matches}
 
-    seniority = "unknown"
-    if any(w in q for w in JUNIOR_WORDS):
+    if "junior" in found:
         seniority = "junior"
-    elif any(w in q for w in SENIOR_WORDS):
+    elif "senior" in found:
         seniority = "senior"
     else:
         seniority = "mid"
 
     return QueryProfile(
         text=query,
-        has_technical=has_technical,
-        has_behavioral=has_behavioral,
+        has_technical="technical" in found,
+        has_behavioral="behavioral" in found,
         seniority=seniority,
+        matches=matches,
     )
 
 
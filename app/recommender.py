@@ -1,170 +1,939 @@
 # app/recommender.py
 from __future__ import annotations
 
-from typing import List, Dict
+import csv
+import dataclasses
+import itertools
+import logging
+import os
+import tempfile
+import threading
+from collections import ChainMap
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Optional, Tuple
 
 import numpy as np
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import scipy.sparse as sp
 
-from .config import USE_EMBEDDINGS, EMBEDDING_MODEL_NAME, CATALOG_PATH, MAX_K
-from .query_analysis import analyze_query_with_llm
+from . import index_store
+from .batching import MicroBatcher
+from .catalog import CATALOG_COLUMNS, Catalog, load_catalog
+from .chunking import POOLINGS, pool_scores, split_query
+from .bm25 import BM25Index, reciprocal_rank_fusion
+from .diversify import select_mmr, select_quota
+from .filters import FilterIndex, RecommendFilters
+from .metrics import stage
+from .row_store import RESULT_FIELDS, RowTable
+from .search_index import BACKENDS, ExactIndex, IVFIndex, SearchIndex
+from .snapshot import AppendedRows, IndexSnapshot
+from .vectors import NormalizedEmbeddings, l2_normalize
+from .config import (
+    RETRIEVAL_MODE,
+    EMBEDDING_MODEL_NAME,
+    CATALOG_PATH,
+    CATALOG_CACHE_DIR,
+    MAX_K,
+    INDEX_DIR,
+    EMBED_BATCH_MAX_SIZE,
+    EMBED_BATCH_MAX_WAIT_MS,
+    EMBEDDING_PRECISION,
+    EMBEDDING_RESCORE_CANDIDATES,
+    INDEX_BACKEND,
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_TRAIN_ITERS,
+    HYBRID_CANDIDATES,
+    HYBRID_FULL_SCAN_MAX_ROWS,
+    RRF_K,
+    BM25_K1,
+    BM25_B,
+    COMPACTION_INTERVAL_SECONDS,
+    COMPACTION_MAX_PENDING,
+    CATALOG_WRITE_BACK,
+    DIVERSIFICATION,
+    CATEGORY_QUOTAS,
+    MMR_LAMBDA,
+    QUERY_CHUNK_WORDS,
+    QUERY_CHUNK_OVERLAP,
+    QUERY_MAX_CHUNKS,
+    QUERY_CHUNK_POOLING,
+)
+from .query_analysis import analyze_query_with_llm, QueryProfile
+
+# pandas (catalog CSV) and scikit-learn (TF-IDF) are imported where they are
+# used: serving prebuilt artifacts never needs pandas, and dense modes never
+# need scikit-learn, which keeps process start (and autoscaling) fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("tfidf", "embeddings", "hybrid")
+
+DIVERSIFICATIONS = ("quota", "mmr")
+
+# CATEGORY_QUOTAS keys -> IndexSnapshot category arrays
+CATEGORY_FIELDS = {"knowledge": "is_knowledge", "personality": "is_personality"}
+
+TFIDF_PARAMS = {"ngram_range": (1, 2), "stop_words": "english", "min_df": 1}
+
+# Number of queries scored per matrix product in recommend_many; bounds the
+# dense (queries x catalog) similarity block held in memory at once.
+BATCH_SCORE_CHUNK = 256
+
+
+class IndexRetired(RuntimeError):
+    """A catalog update reached an instance that has been replaced by the hot swap."""
+
+
+def _top_k_indices(
+    sims: np.ndarray, n: int, live: Optional[np.ndarray] = None, fill: bool = False
+) -> np.ndarray:
+    """
+    Indices of the n highest-scoring rows, best first.
+
+    Only positive scores are considered when any exist (otherwise we fall back
+    to the best of everything). Rows with live=False (deleted catalog entries,
+    or rows excluded by filters) are never returned. With `fill`, fewer than n
+    positive rows are padded with other allowed rows, so a filtered request
+    still gets n candidates. Uses argpartition so only the selected slice is
+    sorted, instead of sorting the whole similarity vector. A 1 x n_rows
+    sparse `sims` (IVF) is selected from its scored candidates only.
+    """
+    if sp.issparse(sims):
+        return _top_k_candidates(sims.indices, sims.data, sims.shape[1], n, live, fill)
+    pad = None
+    if live is None:
+        cand = np.flatnonzero(sims > 0)
+        if cand.size == 0:
+            cand = np.arange(sims.shape[0])
+    else:
+        positive = (sims > 0) & live
+        cand = np.flatnonzero(positive)
+        if cand.size == 0:
+            cand = np.flatnonzero(live)
+        elif fill and cand.size < n:
+            pad = np.flatnonzero(live & ~positive)[: n - cand.size]
+
+    if cand.size > n:
+        if n <= 0:
+            return cand[:0]
+        part = np.argpartition(-sims[cand], n - 1)[:n]
+        cand = cand[part]
+
+    top = cand[np.argsort(-sims[cand], kind="stable")]
+    return top if pad is None else np.concatenate([top, pad])
+
+
+def _top_k_candidates(
+    rows: np.ndarray, scores: np.ndarray, n_rows: int, n: int, live: Optional[np.ndarray] = None, fill: bool = False
+) -> np.ndarray:
+    """_top_k_indices over the scored `rows` only; every other row counts as scoring 0."""
+    if live is not None:
+        keep = live[rows]
+        rows, scores = rows[keep], scores[keep]
+    positive = scores > 0
+    matched = positive.any()
+    if matched:
+        rows, scores = rows[positive], scores[positive]
+
+    if rows.size > n:
+        if n <= 0:
+            return rows[:0]
+        part = np.argpartition(-scores, n - 1)[:n]
+        rows, scores = rows[part], scores[part]
+    top = rows[np.argsort(-scores, kind="stable")]
+
+    # Like the dense fallback, no match at all still returns n rows
+    if ((fill and live is not None) or not matched) and top.size < n:
+        allowed = np.arange(n_rows) if live is None else np.flatnonzero(live)
+        pad = allowed[~np.isin(allowed, top)][: n - top.size]
+        top = np.concatenate([top, pad])
+    return top
+
+
+def _scores_at(sims, idxs: np.ndarray) -> np.ndarray:
+    """Scores of rows `idxs` from a dense score row or a 1 x n_rows sparse one."""
+    if sp.issparse(sims):
+        return sims[:, idxs].toarray().ravel()
+    return sims[idxs]
+
+
+def _row_text(row: tuple) -> str:
+    # Retrieval text is the product name
+    return row[1]
+
+
+def _category_masks(catalog: Catalog) -> Tuple[np.ndarray, np.ndarray]:
+    """Boolean Knowledge/Skill and Personality/Behavior arrays used by balancing."""
+
+    def any_of(*words: str) -> np.ndarray:
+        wanted = sum(1 << bit for bit, name in enumerate(catalog.type_names) if any(w in name for w in words))
+        return (catalog.type_bits & np.uint64(wanted)) != 0
+
+    return any_of("Knowledge", "Skill"), any_of("Personality", "Behavior")
 
 
 class AssessmentRecommender:
-    def __init__(self, catalog_path: str = CATALOG_PATH, max_k: int = MAX_K):
+    def __init__(
+        self,
+        catalog_path: str = CATALOG_PATH,
+        max_k: int = MAX_K,
+        index_dir: Optional[str] = INDEX_DIR,
+        retrieval_mode: Optional[str] = None,
+    ):
         self.catalog_path = catalog_path
         self.max_k = max_k
+        self.index_dir = index_dir
+        self.retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode {self.retrieval_mode!r}; expected one of {RETRIEVAL_MODES}"
+            )
+        # Embedding and hybrid modes both keep a dense index
+        self.use_embeddings = self.retrieval_mode != "tfidf"
+        self.backend = INDEX_BACKEND if self.use_embeddings else "exact"
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown INDEX_BACKEND {self.backend!r}; expected one of {BACKENDS}")
+        if DIVERSIFICATION not in DIVERSIFICATIONS:
+            raise ValueError(f"Unknown DIVERSIFICATION {DIVERSIFICATION!r}; expected one of {DIVERSIFICATIONS}")
+        unknown = set(CATEGORY_QUOTAS) - set(CATEGORY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown CATEGORY_QUOTAS categories {sorted(unknown)}; expected {list(CATEGORY_FIELDS)}")
+        if QUERY_CHUNK_POOLING not in POOLINGS:
+            raise ValueError(f"Unknown QUERY_CHUNK_POOLING {QUERY_CHUNK_POOLING!r}; expected one of {POOLINGS}")
+        self._catalog_df = None
+        self._catalog_df_version = None
 
-        self.catalog_df = pd.read_csv(self.catalog_path)
-
-        required_cols = [
-            "url",
-            "name",
-            "description",
-            "duration",
-            "test_type",
-            "remote_support",
-            "adaptive_support",
-        ]
-        for col in required_cols:
-            if col not in self.catalog_df.columns:
-                raise ValueError(f"Missing column {col} in catalog.csv")
-
-        self.catalog_df.fillna(
-            {
-                "name": "",
-                "description": "",
-                "test_type": "",
-                "remote_support": "Unknown",
-                "adaptive_support": "Unknown",
-            },
-            inplace=True,
-        )
+        # Live catalog updates: writers serialize on _write_lock and swap in a
+        # new snapshot; readers only ever dereference self._snapshot once.
+        self._write_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._oplog: Optional[List] = None  # updates applied while a compaction runs
+        # Updates the catalog file does not have yet, handed to a replacement instance (see retire)
+        self._changelog: List[Tuple[List[tuple], List[str]]] = []
+        self._retired = False
+        self._generations = itertools.count(1)
+        self._compactor: Optional[threading.Thread] = None
+        self._compactor_wake = threading.Event()
+        self._closed = False
 
-        # test_type_list kept for compatibility (may be empty in current catalog)
-        self.catalog_df["test_type_list"] = self.catalog_df["test_type"].apply(
-            lambda s: [x.strip() for x in str(s).split(";") if x.strip()]
-        )
+        if self.use_embeddings:
+            from sentence_transformers import SentenceTransformer
 
-        # 🔑 Retrieval text: use clean product names only
-        self.catalog_df["text"] = self.catalog_df["name"].fillna("").astype(str)
+            self.embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
 
-        self.use_embeddings = USE_EMBEDDINGS
-        self._init_index()
+        # Catalog content hash + index settings; identifies the artifacts on disk
+        version = index_store.index_key(self.catalog_path, self._index_params())
+        self._base_version = version
 
-    def _init_index(self):
+        if not index_dir:
+            self._snapshot = self._build_snapshot(self._load_catalog(), version)
+        else:
+            # With several server processes, one builds a missing index while
+            # the others wait on the lock and then load its artifacts
+            with index_store.build_lock(index_dir, version):
+                snapshot = self._load_index(index_dir, version)
+                if snapshot is not None:
+                    logger.info("Loaded index %s from %s", version, index_dir)
+                    self._snapshot = snapshot
+                else:
+                    self._snapshot = self._build_snapshot(self._load_catalog(), version)
+                    try:
+                        self.save_index(index_dir)
+                    except OSError as e:
+                        logger.warning("Could not persist index artifacts to %s: %s", index_dir, e)
+                    else:
+                        # Serve the memory-mapped copy like every other process, so the
+                        # float32 rescoring matrix of reduced precisions is not resident
+                        self._snapshot = self._load_index(index_dir, version) or self._snapshot
+
+        # Coalesce concurrent single-query encodes into one batched encode + matmul
+        self._batcher = None
+        if self.use_embeddings and EMBED_BATCH_MAX_WAIT_MS > 0:
+            self._batcher = MicroBatcher(
+                self._score_batch,
+                max_batch_size=EMBED_BATCH_MAX_SIZE,
+                max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+                name="embed-batcher",
+            )
+
+    def __len__(self) -> int:
+        return self._snapshot.n_live
+
+    @property
+    def index_version(self) -> str:
+        """Identifies the current catalog + index contents; changes on every update."""
+        return self._snapshot.version
+
+    @property
+    def pending_changes(self) -> int:
+        """Catalog updates applied since the last compaction."""
+        return self._snapshot.pending_changes
+
+    @property
+    def base_version(self) -> str:
+        """Index key of the catalog file contents the base index was built from."""
+        return self._base_version
+
+    def file_version(self) -> str:
+        """Index key of catalog_path as it is on disk now (differs from base_version once the file changes)."""
+        return index_store.index_key(self.catalog_path, self._index_params())
+
+    @property
+    def catalog_df(self) -> pd.DataFrame:
+        """Live catalog rows as a DataFrame; materialized on demand from the current snapshot."""
+        import pandas as pd
+
+        snap = self._snapshot
+        if self._catalog_df is None or self._catalog_df_version != snap.version:
+            rows = list(snap.rows) if snap.live is None else [snap.rows[i] for i in np.flatnonzero(snap.live)]
+            df = pd.DataFrame(rows, columns=list(RESULT_FIELDS))
+            df["test_type_list"] = df["test_type"].apply(list)
+            df["test_type"] = df["test_type_list"].apply(";".join)
+            df["text"] = df["name"]
+            self._catalog_df, self._catalog_df_version = df, snap.version
+        return self._catalog_df
+
+    def _index_params(self) -> Dict:
         if self.use_embeddings:
-            from sentence_transformers import SentenceTransformer
+            params = {
+                "mode": self.retrieval_mode,
+                "model": EMBEDDING_MODEL_NAME,
+                "precision": EMBEDDING_PRECISION,
+                "backend": self.backend,
+            }
+            if self.backend == "ivf":
+                params["ivf"] = {"nlist": IVF_NLIST, "iters": IVF_TRAIN_ITERS}
+            if self.retrieval_mode == "hybrid":
+                params["bm25"] = {"k1": BM25_K1, "b": BM25_B}
+            return params
+        return {"mode": "tfidf", "tfidf": TFIDF_PARAMS}
 
-            self.embedder = SentenceTransformer(EMBEDDING_MODEL_NAME)
-            self.doc_matrix = self.embedder.encode(
-                self.catalog_df["text"].tolist(), show_progress_bar=False
+    def _load_catalog(self) -> Catalog:
+        return load_catalog(self.catalog_path, CATALOG_CACHE_DIR)
+
+    def _build_snapshot(
+        self, catalog: Catalog, version: str, embeddings: Optional[np.ndarray] = None
+    ) -> IndexSnapshot:
+        """
+        Fit the index over `catalog`. In dense modes, `embeddings` (normalized,
+        one per row) skips re-encoding; compaction passes the vectors it already has.
+        """
+        rows = catalog.rows()
+        texts = catalog.name
+        is_knowledge, is_personality = _category_masks(catalog)
+        vectorizer = doc_vectors = bm25 = None
+
+        if self.use_embeddings:
+            if embeddings is None:
+                embeddings = self.embedder.encode(texts, show_progress_bar=False)
+            # Normalized once here; queries are then scored with a single matmul
+            doc_vectors = NormalizedEmbeddings.build(embeddings, EMBEDDING_PRECISION)
+            doc_matrix = doc_vectors.exact
+        else:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            doc_matrix = vectorizer.fit_transform(texts)
+
+        if self.retrieval_mode == "hybrid":
+            bm25 = BM25Index.build(texts, k1=BM25_K1, b=BM25_B)
+
+        return IndexSnapshot(
+            rows=rows,
+            is_knowledge=is_knowledge,
+            is_personality=is_personality,
+            filters=FilterIndex.from_catalog(catalog),
+            index=self._build_search_index(doc_matrix, doc_vectors),
+            version=version,
+            url_to_row={row[0]: i for i, row in enumerate(rows)},
+            doc_matrix=doc_matrix,
+            doc_vectors=doc_vectors,
+            vectorizer=vectorizer,
+            bm25=bm25,
+        )
+
+    def _build_search_index(self, doc_matrix, doc_vectors: Optional[NormalizedEmbeddings]) -> SearchIndex:
+        if self.backend == "ivf":
+            return IVFIndex.build(
+                doc_vectors,
+                nlist=IVF_NLIST,
+                nprobe=IVF_NPROBE,
+                iters=IVF_TRAIN_ITERS,
+                rescore=EMBEDDING_RESCORE_CANDIDATES,
+            )
+        vectors = doc_vectors if self.use_embeddings else doc_matrix
+        return ExactIndex(vectors, rescore=EMBEDDING_RESCORE_CANDIDATES)
+
+    def _open_search_index(self, arrays: Dict, doc_matrix, doc_vectors) -> SearchIndex:
+        if self.backend == "ivf":
+            return IVFIndex.from_arrays(
+                doc_vectors, arrays, nprobe=IVF_NPROBE, rescore=EMBEDDING_RESCORE_CANDIDATES
             )
+        vectors = doc_vectors if self.use_embeddings else doc_matrix
+        return ExactIndex.from_arrays(vectors, arrays, rescore=EMBEDDING_RESCORE_CANDIDATES)
+
+    def save_index(self, index_dir: str = INDEX_DIR) -> str:
+        """Write the fitted index and row metadata as artifacts keyed by index_version."""
+        snap = self._snapshot
+        if snap.pending_changes:
+            raise ValueError("Index has uncompacted catalog updates; call compact() before saving")
+
+        arrays = {
+            "is_knowledge": snap.is_knowledge,
+            "is_personality": snap.is_personality,
+        }
+        table = RowTable.from_rows(snap.rows)
+        arrays.update(table.arrays())
+        arrays.update(snap.filters.arrays())
+        blobs = {"row_test_types": table.test_types, "filter_values": snap.filters.values()}
+
+        if self.use_embeddings:
+            arrays.update(snap.doc_vectors.arrays())
         else:
-            self.vectorizer = TfidfVectorizer(
-                ngram_range=(1, 2),
-                stop_words="english",
-                min_df=1,
+            csr = sp.csr_matrix(snap.doc_matrix)
+            arrays["tfidf_data"] = csr.data
+            arrays["tfidf_indices"] = csr.indices
+            arrays["tfidf_indptr"] = csr.indptr
+            arrays["idf"] = snap.vectorizer.idf_
+            blobs["vocabulary"] = {term: int(col) for term, col in snap.vectorizer.vocabulary_.items()}
+        arrays.update(snap.index.arrays())
+        if snap.bm25 is not None:
+            arrays.update(snap.bm25.arrays())
+            blobs["bm25_vocabulary"] = snap.bm25.vocabulary()
+
+        meta = {
+            **self._index_params(),
+            **snap.index.params(),
+            "n_rows": snap.n_rows,
+            "shape": list(snap.doc_matrix.shape),
+        }
+        return index_store.save_artifacts(index_dir, snap.version, meta, arrays, blobs)
+
+    def _load_index(self, index_dir: str, version: str) -> Optional[IndexSnapshot]:
+        art = index_store.load_artifacts(index_dir, version)
+        if art is None:
+            return None
+
+        # Row metadata stays in the memory-mapped columns; tuples are decoded per request
+        rows = RowTable.from_arrays(art, art["row_test_types"])
+        vectorizer = doc_vectors = bm25 = None
+
+        if self.use_embeddings:
+            doc_vectors = NormalizedEmbeddings.from_arrays(art, EMBEDDING_PRECISION)
+            doc_matrix = doc_vectors.exact
+        else:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            vectorizer.vocabulary_ = art["vocabulary"]
+            vectorizer.idf_ = np.asarray(art["idf"])
+            # copy=False keeps the memory-mapped arrays as the matrix storage
+            doc_matrix = sp.csr_matrix(
+                (art["tfidf_data"], art["tfidf_indices"], art["tfidf_indptr"]),
+                shape=tuple(art["meta"]["shape"]),
+                copy=False,
             )
-            self.doc_matrix = self.vectorizer.fit_transform(self.catalog_df["text"])
+        if self.retrieval_mode == "hybrid":
+            bm25 = BM25Index.from_arrays(art, len(rows))
+
+        return IndexSnapshot(
+            rows=rows,
+            is_knowledge=art["is_knowledge"],
+            is_personality=art["is_personality"],
+            filters=FilterIndex.from_arrays(art, art["filter_values"]),
+            index=self._open_search_index(art, doc_matrix, doc_vectors),
+            version=version,
+            url_to_row=rows.url_index(),
+            doc_matrix=doc_matrix,
+            doc_vectors=doc_vectors,
+            vectorizer=vectorizer,
+            bm25=bm25,
+        )
+
+    # ----- live catalog updates -----
+
+    def add_assessments(self, records: Iterable[Dict]) -> str:
+        """
+        Add catalog entries (dicts with the catalog.csv columns; `test_type` may
+        be a list). Raises ValueError if a URL is already in the catalog.
+        Returns the new index version.
+        """
+        rows = self._records_to_rows(records)
+
+        def check(snap: IndexSnapshot):
+            existing = [row[0] for row in rows if snap.row_of(row[0]) is not None]
+            if existing:
+                raise ValueError(f"Already in catalog: {existing}")
+
+        return self._write(rows, [], check)
+
+    def update_assessments(self, records: Iterable[Dict]) -> str:
+        """Replace existing catalog entries, matched by URL. Raises KeyError for unknown URLs."""
+        rows = self._records_to_rows(records)
+        return self._write(rows, [], lambda snap: self._check_known(snap, [row[0] for row in rows]))
+
+    def delete_assessments(self, urls: Iterable[str]) -> str:
+        """Remove catalog entries by URL. Raises KeyError for unknown URLs."""
+        urls = list(dict.fromkeys(urls))
+        return self._write([], urls, lambda snap: self._check_known(snap, urls))
+
+    @staticmethod
+    def _check_known(snap: IndexSnapshot, urls: List[str]):
+        missing = [url for url in urls if snap.row_of(url) is None]
+        if missing:
+            raise KeyError(f"Not in catalog: {missing}")
+
+    @staticmethod
+    def _records_to_rows(records: Iterable[Dict]) -> List[tuple]:
+        import pandas as pd
+
+        records = [dict(r) for r in records]
+        for r in records:
+            if isinstance(r.get("test_type"), (list, tuple)):
+                r["test_type"] = ";".join(r["test_type"])
+        df = pd.DataFrame.from_records(records, columns=list(CATALOG_COLUMNS))
+        if df["url"].isna().any() or (df["url"].astype(str).str.strip() == "").any():
+            raise ValueError("Every assessment needs a url")
+        if df["url"].duplicated().any():
+            raise ValueError("Duplicate urls in one update")
+        return Catalog.from_frame(df).rows()
+
+    def _write(self, upserts: List[tuple], deletes: List[str], check) -> str:
+        with self._write_lock:
+            if self._retired:
+                raise IndexRetired(f"index {self._snapshot.version} was replaced; write to the active one")
+            snap = self._snapshot
+            check(snap)
+            new = self._apply(snap, upserts, deletes)
+            if self._oplog is not None:
+                self._oplog.append((upserts, deletes))
+            self._changelog.append((upserts, deletes))
+            self._snapshot = new
+
+        self._ensure_compactor()
+        if new.pending_changes >= COMPACTION_MAX_PENDING:
+            self._compactor_wake.set()
+        return new.version
+
+    def retire(self) -> List[Tuple[List[tuple], List[str]]]:
+        """
+        Stop taking catalog updates (writes raise IndexRetired from now on) and
+        return the updates the catalog file does not have, for `replay` on the
+        instance that replaces this one.
+        """
+        with self._write_lock:
+            self._retired = True
+            return list(self._changelog)
+
+    def resume_writes(self) -> None:
+        """Undo `retire` (the replacement could not take over)."""
+        with self._write_lock:
+            self._retired = False
+
+    def replay(self, changes: List[Tuple[List[tuple], List[str]]]) -> None:
+        """Apply updates from `retire` as plain upserts / deletes, without the add/update/delete checks."""
+        for upserts, deletes in changes:
+            self._write(upserts, deletes, lambda snap: None)
+
+    @contextmanager
+    def compaction_paused(self) -> Iterator[None]:
+        """Hold off compaction (and so catalog write-back), e.g. while a replacement reads the catalog file."""
+        with self._compact_lock:
+            yield
+
+    def _next_version(self) -> str:
+        return f"{self._base_version}+{next(self._generations)}"
+
+    def _apply(self, snap: IndexSnapshot, upserts: List[tuple], deletes: List[str]) -> IndexSnapshot:
+        """
+        New snapshot with `deletes` (and the previous versions of `upserts`)
+        tombstoned and `upserts` appended to the delta segment. Copy-on-write:
+        `snap` is left untouched for readers still using it, and only the
+        delta's rows, URLs and tombstones are copied, never the base's.
+        """
+        tombstones = set(snap.tombstones)
+        for url in list(deletes) + [row[0] for row in upserts]:
+            row = snap.row_of(url)
+            if row is not None:
+                tombstones.add(row)
+
+        changes = {"tombstones": frozenset(tombstones), "version": self._next_version()}
+        if not upserts:
+            return dataclasses.replace(snap, **changes)
+
+        texts = [_row_text(row) for row in upserts]
+        if isinstance(snap.url_to_row, ChainMap):
+            appended_urls, base_urls = dict(snap.url_to_row.maps[0]), snap.url_to_row.maps[1]
+        else:
+            appended_urls, base_urls = {}, snap.url_to_row
+        start = snap.n_rows
+        for i, row in enumerate(upserts):
+            appended_urls[row[0]] = start + i
+        added = Catalog.from_rows(upserts)
+        is_knowledge, is_personality = _category_masks(added)
 
-    def _score(self, query: str) -> np.ndarray:
         if self.use_embeddings:
-            q_vec = self.embedder.encode([query])[0]
-            doc_mat = self.doc_matrix
-            q_norm = q_vec / (np.linalg.norm(q_vec) + 1e-8)
-            d_norm = doc_mat / (np.linalg.norm(doc_mat, axis=1, keepdims=True) + 1e-8)
-            sims = d_norm @ q_norm
-            return sims
+            vectors = l2_normalize(self.embedder.encode(texts, show_progress_bar=False))
+            if snap.delta is not None:
+                vectors = np.vstack([snap.delta.exact, vectors])
+            delta = NormalizedEmbeddings.build(vectors, EMBEDDING_PRECISION)
+        else:
+            # New terms are ignored until compaction refits the vocabulary
+            delta = snap.vectorizer.transform(texts)
+            if snap.delta is not None:
+                delta = sp.vstack([snap.delta, delta], format="csr")
+
+        bm25_delta = None
+        if snap.bm25 is not None:
+            bm25_delta = snap.bm25.weigh(texts)
+            if snap.bm25_delta is not None:
+                bm25_delta = sp.vstack([snap.bm25_delta, bm25_delta], format="csr")
+
+        changes.update(
+            rows=AppendedRows.of(snap.rows, upserts),
+            url_to_row=ChainMap(appended_urls, base_urls),
+            is_knowledge=np.concatenate([snap.is_knowledge, is_knowledge]),
+            is_personality=np.concatenate([snap.is_personality, is_personality]),
+            filters=snap.filters.extend(added),
+            delta=delta,
+            bm25_delta=bm25_delta,
+        )
+        return dataclasses.replace(snap, **changes)
+
+    def compact(self) -> str:
+        """
+        Fold appended rows into a freshly built base index and drop tombstones,
+        then swap it in. Runs off the request path; updates that arrive
+        meanwhile are replayed on the new snapshot before the swap. With
+        CATALOG_WRITE_BACK the live catalog is also written to catalog_path
+        (and the index artifacts to index_dir) so a restart serves it, unless
+        the file was changed by someone else since this index was built or
+        this instance is retired. Returns the new index version.
+        """
+        with self._compact_lock:
+            with self._write_lock:
+                snap = self._snapshot
+                if not snap.pending_changes:
+                    return snap.version
+                self._oplog = []
+
+            try:
+                keep = np.arange(snap.n_rows) if snap.live is None else np.flatnonzero(snap.live)
+                rows = [snap.rows[i] for i in keep]
+                embeddings = None
+                if self.use_embeddings:
+                    embeddings = np.asarray(snap.doc_vectors.exact)
+                    if snap.delta is not None:
+                        embeddings = np.vstack([embeddings, snap.delta.exact])
+                    embeddings = embeddings[keep]
+
+                write_back = CATALOG_WRITE_BACK and not self._retired
+                if write_back and self.file_version() != self._base_version:
+                    # Someone else rewrote the file: the hot swap rebuilds from it and replays our updates
+                    logger.warning(
+                        "%s changed since index %s was built; not writing catalog updates back",
+                        self.catalog_path,
+                        self._base_version,
+                    )
+                    write_back = False
+                persisted = False
+                previous = self._base_version
+                if write_back:
+                    self._base_version = self._write_catalog(rows)
+                    version, persisted = self._base_version, True
+                else:
+                    version = self._next_version()
+                compacted = self._build_snapshot(Catalog.from_rows(rows), version, embeddings)
+            except BaseException:
+                with self._write_lock:
+                    self._oplog = None
+                raise
+
+            with self._write_lock:
+                for upserts, deletes in self._oplog:
+                    compacted = self._apply(compacted, upserts, deletes)
+                if persisted:
+                    # The file now has everything but the updates made during the compaction
+                    self._changelog = list(self._oplog)
+                self._oplog = None
+                self._snapshot = compacted
+
+            logger.info(
+                "Compacted catalog: %d -> %d rows, index %s", snap.n_rows, compacted.n_rows, compacted.version
+            )
+            if persisted and self.index_dir and not compacted.pending_changes:
+                try:
+                    self.save_index(self.index_dir)
+                except (OSError, ValueError) as e:
+                    logger.warning("Could not persist index artifacts to %s: %s", self.index_dir, e)
+                else:
+                    reopened = self._load_index(self.index_dir, compacted.version)
+                    with self._write_lock:
+                        if reopened is not None and self._snapshot is compacted:
+                            self._snapshot = reopened
+                    if previous != compacted.version:
+                        # Nothing restarts on the replaced file, so its artifacts are dead weight
+                        index_store.remove_artifacts(self.index_dir, previous)
+            return compacted.version
+
+    def _write_catalog(self, rows: List[tuple]) -> str:
+        """
+        Atomically replace catalog_path with `rows` (catalog.csv column order).
+        Returns the index key of the new file, computed before it becomes visible.
+        """
+        directory = os.path.dirname(os.path.abspath(self.catalog_path))
+        fd, tmp = tempfile.mkstemp(prefix=".catalog-", suffix=".csv", dir=directory)
+        try:
+            # Same dialect as scripts/build_catalog.py, so the file round-trips byte for byte
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(CATALOG_COLUMNS))
+                writer.writeheader()
+                for row in rows:
+                    record = dict(zip(RESULT_FIELDS, row))
+                    record["test_type"] = ";".join(record["test_type"])
+                    writer.writerow({col: record[col] for col in CATALOG_COLUMNS})
+            key = index_store.index_key(tmp, self._index_params())
+            os.replace(tmp, self.catalog_path)
+            return key
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _ensure_compactor(self):
+        if self._compactor is not None or COMPACTION_INTERVAL_SECONDS <= 0:
+            return
+        with self._write_lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(
+                    target=self._compaction_loop, name="catalog-compactor", daemon=True
+                )
+                self._compactor.start()
+
+    def _compaction_loop(self):
+        while not self._closed:
+            self._compactor_wake.wait(COMPACTION_INTERVAL_SECONDS)
+            self._compactor_wake.clear()
+            if self._closed:
+                return
+            if self._snapshot.pending_changes:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.exception("Catalog compaction failed: %s", e)
+
+    def close(self):
+        """Stop the background compactor and the embedding batcher."""
+        self._closed = True
+        self._compactor_wake.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        if self._batcher is not None:
+            self._batcher.close()
+
+    # ----- scoring -----
+
+    def _allowed(self, snap: IndexSnapshot, filters: Optional[RecommendFilters]) -> Optional[np.ndarray]:
+        """Rows a request may return: live rows passing `filters` (None means every row)."""
+        if filters is None:
+            return snap.live
+        mask = snap.filters.mask(filters)
+        return mask if snap.live is None else mask & snap.live
+
+    def _score(
+        self, query: str, snap: Optional[IndexSnapshot] = None, filters: Optional[RecommendFilters] = None
+    ) -> np.ndarray:
+        snap = snap or self._snapshot
+        if self._batcher is not None:
+            return self._batcher.submit((query, snap, filters))
+        return self._score_many([query], snap, filters)[0]
+
+    def _score_batch(self, items: List[Tuple[str, IndexSnapshot, Optional[RecommendFilters]]]) -> List[np.ndarray]:
+        """MicroBatcher callback: (query, snapshot, filters) items, scored one batch per snapshot and filters."""
+        out: List[Optional[np.ndarray]] = [None] * len(items)
+        groups: Dict[tuple, Tuple[IndexSnapshot, Optional[RecommendFilters], List[int]]] = {}
+        for i, (_, snap, filters) in enumerate(items):
+            groups.setdefault((id(snap), filters), (snap, filters, []))[2].append(i)
+        for snap, filters, positions in groups.values():
+            sims = self._score_many([items[i][0] for i in positions], snap, filters)
+            for row, i in zip(sims, positions):
+                out[i] = row
+        return out
+
+    def _encode_queries(self, queries: List[str], snap: IndexSnapshot):
+        """Query vectors in the same space as the index: normalized embeddings or TF-IDF rows."""
+        with stage("vectorize"):
+            if self.use_embeddings:
+                return l2_normalize(self.embedder.encode(list(queries), show_progress_bar=False))
+            # TF-IDF rows are already L2-normalised, so a sparse product gives cosine similarity
+            return snap.vectorizer.transform(queries)
+
+    def _score_many(
+        self, queries: List[str], snap: Optional[IndexSnapshot] = None, filters: Optional[RecommendFilters] = None
+    ) -> np.ndarray:
+        """
+        Similarity of every query against every catalog row, shape (n_queries, n_items):
+        dense, or CSR holding only the scored candidates with the IVF backend.
+        Long queries are scored chunk by chunk and pooled (see app/chunking.py).
+        Filters only change hybrid scores (candidates are drawn from allowed rows);
+        callers still mask the result before top-k selection.
+        """
+        snap = snap or self._snapshot
+        with stage("split_query"):
+            chunks = [
+                split_query(q, QUERY_CHUNK_WORDS, QUERY_CHUNK_OVERLAP, QUERY_MAX_CHUNKS) for q in queries
+            ]
+            texts = [c for cs in chunks for c in cs]
+        if self.retrieval_mode == "hybrid":
+            sims = self._score_hybrid(texts, snap, self._allowed(snap, filters))
         else:
-            q_vec = self.vectorizer.transform([query])
-            sims = cosine_similarity(q_vec, self.doc_matrix)[0]
+            sims = snap.score(self._encode_queries(texts, snap))
+        if len(texts) == len(queries):
             return sims
+        with stage("pool_chunks"):
+            return pool_scores(sims, [len(cs) for cs in chunks], QUERY_CHUNK_POOLING)
+
+    def _score_hybrid(self, queries: List[str], snap: IndexSnapshot, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Reciprocal-rank fusion of BM25 and dense retrieval. Each retriever
+        contributes its top HYBRID_CANDIDATES allowed rows; the dense ranking is
+        computed exactly over the union of both candidate sets. Rows outside the
+        union score 0.
+        """
+        lexical = snap.bm25_score(queries)
+        q_dense = self._encode_queries(queries, snap)
+        n_rows = lexical.shape[1]
+
+        lex_tops = []
+        for i in range(len(queries)):
+            lex_top = np.empty(0, dtype=np.intp)
+            if lexical[i].any():
+                lex_top = _top_k_indices(lexical[i], HYBRID_CANDIDATES, allowed)
+                # With every match filtered out, _top_k_indices falls back to unmatched rows
+                lex_top = lex_top[lexical[i][lex_top] > 0]
+            lex_tops.append(lex_top)
 
-    def _search_indices(self, query: str, top_k: int) -> List[int]:
-        sims = self._score(query)
-        idxs = np.argsort(sims)[::-1]  
+        # Dense candidates come from the search index (cheap with IVF). With the
+        # exact backend on a large catalog we skip the full scan and only
+        # dense-score the BM25 candidates, except for queries BM25 found no
+        # allowed row for: those still get the full dense scan.
+        dense: List = [None] * len(queries)
+        if self.backend != "exact" or n_rows <= HYBRID_FULL_SCAN_MAX_ROWS:
+            scan = list(range(len(queries)))
+        else:
+            scan = [i for i, lex_top in enumerate(lex_tops) if lex_top.size == 0]
+        if scan:
+            for i, sims in zip(scan, snap.score(q_dense[scan])):
+                dense[i] = sims
+
+        fused = np.zeros((len(queries), n_rows), dtype=np.float32)
+        for i, q in enumerate(q_dense):
+            lex_top = cand = lex_tops[i]
+            if dense[i] is not None:
+                cand = np.union1d(cand, _top_k_indices(dense[i], HYBRID_CANDIDATES, allowed))
+            if cand.size == 0:
+                continue
 
-        
-        filtered = [i for i in idxs if sims[i] > 0]
+            dense_scores = snap.score_rows(q, cand, rescore=EMBEDDING_RESCORE_CANDIDATES)
+            dense_ranked = cand[np.argsort(-dense_scores, kind="stable")]
+            fused[i] = reciprocal_rank_fusion([lex_top, dense_ranked], n_rows, k=RRF_K)
+        return fused
 
-        if not filtered:
-            
-            return list(idxs[: top_k * 3])
+    def _top_candidates(
+        self,
+        sims: np.ndarray,
+        top_k: int,
+        snap: Optional[IndexSnapshot] = None,
+        filters: Optional[RecommendFilters] = None,
+    ) -> List[np.ndarray]:
+        """Row-wise candidate selection for a (n_queries, n_items) similarity block."""
+        allowed = self._allowed(snap or self._snapshot, filters)
+        return [_top_k_indices(row, top_k * 3, allowed, fill=filters is not None) for row in sims]
 
-        return filtered[: top_k * 3]
+    def _search_indices(
+        self,
+        query: str,
+        top_k: int,
+        snap: Optional[IndexSnapshot] = None,
+        filters: Optional[RecommendFilters] = None,
+    ) -> np.ndarray:
+        snap = snap or self._snapshot
+        sims = self._score(query, snap, filters)
+        return _top_k_indices(sims, top_k * 3, self._allowed(snap, filters), fill=filters is not None)
 
-    def _build_result(self, idx: int) -> Dict:
-        row = self.catalog_df.iloc[idx]
+    def _build_result(self, idx: int, snap: Optional[IndexSnapshot] = None) -> Dict:
+        url, name, adaptive, description, duration, remote, test_types = (snap or self._snapshot).rows[idx]
         return {
-            "url": row["url"],
-            "name": row["name"],
-            "adaptive_support": str(row["adaptive_support"]),
-            "description": row["description"],
-            "duration": int(row["duration"]) if not pd.isna(row["duration"]) else 0,
-            "remote_support": str(row["remote_support"]),
-            "test_type": row["test_type_list"],
+            "url": url,
+            "name": name,
+            "adaptive_support": adaptive,
+            "description": description,
+            "duration": duration,
+            "remote_support": remote,
+            "test_type": list(test_types),
         }
 
-    def recommend(self, query: str, k: int = 10) -> List[Dict]:
+    def recommend(self, query: str, k: int = 10, filters: Optional[RecommendFilters] = None) -> List[Dict]:
+        """Top-k assessments for `query`; with `filters`, only rows passing them (see app/filters.py)."""
         k = min(k, self.max_k)
-        profile = analyze_query_with_llm(query)
+        with stage("analyze_query"):
+            profile = analyze_query_with_llm(query)
 
-        idxs = self._search_indices(query, top_k=k)
+        # One snapshot for the whole request, even if an update lands meanwhile
+        snap = self._snapshot
+        with stage("score"):
+            sims = self._score(query, snap, filters)
+        with stage("top_k"):
+            # Filtered-out rows are excluded here, before selection, so k rows still come back
+            idxs = _top_k_indices(sims, k * 3, self._allowed(snap, filters), fill=filters is not None)
+        return self._rank(profile, idxs, k, snap, _scores_at(sims, idxs))
 
-        # If no special balancing needed, just take top-k
-        if not (profile.has_technical and profile.has_behavioral):
-            return [self._build_result(i) for i in idxs[:k]]
-
-        # Mixed query: try to balance Knowledge & Skills vs Personality & Behavior
-        knowledge_idxs = []
-        personality_idxs = []
-        for i in idxs:
-            ttypes = set(self.catalog_df.iloc[i]["test_type_list"])
-            is_k = any("Knowledge" in t or "Skill" in t for t in ttypes)
-            is_p = any("Personality" in t or "Behavior" in t for t in ttypes)
-
-            if is_k and not is_p:
-                knowledge_idxs.append(i)
-            elif is_p and not is_k:
-                personality_idxs.append(i)
-            else:
-               
-                pass
+    def recommend_many(
+        self, queries: List[str], k: int = 10, filters: Optional[RecommendFilters] = None
+    ) -> List[List[Dict]]:
+        """Batch version of `recommend` (same filters for every query): one vectorizer/matrix pass per chunk."""
+        k = min(k, self.max_k)
+        queries = list(queries)
+        snap = self._snapshot
 
         results = []
-        i_k = 0
-        i_p = 0
-        target_k = k // 2
-        target_p = k - target_k
-
-        # alternate picking
-        while len(results) < k and (i_k < len(knowledge_idxs) or i_p < len(personality_idxs)):
-            if len(results) < k and i_k < len(knowledge_idxs) and len(
-                [r for r in results if "Knowledge" in " ".join(r["test_type"])]
-            ) < target_k:
-                results.append(self._build_result(knowledge_idxs[i_k]))
-                i_k += 1
-
-            if len(results) < k and i_p < len(personality_idxs) and len(
-                [r for r in results if "Personality" in " ".join(r["test_type"])]
-            ) < target_p:
-                results.append(self._build_result(personality_idxs[i_p]))
-                i_p += 1
-
-            if i_k >= len(knowledge_idxs) and i_p >= len(personality_idxs):
-                break
-
-        # If still fewer than k, fill from overall top list
-        if len(results) < k:
-            used = {r["url"] for r in results}
-            for i in idxs:
-                if self.catalog_df.iloc[i]["url"] in used:
-                    continue
-                results.append(self._build_result(i))
-                if len(results) >= k:
-                    break
-
+        for start in range(0, len(queries), BATCH_SCORE_CHUNK):
+            chunk = queries[start : start + BATCH_SCORE_CHUNK]
+            sims = self._score_many(chunk, snap, filters)
+            for query, row, idxs in zip(chunk, sims, self._top_candidates(sims, top_k=k, snap=snap, filters=filters)):
+                profile = analyze_query_with_llm(query)
+                results.append(self._rank(profile, idxs, k, snap, _scores_at(row, idxs)))
         return results
+
+    def _rank(
+        self,
+        profile: QueryProfile,
+        idxs,
+        k: int,
+        snap: Optional[IndexSnapshot] = None,
+        scores: Optional[np.ndarray] = None,
+    ) -> List[Dict]:
+        """Top-k result dicts from the candidates `idxs` (score order; `scores` aligned with them)."""
+        snap = snap or self._snapshot
+        with stage("balance"):
+            selected = self._balance(profile, idxs, k, snap, scores)
+        with stage("build_result"):
+            return [self._build_result(i, snap) for i in selected]
+
+    def _balance(
+        self, profile: QueryProfile, idxs, k: int, snap: IndexSnapshot, scores: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """Rows to return, in order."""
+        # If no special balancing needed, just take top-k
+        if not (profile.has_technical and profile.has_behavioral):
+            return list(idxs[:k])
+
+        # Mixed query: diversify across Knowledge & Skills vs Personality & Behavior
+        if not CATEGORY_QUOTAS and DIVERSIFICATION == "quota":
+            return list(idxs[:k])
+        idxs = np.asarray(idxs)
+        if DIVERSIFICATION == "mmr" and scores is not None:
+            return select_mmr(idxs, scores, snap.filters.type_bits[idxs], k, MMR_LAMBDA)
+        members = np.stack([getattr(snap, CATEGORY_FIELDS[c])[idxs] for c in CATEGORY_QUOTAS])
+        return select_quota(idxs, members, list(CATEGORY_QUOTAS.values()), k)
@@ -0,0 +1,278 @@
+# app/reloader.py
+"""
+Hot-swappable recommender for the API.
+
+Requests are served by whichever AssessmentRecommender is active. A background
+thread builds a replacement when the catalog file changes (polled by
+mtime/size; a rebuild only happens if the content hash differs from the one
+the active index was built from) or when one is requested through the admin
+API. The replacement is built and warmed up off the request path, then swapped
+in with a single reference assignment.
+
+Requests take the active instance with ``with reloader.use() as rec:`` and keep
+it until they finish, so a swap never changes the index under an in-flight
+request. A retired instance is closed once its last request is done.
+
+Catalog updates go through ``reloader.write``. At a swap the old instance
+stops taking updates and the ones the catalog file does not have yet are
+replayed on the replacement, so no acknowledged update is lost; a write that
+hits the old instance after that is retried on the new one.
+
+The first instance can also be loaded in the background (`load_in_background`),
+so the process answers liveness checks while the index and model load; until
+it is in place `use()` raises NotReady.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from .config import CATALOG_POLL_SECONDS, CATALOG_WRITE_BACK, WARMUP_QUERIES
+
+if TYPE_CHECKING:
+    from .recommender import AssessmentRecommender
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class NotReady(RuntimeError):
+    """No recommender has been loaded yet (or the initial load failed)."""
+
+
+class _Slot:
+    __slots__ = ("recommender", "refs", "retired")
+
+    def __init__(self, recommender: AssessmentRecommender):
+        self.recommender = recommender
+        self.refs = 0
+        self.retired = False
+
+
+class RecommenderReloader:
+    def __init__(
+        self,
+        factory: Callable[[], AssessmentRecommender],
+        catalog_path: str,
+        poll_seconds: float = CATALOG_POLL_SECONDS,
+        warmup_queries: Optional[List[str]] = None,
+    ):
+        self._factory = factory
+        self.catalog_path = catalog_path
+        self.poll_seconds = poll_seconds
+        self.warmup_queries = WARMUP_QUERIES if warmup_queries is None else warmup_queries
+
+        self._slot: Optional[_Slot] = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._force = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stat = None
+
+        self.rebuilding = False
+        self.loading = False
+        self.load_error: Optional[str] = None
+        self.swaps = 0
+        self.last_swap: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._slot is not None
+
+    @property
+    def current(self) -> Optional[AssessmentRecommender]:
+        slot = self._slot
+        return slot.recommender if slot is not None else None
+
+    @contextmanager
+    def use(self) -> Iterator[AssessmentRecommender]:
+        """The active recommender, kept alive (not closed) until the block exits."""
+        with self._lock:
+            slot = self._slot
+            if slot is None:
+                raise NotReady(self.load_error or "recommender is still loading")
+            slot.refs += 1
+        try:
+            yield slot.recommender
+        finally:
+            with self._lock:
+                slot.refs -= 1
+                done = slot.retired and slot.refs == 0
+            if done:
+                self._close_later(slot.recommender)
+
+    def load(self) -> AssessmentRecommender:
+        """Build, warm up and activate the first instance (blocking)."""
+        self._stat = self._file_stat()
+        rec = self._build()
+        self._swap(rec)
+        return rec
+
+    def load_in_background(self) -> None:
+        """`load` then `start` on a background thread; progress shows in `ready` / `load_error`."""
+        self.loading = True
+
+        def run():
+            try:
+                self.load()
+            except Exception as e:
+                self.load_error = repr(e)
+                logger.exception("Failed to load the recommender: %s", e)
+                return
+            finally:
+                self.loading = False
+            if self._closed:
+                self.current.close()
+                return
+            self.start()
+
+        threading.Thread(target=run, name="index-loader", daemon=True).start()
+
+    def start(self) -> None:
+        """Start the background watcher / rebuild thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="index-reloader", daemon=True)
+            self._thread.start()
+
+    def request_rebuild(self) -> None:
+        """Rebuild from the catalog file even if its hash is unchanged."""
+        self._force = True
+        self._wake.set()
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            slot, self._slot = self._slot, None
+        if slot is not None:
+            slot.recommender.close()
+
+    def stats(self) -> Dict:
+        rec = self.current
+        return {
+            "index_version": rec.index_version if rec is not None else None,
+            "ready": rec is not None,
+            "loading": self.loading,
+            "load_error": self.load_error,
+            "rebuilding": self.rebuilding,
+            "swaps": self.swaps,
+            "last_swap": self.last_swap,
+            "last_error": self.last_error,
+        }
+
+    def _loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.poll_seconds if self.poll_seconds > 0 else None)
+            self._wake.clear()
+            if self._closed:
+                return
+            force, self._force = self._force, False
+            try:
+                if force or self._catalog_changed():
+                    self._rebuild()
+            except Exception as e:
+                self.last_error = repr(e)
+                logger.exception("Index rebuild failed; keeping index %s: %s", self.stats()["index_version"], e)
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.catalog_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _catalog_changed(self) -> bool:
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return False
+        self._stat = stat
+        rec = self.current
+        if rec is None:
+            return True
+        # A touched-but-identical file (or our own write-back) hashes the same
+        return rec.file_version() != rec.base_version
+
+    def write(self, fn: Callable[[AssessmentRecommender], T]) -> T:
+        """
+        Run a catalog update `fn(rec)` on the active instance. If a swap
+        retires that instance first, the update is retried on its replacement.
+        """
+        from .recommender import IndexRetired
+
+        while True:
+            with self.use() as rec:
+                try:
+                    return fn(rec)
+                except IndexRetired:
+                    pass
+            time.sleep(0.01)  # the replacement is being swapped in
+
+    def _rebuild(self) -> None:
+        self.rebuilding = True
+        try:
+            old = self.current
+            if old is None:
+                self._stat = self._file_stat()
+                self._swap(self._build())
+                return
+            if CATALOG_WRITE_BACK and old.pending_changes:
+                # Fold live catalog updates into the file so the rebuild starts
+                # from them (left alone if someone else rewrote the file)
+                old.compact()
+            # No write-back from the old instance while the replacement reads the file
+            with old.compaction_paused():
+                self._stat = self._file_stat()
+                rec = self._build()
+                # Updates the file does not have (acknowledged during the build, or
+                # kept out of a file someone else rewrote) move to the replacement
+                changes = old.retire()
+                try:
+                    rec.replay(changes)
+                except BaseException:
+                    old.resume_writes()
+                    self._close_later(rec)
+                    raise
+            self._swap(rec)
+        finally:
+            self.rebuilding = False
+
+    def _build(self) -> AssessmentRecommender:
+        start = time.perf_counter()
+        rec = self._factory()
+        # First queries pay for lazy init (page faults on mapped artifacts,
+        # model/BLAS warm-up); take that hit before serving traffic
+        if self.warmup_queries:
+            rec.recommend_many(self.warmup_queries)
+            for query in self.warmup_queries:
+                rec.recommend(query)
+        logger.info(
+            "Built index %s (%d items) in %.2fs", rec.index_version, len(rec), time.perf_counter() - start
+        )
+        return rec
+
+    def _swap(self, rec: AssessmentRecommender) -> None:
+        with self._lock:
+            old, self._slot = self._slot, _Slot(rec)
+            idle = old is not None and old.refs == 0
+            if old is not None:
+                old.retired = True
+        self.swaps += 1
+        self.last_swap = time.time()
+        if old is not None:
+            logger.info("Swapped index %s -> %s", old.recommender.index_version, rec.index_version)
+        if idle:
+            self._close_later(old.recommender)
+
+    @staticmethod
+    def _close_later(rec: AssessmentRecommender) -> None:
+        # close() joins the instance's worker threads; never do that on a request thread
+        threading.Thread(target=rec.close, name="index-retire", daemon=True).start()
@@ -0,0 +1,169 @@
+# app/row_store.py
+"""
+Columnar, memory-mappable storage of the per-row result metadata.
+
+A freshly built index keeps its rows as a list of tuples. Persisted artifacts
+store them column-wise instead: each string column as one UTF-8 byte array
+plus row offsets, durations as an int array, and test types as codes into a
+small vocabulary (CSR layout). A RowTable reads the columns back (memory-
+mapped) and decodes a row only when it is asked for, so processes serving the
+same artifacts share the metadata pages instead of each holding N Python
+tuples. UrlIndex does the same for the url -> row lookup: a sorted array of
+URL hashes, verified against the stored URL on a match.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Column order of the per-row result tuples in IndexSnapshot.rows
+RESULT_FIELDS = (
+    "url",
+    "name",
+    "adaptive_support",
+    "description",
+    "duration",
+    "remote_support",
+    "test_type",
+)
+
+STRING_FIELDS = ("url", "name", "adaptive_support", "description", "remote_support")
+
+_POSITION = {field: i for i, field in enumerate(RESULT_FIELDS)}
+
+
+def url_hash(url: str) -> int:
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _encode_strings(values: List[str]):
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, data
+
+
+class RowTable(Sequence):
+    """Read-only sequence of result tuples (RESULT_FIELDS order) backed by column arrays."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], test_types: List[str]):
+        self._arrays = arrays
+        self._strings = {
+            field: (arrays[f"rows_{field}_offsets"], arrays[f"rows_{field}_data"]) for field in STRING_FIELDS
+        }
+        self.durations = arrays["rows_duration"]
+        self._type_indptr = arrays["rows_test_type_indptr"]
+        self._type_codes = arrays["rows_test_type_codes"]
+        self.test_types = list(test_types)  # code -> test type name
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "RowTable":
+        if isinstance(rows, RowTable):
+            return rows
+        arrays = {}
+        for field in STRING_FIELDS:
+            pos = _POSITION[field]
+            offsets, data = _encode_strings([row[pos] for row in rows])
+            arrays[f"rows_{field}_offsets"], arrays[f"rows_{field}_data"] = offsets, data
+        arrays["rows_duration"] = np.fromiter((row[4] for row in rows), dtype=np.int64, count=len(rows))
+
+        vocab: Dict[str, int] = {}
+        codes = [[vocab.setdefault(t, len(vocab)) for t in row[6]] for row in rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codes], out=indptr[1:])
+        arrays["rows_test_type_indptr"] = indptr
+        arrays["rows_test_type_codes"] = np.fromiter(
+            (c for cs in codes for c in cs), dtype=np.int32, count=int(indptr[-1])
+        )
+
+        hashes = np.fromiter((url_hash(row[0]) for row in rows), dtype=np.uint64, count=len(rows))
+        order = np.argsort(hashes, kind="stable")
+        arrays["rows_url_hash"] = hashes[order]
+        arrays["rows_url_order"] = order.astype(np.int64)
+        return cls(arrays, list(vocab))
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict, test_types: List[str]) -> "RowTable":
+        return cls({name: arr for name, arr in arrays.items() if name.startswith("rows_")}, test_types)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist in the index artifacts (with `test_types` as a blob)."""
+        return dict(self._arrays)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def _string(self, field: str, i: int) -> str:
+        offsets, data = self._strings[field]
+        return data[offsets[i] : offsets[i + 1]].tobytes().decode("utf-8")
+
+    def _types(self, i: int) -> tuple:
+        codes = self._type_codes[self._type_indptr[i] : self._type_indptr[i + 1]]
+        return tuple(self.test_types[c] for c in codes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return (
+            self._string("url", i),
+            self._string("name", i),
+            self._string("adaptive_support", i),
+            self._string("description", i),
+            int(self.durations[i]),
+            self._string("remote_support", i),
+            self._types(i),
+        )
+
+    def column(self, field: str) -> list:
+        """All values of one field, without decoding the other columns."""
+        n = len(self)
+        if field == "duration":
+            return self.durations.tolist()
+        if field == "test_type":
+            return [self._types(i) for i in range(n)]
+        return [self._string(field, i) for i in range(n)]
+
+    def url_index(self) -> "UrlIndex":
+        return UrlIndex(self)
+
+
+class UrlIndex(Mapping):
+    """url -> row lookup over a RowTable's hash arrays (the last row wins on duplicate URLs)."""
+
+    def __init__(self, table: RowTable):
+        self._table = table
+        self._hashes = table._arrays["rows_url_hash"]
+        self._order = table._arrays["rows_url_order"]
+
+    def get(self, url: str, default: Optional[int] = None) -> Optional[int]:
+        h = np.uint64(url_hash(url))
+        lo = int(np.searchsorted(self._hashes, h, side="left"))
+        hi = int(np.searchsorted(self._hashes, h, side="right"))
+        for row in sorted((int(r) for r in self._order[lo:hi]), reverse=True):
+            if self._table._string("url", row) == url:
+                return row
+        return default
+
+    def __getitem__(self, url: str) -> int:
+        row = self.get(url)
+        if row is None:
+            raise KeyError(url)
+        return row
+
+    def __contains__(self, url) -> bool:
+        return self.get(url) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(self._table.column("url")))
+
+    def __len__(self) -> int:
+        return len(set(self._table.column("url")))
@@ -0,0 +1,212 @@
+# app/search_index.py
+"""
+Pluggable search backends behind AssessmentRecommender._score.
+
+Every backend scores a block of query vectors against the catalog and returns
+an (n_queries, n_rows) similarity block; rows a backend did not look at score
+0, which the candidate selection already treats as "no match".
+
+- ExactIndex: scores every row into a dense block. For TF-IDF the document
+  matrix is kept term-major (an inverted index), so a query only reads the
+  postings of its own terms. For embeddings it is a brute-force matmul.
+- IVFIndex: approximate search over dense embeddings. Rows are clustered with
+  spherical k-means; a query scores only the rows in its `nprobe` nearest
+  clusters. Raising `nprobe` trades speed for recall. The block is a CSR
+  matrix holding just those candidate rows and their scores, so neither the
+  scores nor the top-k selection after them cost O(n_rows) per query.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from .vectors import NormalizedEmbeddings, l2_normalize
+
+BACKENDS = ("exact", "ivf")
+
+# Rows assigned per k-means step; bounds the (rows x nlist) distance block
+_ASSIGN_CHUNK = 8192
+
+
+class SearchIndex:
+    backend = "base"
+
+    def score(self, queries) -> np.ndarray:
+        raise NotImplementedError
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist in the index artifacts (beyond the document vectors)."""
+        return {}
+
+    def params(self) -> Dict:
+        return {"backend": self.backend}
+
+
+class ExactIndex(SearchIndex):
+    backend = "exact"
+
+    def __init__(self, vectors, rescore: int = 0, postings: Optional[sp.csr_matrix] = None):
+        self.vectors = vectors
+        self.rescore = rescore
+        self.postings = None
+        if sp.issparse(vectors):
+            self.postings = postings if postings is not None else sp.csr_matrix(vectors.T)
+
+    def score(self, queries) -> np.ndarray:
+        if self.postings is not None:
+            return (queries @ self.postings).toarray()
+        return self.vectors.score(queries, rescore=self.rescore)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        if self.postings is None:
+            return {}
+        return {
+            "postings_data": self.postings.data,
+            "postings_indices": self.postings.indices,
+            "postings_indptr": self.postings.indptr,
+        }
+
+    @classmethod
+    def from_arrays(cls, vectors, arrays: Dict[str, np.ndarray], rescore: int = 0) -> "ExactIndex":
+        postings = None
+        if "postings_indptr" in arrays:
+            postings = sp.csr_matrix(
+                (arrays["postings_data"], arrays["postings_indices"], arrays["postings_indptr"]),
+                shape=(vectors.shape[1], vectors.shape[0]),
+                copy=False,
+            )
+        return cls(vectors, rescore=rescore, postings=postings)
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(x.shape[0], dtype=np.int32)
+    for start in range(0, x.shape[0], _ASSIGN_CHUNK):
+        block = np.asarray(x[start : start + _ASSIGN_CHUNK], dtype=np.float32)
+        out[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def spherical_kmeans(x: np.ndarray, nlist: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids for normalized rows `x` (cosine k-means)."""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(x[rng.choice(x.shape[0], nlist, replace=False)], dtype=np.float32)
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        members = sp.csr_matrix(
+            (np.ones(x.shape[0], dtype=np.float32), (assign, np.arange(x.shape[0]))),
+            shape=(nlist, x.shape[0]),
+        )
+        sums = np.asarray(members @ x, dtype=np.float32)
+        empty = ~np.any(sums, axis=1)
+        if empty.any():
+            # Re-seed empty clusters with random rows
+            sums[empty] = x[rng.choice(x.shape[0], int(empty.sum()), replace=False)]
+        centroids = l2_normalize(sums)
+    return centroids
+
+
+class IVFIndex(SearchIndex):
+    backend = "ivf"
+
+    def __init__(
+        self,
+        vectors: NormalizedEmbeddings,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        nprobe: int = 8,
+        rescore: int = 0,
+    ):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = max(1, min(nprobe, centroids.shape[0]))
+        self.rescore = rescore
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        vectors: NormalizedEmbeddings,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        iters: int = 10,
+        train_size: Optional[int] = None,
+        seed: int = 0,
+        rescore: int = 0,
+    ) -> "IVFIndex":
+        if sp.issparse(vectors):
+            raise ValueError("IVFIndex needs dense embeddings; TF-IDF uses the exact inverted index")
+
+        x = vectors.exact
+        n_rows = x.shape[0]
+        nlist = min(n_rows, nlist or max(1, int(math.sqrt(n_rows))))
+
+        # k-means only needs a sample; every row is assigned afterwards
+        rng = np.random.default_rng(seed)
+        train_size = min(n_rows, train_size or nlist * 64)
+        sample = x if train_size >= n_rows else x[np.sort(rng.choice(n_rows, train_size, replace=False))]
+        centroids = spherical_kmeans(sample, nlist, iters=iters, seed=seed)
+
+        assign = _assign(x, centroids)
+        list_rows = np.argsort(assign, kind="stable").astype(np.int64)
+        counts = np.bincount(assign, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(vectors, centroids, list_offsets, list_rows, nprobe=nprobe, rescore=rescore)
+
+    def score(self, queries) -> sp.csr_matrix:
+        """Row i holds the ids (ascending) and scores of the rows probed for query i."""
+        queries = np.asarray(queries, dtype=np.float32)
+        n_rows = self.vectors.shape[0]
+
+        coarse = queries @ self.centroids.T
+        if self.nprobe < self.nlist:
+            probes = np.argpartition(-coarse, self.nprobe - 1, axis=1)[:, : self.nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), coarse.shape)
+
+        indptr = np.zeros(queries.shape[0] + 1, dtype=np.int64)
+        indices, data = [], []
+        for i, (q, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate(
+                [self.list_rows[self.list_offsets[l] : self.list_offsets[l + 1]] for l in lists]
+            )
+            rows.sort()
+            scores = self.vectors.score_rows(q, rows, rescore=self.rescore) if rows.size else np.empty(0)
+            indices.append(rows)
+            data.append(scores.astype(np.float32, copy=False))
+            indptr[i + 1] = indptr[i] + rows.size
+        return sp.csr_matrix(
+            (np.concatenate(data), np.concatenate(indices), indptr),
+            shape=(queries.shape[0], n_rows),
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "ivf_centroids": self.centroids,
+            "ivf_offsets": self.list_offsets,
+            "ivf_rows": self.list_rows,
+        }
+
+    def params(self) -> Dict:
+        return {"backend": self.backend, "nlist": self.nlist, "nprobe": self.nprobe}
+
+    @classmethod
+    def from_arrays(
+        cls, vectors: NormalizedEmbeddings, arrays: Dict[str, np.ndarray], nprobe: int = 8, rescore: int = 0
+    ) -> "IVFIndex":
+        return cls(
+            vectors,
+            np.asarray(arrays["ivf_centroids"]),
+            arrays["ivf_offsets"],
+            arrays["ivf_rows"],
+            nprobe=nprobe,
+            rescore=rescore,
+        )
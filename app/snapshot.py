@@ -0,0 +1,167 @@
+# app/snapshot.py
+"""
+Immutable view of the searchable catalog.
+
+Everything a request reads lives in one IndexSnapshot: the row metadata, the
+category arrays and filter masks, the search index and the query encoder state. Requests pick up
+the current snapshot once and use it throughout, and catalog updates build a
+new snapshot and swap the reference. A reader therefore never blocks on a
+writer and never sees a half-applied update.
+
+A snapshot has two segments:
+
+- the base, covered by the search index (possibly memory-mapped artifacts);
+- the delta, rows appended by live updates since the last compaction. There
+  are few of these, so they are scored by a brute-force scan and appended to
+  the base scores.
+
+Deleted (and replaced) rows stay in place as tombstones: `live` is False for
+them and candidate selection skips them. Compaction folds the delta into a
+fresh base and drops the tombstones.
+
+An update never copies the base: appended rows and their URLs are overlays
+(AppendedRows, a ChainMap) on the base row table and URL lookup, and
+tombstones are a set of row numbers, so a write costs O(delta + tombstones)
+however large the catalog is. The `live` mask is built once per snapshot, on
+first use.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, FrozenSet, Iterator, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from .bm25 import BM25Index
+from .filters import FilterIndex
+from .search_index import SearchIndex
+from .vectors import NormalizedEmbeddings
+
+
+class AppendedRows(SequenceABC):
+    """The base rows followed by rows appended since; neither is copied."""
+
+    def __init__(self, base: Sequence[tuple], appended: Tuple[tuple, ...]):
+        self.base = base
+        self.appended = appended
+
+    @classmethod
+    def of(cls, rows: Sequence[tuple], new_rows: Sequence[tuple]) -> "AppendedRows":
+        if isinstance(rows, AppendedRows):
+            return cls(rows.base, rows.appended + tuple(new_rows))
+        return cls(rows, tuple(new_rows))
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.appended)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n_base = len(self.base)
+        if i < 0:
+            i += len(self)
+        if 0 <= i < n_base:
+            return self.base[i]
+        if i < 0:
+            raise IndexError(i)
+        return self.appended[i - n_base]
+
+    def __iter__(self) -> Iterator[tuple]:
+        yield from self.base
+        yield from self.appended
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    rows: Sequence[tuple]  # list of tuples, a memory-mapped RowTable, or AppendedRows over either
+    is_knowledge: np.ndarray
+    is_personality: np.ndarray
+    index: SearchIndex
+    version: str
+    url_to_row: Mapping[str, int]  # includes tombstoned rows (use row_of); ChainMap(appended, base) after updates
+    filters: Optional[FilterIndex] = None  # per-attribute row masks for structured filters
+    doc_matrix: Any = None  # base TF-IDF matrix or exact embeddings
+    doc_vectors: Optional[NormalizedEmbeddings] = None  # dense modes
+    vectorizer: Any = None  # fitted TfidfVectorizer (tfidf mode)
+    bm25: Optional[BM25Index] = None  # hybrid mode
+    delta: Any = None  # appended rows: sparse TF-IDF rows or NormalizedEmbeddings
+    bm25_delta: Optional[sp.csr_matrix] = None  # BM25 weights of appended rows
+    tombstones: FrozenSet[int] = field(default_factory=frozenset)  # deleted / replaced rows
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.rows)
+
+    @property
+    def n_base(self) -> int:
+        return self.doc_matrix.shape[0]
+
+    @property
+    def n_delta(self) -> int:
+        return self.n_rows - self.n_base
+
+    @property
+    def n_live(self) -> int:
+        return self.n_rows - len(self.tombstones)
+
+    @cached_property
+    def live(self) -> Optional[np.ndarray]:
+        """Row mask, False for tombstones; None means every row is live."""
+        if not self.tombstones:
+            return None
+        live = np.ones(self.n_rows, dtype=bool)
+        live[np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))] = False
+        return live
+
+    @property
+    def pending_changes(self) -> int:
+        """Appended rows plus tombstones; what the next compaction would fold away."""
+        return self.n_delta + (self.n_rows - self.n_live)
+
+    def row_of(self, url: str) -> Optional[int]:
+        """Row index of the live entry for `url`, or None."""
+        row = self.url_to_row.get(url)
+        if row is None or row in self.tombstones:
+            return None
+        return row
+
+    def score(self, queries):
+        """
+        Similarity of encoded queries against every row (base index, then
+        delta): a dense block, or CSR with only the scored candidates when the
+        search index returns one (IVF).
+        """
+        sims = self.index.score(queries)
+        if self.delta is None:
+            return sims
+        if sp.issparse(self.delta):
+            extra = (queries @ self.delta.T).toarray()
+        else:
+            extra = self.delta.score(queries)
+        if sp.issparse(sims):
+            # Delta rows are all scored (brute force); unprobed base rows stay implicit
+            return sp.hstack([sims, sp.csr_matrix(extra.astype(sims.dtype, copy=False))], format="csr")
+        return np.hstack([sims, extra.astype(sims.dtype, copy=False)])
+
+    def score_rows(self, q: np.ndarray, rows: np.ndarray, rescore: int = 0) -> np.ndarray:
+        """Dense similarity of one normalized query against a subset of rows."""
+        if self.delta is None:
+            return self.doc_vectors.score_rows(q, rows, rescore=rescore)
+        in_base = rows < self.n_base
+        out = np.empty(rows.shape[0], dtype=np.float32)
+        out[in_base] = self.doc_vectors.score_rows(q, rows[in_base], rescore=rescore)
+        out[~in_base] = self.delta.score_rows(q, rows[~in_base] - self.n_base)
+        return out
+
+    def bm25_score(self, queries: Sequence[str]) -> np.ndarray:
+        lexical = self.bm25.score(queries)
+        if self.bm25_delta is None:
+            return lexical
+        if self.bm25_delta.shape[1] == 0:
+            extra = np.zeros((len(queries), self.n_delta), dtype=lexical.dtype)
+        else:
+            extra = (self.bm25.encode(queries) @ self.bm25_delta.T).toarray()
+        return np.hstack([lexical, extra])
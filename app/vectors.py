@@ -0,0 +1,144 @@
+# app/vectors.py
+"""
+Dense document embeddings, L2-normalized once at index build time.
+
+Scoring a query is then a single matrix-vector product against the stored
+matrix, with no per-query renormalization or full-size temporaries. Three
+storage precisions are supported:
+
+- ``float32``: exact, 4 bytes per dimension.
+- ``float16``: half the memory; scores differ by ~1e-3. NumPy has no fast
+  half-precision matmul, so scans are several times slower than float32.
+- ``int8``: a quarter of the memory; symmetric per-row quantization with one
+  float32 scale per row.
+
+The reduced-precision variants score in row chunks (so the upcast temporary is
+bounded) and then rescore their best candidates exactly against the float32
+matrix, which they keep as well. When that matrix is memory-mapped from the
+index artifacts, only the rescored rows are ever paged in; an in-memory build
+holds it in full on top of the reduced copy.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows upcast at a time when scoring reduced-precision matrices
+SCORE_CHUNK_ROWS = 1024
+
+
+def l2_normalize(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return np.ascontiguousarray(mat / (norms + 1e-8), dtype=np.float32)
+
+
+class NormalizedEmbeddings:
+    def __init__(
+        self,
+        exact: np.ndarray,
+        precision: str = "float32",
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision {precision!r}; expected one of {PRECISIONS}")
+        self.exact = exact
+        self.precision = precision
+        self.codes = exact if precision == "float32" else codes
+        self.scales = scales
+
+    @classmethod
+    def build(cls, raw: np.ndarray, precision: str = "float32") -> "NormalizedEmbeddings":
+        exact = l2_normalize(raw)
+        if precision == "float16":
+            return cls(exact, precision, codes=exact.astype(np.float16))
+        if precision == "int8":
+            scales = np.abs(exact).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(exact / scales[:, None]).astype(np.int8)
+            return cls(exact, precision, codes=codes, scales=scales.astype(np.float32))
+        return cls(exact, precision)
+
+    @property
+    def shape(self):
+        return self.exact.shape
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist in the index artifacts."""
+        out = {"embeddings": self.exact}
+        if self.precision != "float32":
+            out["embeddings_codes"] = self.codes
+        if self.scales is not None:
+            out["embeddings_scales"] = self.scales
+        return out
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], precision: str) -> "NormalizedEmbeddings":
+        return cls(
+            arrays["embeddings"],
+            precision,
+            codes=arrays.get("embeddings_codes"),
+            scales=arrays.get("embeddings_scales"),
+        )
+
+    def scan_nbytes(self) -> int:
+        """Bytes touched by every full scan (the exact matrix is only read for rescoring)."""
+        n = self.codes.nbytes
+        if self.scales is not None:
+            n += self.scales.nbytes
+        return n
+
+    def resident_nbytes(self) -> int:
+        """Bytes held in memory: the scan arrays, plus the exact matrix unless it is memory-mapped."""
+        n = self.scan_nbytes()
+        if self.codes is not self.exact and not isinstance(self.exact, np.memmap):
+            n += self.exact.nbytes
+        return n
+
+    def score_rows(self, q: np.ndarray, rows: np.ndarray, rescore: int = 0) -> np.ndarray:
+        """Similarity of one normalized query against a subset of rows (used by IVF search)."""
+        if self.precision == "float32":
+            return self.exact[rows] @ q
+
+        sims = self.codes[rows].astype(np.float32) @ q
+        if self.scales is not None:
+            sims *= self.scales[rows]
+        if rescore > 0 and rows.size:
+            n = min(rescore, rows.size)
+            top = np.argpartition(-sims, n - 1)[:n] if n < rows.size else np.arange(rows.size)
+            top.sort()
+            sims[top] = self.exact[rows[top]] @ q
+        return sims
+
+    def score(self, q_norm: np.ndarray, rescore: int = 0) -> np.ndarray:
+        """
+        Cosine similarity of normalized queries (n_queries, dim) against every row.
+        For reduced precisions, the top `rescore` rows per query are recomputed
+        exactly against the float32 matrix.
+        """
+        q_norm = np.asarray(q_norm, dtype=np.float32)
+        if self.precision == "float32":
+            return q_norm @ self.exact.T
+
+        n_rows = self.codes.shape[0]
+        sims = np.empty((q_norm.shape[0], n_rows), dtype=np.float32)
+        for start in range(0, n_rows, SCORE_CHUNK_ROWS):
+            block = self.codes[start : start + SCORE_CHUNK_ROWS].astype(np.float32)
+            sims[:, start : start + block.shape[0]] = q_norm @ block.T
+        if self.scales is not None:
+            sims *= self.scales
+
+        if rescore > 0:
+            n = min(rescore, n_rows)
+            for row, q in zip(sims, q_norm):
+                if n < n_rows:
+                    # sorted so memory-mapped rows are read in file order
+                    cand = np.sort(np.argpartition(-row, n - 1)[:n])
+                else:
+                    cand = np.arange(n_rows)
+                row[cand] = self.exact[cand] @ q
+        return sims
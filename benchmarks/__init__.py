@@ -0,0 +1,14 @@
+# benchmarks/__init__.py
+"""
+Performance benchmarks. Run from the repository root as modules:
+
+    python -m benchmarks.micro --out results/micro.json     # recommender hot path
+    python -m benchmarks.load --out results/load.json       # API via ASGI, no network
+    python -m benchmarks.startup --out results/startup.json # import time, time to /health and /ready
+    python -m benchmarks.compare results/base.json results/micro.json
+
+    python -m benchmarks.search       # argsort vs argpartition candidate selection
+    python -m benchmarks.embeddings   # dense scoring per embedding precision
+    python -m benchmarks.ann          # IVF recall / latency vs exact scan
+    python -m benchmarks.catalog      # catalog load time / memory up to 1M rows
+"""
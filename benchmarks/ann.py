@@ -0,0 +1,112 @@
+# benchmarks/ann.py
+"""
+Recall vs latency of the IVF backend against the exact scan.
+
+Queries are the Train-Set queries used by scripts/evaluate.py. Recall@k is the
+overlap between the IVF top-k and the exact top-k for the same query.
+
+Document/query vectors come from the configured SentenceTransformer when it is
+installed (--vectors model), or from a 256-d LSA projection of TF-IDF
+(--vectors lsa) so the report can run without the model.
+
+    python -m benchmarks.ann
+    python -m benchmarks.ann --rows 100000 --nprobe 1 2 4 8 16 32
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from app.config import CATALOG_PATH, EMBEDDING_MODEL_NAME
+from app.search_index import ExactIndex, IVFIndex
+from app.vectors import NormalizedEmbeddings, l2_normalize
+from benchmarks.common import ROOT_DIR, load_queries, make_synthetic_catalog
+
+
+def encode(texts, queries, how: str):
+    if how == "model":
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return (
+            model.encode(texts, show_progress_bar=False, batch_size=256),
+            model.encode(queries, show_progress_bar=False),
+        )
+
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vec = TfidfVectorizer(stop_words="english")
+    svd = TruncatedSVD(n_components=min(256, len(texts) - 1), random_state=0)
+    docs = svd.fit_transform(vec.fit_transform(texts))
+    return docs, svd.transform(vec.transform(queries))
+
+
+def top_k(sims, k: int) -> set:
+    """Top-k row ids of a dense score row, or of the candidates in a sparse one (IVF)."""
+    if sp.issparse(sims):
+        rows, scores = sims.indices, sims.data
+        if rows.size <= k:
+            return set(rows.tolist())
+        return set(rows[np.argpartition(-scores, k - 1)[:k]].tolist())
+    return set(np.argpartition(-sims, k - 1)[:k].tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=0, help="synthetic catalog size; 0 = real catalog")
+    parser.add_argument("--vectors", choices=["model", "lsa"], default=None)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    how = args.vectors
+    if how is None:
+        try:
+            import sentence_transformers  # noqa: F401
+
+            how = "model"
+        except ImportError:
+            how = "lsa"
+
+    if args.rows:
+        catalog = make_synthetic_catalog(args.rows)
+    else:
+        catalog = pd.read_csv(os.path.join(ROOT_DIR, CATALOG_PATH))
+    texts = catalog["name"].fillna("").astype(str).tolist()
+    queries = load_queries()
+
+    docs, q_vecs = encode(texts, queries, how)
+    vectors = NormalizedEmbeddings.build(docs)
+    q_norm = l2_normalize(q_vecs)
+    k = min(args.k, len(texts))
+
+    exact = ExactIndex(vectors)
+    start = time.perf_counter()
+    exact_sims = [exact.score(q[None, :])[0] for q in q_norm]
+    exact_us = (time.perf_counter() - start) / len(q_norm) * 1e6
+    exact_top = [top_k(s, k) for s in exact_sims]
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors, nlist=args.nlist)
+    build_s = time.perf_counter() - start
+
+    print(f"vectors={how} rows={len(texts)} dim={docs.shape[1]} queries={len(queries)} "
+          f"nlist={ivf.nlist} build={build_s:.2f}s")
+    print(f"{'backend':>12} {'nprobe':>7} {'us/query':>10} {'recall@' + str(k):>10}")
+    print(f"{'exact':>12} {'-':>7} {exact_us:>10.1f} {1.0:>10.3f}")
+    for nprobe in args.nprobe:
+        ivf.nprobe = max(1, min(nprobe, ivf.nlist))
+        start = time.perf_counter()
+        sims = [ivf.score(q[None, :]) for q in q_norm]
+        us = (time.perf_counter() - start) / len(q_norm) * 1e6
+        recall = np.mean([len(top_k(s, k) & e) / k for s, e in zip(sims, exact_top)])
+        print(f"{'ivf':>12} {ivf.nprobe:>7} {us:>10.1f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
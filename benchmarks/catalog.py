@@ -0,0 +1,98 @@
+# benchmarks/catalog.py
+"""
+Catalog load time and memory as the catalog grows.
+
+Compares the previous loader (untyped pandas frame, then one Python tuple per
+row with the test types parsed per row) with the typed columnar loader of
+app/catalog.py, reading the CSV and reading its binary cache (Parquet with
+pyarrow, else .npz). Synthetic rows reuse the real catalog's names,
+durations, flags and test types.
+
+    python -m benchmarks.catalog
+    python -m benchmarks.catalog --sizes 100000 1000000 --repeat 3
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.catalog import CACHE_EXTENSION, CATALOG_COLUMNS, Catalog, read_catalog_csv
+from app.config import CATALOG_PATH
+from benchmarks.common import ROOT_DIR, make_synthetic_catalog
+
+
+def pandas_rows(path: str):
+    """The pre-typed loader, kept here as the baseline."""
+    df = pd.read_csv(path)
+    df = df.fillna(
+        {"name": "", "description": "", "test_type": "", "remote_support": "Unknown", "adaptive_support": "Unknown"}
+    )
+    types = df["test_type"].apply(lambda s: [x.strip() for x in str(s).split(";") if x.strip()])
+    durations = pd.to_numeric(df["duration"], errors="coerce").fillna(0).astype(int)
+    return list(
+        zip(
+            df["url"].astype(str).tolist(),
+            df["name"].astype(str).tolist(),
+            df["adaptive_support"].astype(str).tolist(),
+            df["description"].astype(str).tolist(),
+            durations.tolist(),
+            df["remote_support"].astype(str).tolist(),
+            [tuple(t) for t in types],
+        )
+    )
+
+
+def write_catalog(n_rows: int, tmp_dir: str) -> str:
+    base = pd.read_csv(os.path.join(ROOT_DIR, CATALOG_PATH))
+    df = make_synthetic_catalog(n_rows)
+    sample = base.iloc[np.random.default_rng(1).integers(0, len(base), size=n_rows)].reset_index(drop=True)
+    for col in ("description", "duration", "test_type", "remote_support", "adaptive_support"):
+        df[col] = sample[col]
+    path = os.path.join(tmp_dir, f"catalog-{n_rows}.csv")
+    df[list(CATALOG_COLUMNS)].to_csv(path, index=False)
+    return path
+
+
+def measure(fn, repeat: int):
+    """(best seconds, MB still allocated by the result, peak MB while loading)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, current / 1e6, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'loader':>16} {'load ms':>10} {'retained MB':>12} {'peak MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = write_catalog(size, tmp)
+            cache = os.path.join(tmp, f"catalog-{size}{CACHE_EXTENSION}")
+            read_catalog_csv(path).save(cache)
+            cases = {
+                "pandas rows": lambda: pandas_rows(path),
+                "typed csv": lambda: read_catalog_csv(path),
+                f"cache {CACHE_EXTENSION}": lambda: Catalog.load(cache),
+            }
+            for label, fn in cases.items():
+                seconds, retained, peak = measure(fn, args.repeat)
+                print(f"{size:>8} {label:>16} {seconds * 1e3:>10.1f} {retained:>12.1f} {peak:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
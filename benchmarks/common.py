@@ -0,0 +1,119 @@
+# benchmarks/common.py
+"""Shared catalogs, queries, timing and result files for the benchmarks."""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.config import CATALOG_PATH
+from app.recommender import AssessmentRecommender
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAIN_XLSX = os.path.join(ROOT_DIR, "data", "Gen_AI Dataset.xlsx")
+
+QUERIES = [
+    "Java developer who can collaborate with business teams",
+    "Entry level sales role, graduates",
+    "Senior data analyst with SQL and Excel",
+    "Customer service representative with good communication",
+    "Python automation engineer, selenium",
+]
+
+
+def load_queries(sheet: str = "Train-Set") -> List[str]:
+    """Distinct queries of one sheet of the labelled dataset."""
+    df = pd.read_excel(TRAIN_XLSX, sheet_name=sheet)
+    return df["Query"].dropna().astype(str).drop_duplicates().tolist()
+
+
+def make_synthetic_catalog(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Catalog of `n_rows` fake products whose names reuse the real catalog vocabulary."""
+    base = pd.read_csv(os.path.join(ROOT_DIR, CATALOG_PATH))
+    words = sorted({w for name in base["name"].astype(str) for w in name.split()})
+    rng = np.random.default_rng(seed)
+
+    lengths = rng.integers(2, 6, size=n_rows)
+    picks = rng.integers(0, len(words), size=int(lengths.sum()))
+    names, pos = [], 0
+    for n in lengths:
+        names.append(" ".join(words[j] for j in picks[pos : pos + n]))
+        pos += n
+
+    return pd.DataFrame(
+        {
+            "url": [f"https://example.com/products/synthetic-{i}/" for i in range(n_rows)],
+            "name": names,
+            "description": "",
+            "duration": 0,
+            "test_type": "",
+            "remote_support": "Unknown",
+            "adaptive_support": "Unknown",
+        }
+    )
+
+
+def catalog_path(n_rows: int, tmp_dir: str) -> str:
+    """Path of the real catalog (`n_rows` <= 0) or of a synthetic one written to `tmp_dir`."""
+    if n_rows <= 0:
+        return os.path.join(ROOT_DIR, CATALOG_PATH)
+    path = os.path.join(tmp_dir, f"catalog-{n_rows}.csv")
+    if not os.path.exists(path):
+        make_synthetic_catalog(n_rows).to_csv(path, index=False)
+    return path
+
+
+def build_recommender(n_rows: int, retrieval_mode: Optional[str] = None) -> AssessmentRecommender:
+    with tempfile.TemporaryDirectory() as tmp:
+        return AssessmentRecommender(
+            catalog_path=catalog_path(n_rows, tmp), index_dir=None, retrieval_mode=retrieval_mode
+        )
+
+
+def time_calls(fn: Callable[[int], object], repeat: int, warmup: int = 3) -> List[float]:
+    """Wall time in seconds of each of `repeat` calls fn(0), fn(1), ..."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(seconds: Sequence[float], unit: str = "us") -> Dict[str, float]:
+    """mean / p50 / p95 / p99 / min of `seconds`, converted to `unit` ("us" or "ms")."""
+    scale = {"us": 1e6, "ms": 1e3}[unit]
+    values = np.asarray(seconds, dtype=float) * scale
+    out = {f"p{p}_{unit}": float(np.percentile(values, p)) for p in (50, 95, 99)}
+    out.update({f"mean_{unit}": float(values.mean()), f"min_{unit}": float(values.min()), "n": int(values.size)})
+    return out
+
+
+def write_results(path: str, benchmark: str, params: Dict, results: Dict[str, Dict]) -> None:
+    payload = {
+        "benchmark": benchmark,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"[RESULTS] Saved to {path}")
+
+
+def read_results(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,79 @@
+# benchmarks/compare.py
+"""
+Compare two benchmark result files (from micro or load) case by case.
+
+A case regresses when its latency statistic grows, or its throughput drops,
+by more than --threshold (a fraction). Exits 1 if any case regressed.
+
+    python -m benchmarks.compare results/base.json results/new.json
+    python -m benchmarks.compare base.json new.json --stat p95 --threshold 0.15
+"""
+import argparse
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.common import read_results
+
+
+def _stat_key(stats: Dict, stat: str) -> Optional[str]:
+    """Key of `stat` ("p50", "mean", ...) in a case, whatever its unit suffix."""
+    return next((key for key in stats if key.startswith(f"{stat}_")), None)
+
+
+def compare(base: Dict, new: Dict, stat: str = "p50", threshold: float = 0.10) -> Tuple[List[Dict], List[str]]:
+    rows, regressions = [], []
+    for case, new_stats in new["results"].items():
+        base_stats = base["results"].get(case)
+        if base_stats is None:
+            continue
+        key = _stat_key(new_stats, stat)
+        if key and base_stats.get(key):
+            change = new_stats[key] / base_stats[key] - 1.0
+            rows.append({"case": case, "metric": key, "base": base_stats[key], "new": new_stats[key], "change": change})
+            if change > threshold:
+                regressions.append(f"{case}: {key} {base_stats[key]:.2f} -> {new_stats[key]:.2f} ({change:+.1%})")
+        if base_stats.get("throughput_rps") and "throughput_rps" in new_stats:
+            change = new_stats["throughput_rps"] / base_stats["throughput_rps"] - 1.0
+            rows.append(
+                {
+                    "case": case,
+                    "metric": "throughput_rps",
+                    "base": base_stats["throughput_rps"],
+                    "new": new_stats["throughput_rps"],
+                    "change": change,
+                }
+            )
+            if change < -threshold:
+                regressions.append(f"{case}: throughput {base_stats['throughput_rps']:.1f} -> "
+                                   f"{new_stats['throughput_rps']:.1f} req/s ({change:+.1%})")
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--stat", default="p50", help="latency statistic to compare (p50, p95, p99, mean, min)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    base, new = read_results(args.base), read_results(args.new)
+    if base["benchmark"] != new["benchmark"]:
+        sys.exit(f"Cannot compare a {base['benchmark']!r} run with a {new['benchmark']!r} run")
+    if base["params"] != new["params"]:
+        print(f"WARNING: parameters differ:\n  base {base['params']}\n  new  {new['params']}")
+
+    rows, regressions = compare(base, new, args.stat, args.threshold)
+    print(f"{'case':<32} {'metric':<15} {'base':>10} {'new':>10} {'change':>8}")
+    for r in rows:
+        print(f"{r['case']:<32} {r['metric']:<15} {r['base']:>10.2f} {r['new']:>10.2f} {r['change']:>+8.1%}")
+
+    if regressions:
+        print(f"\nREGRESSIONS (> {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/embeddings.py
+"""
+Memory and per-query latency of dense scoring for each embedding precision.
+
+Uses random 384-d vectors (the all-MiniLM-L6-v2 width), so it runs without
+sentence-transformers installed. "renorm" is the old path that renormalized
+the whole document matrix on every query; the other rows use the
+NormalizedEmbeddings store from app/vectors.py. "scan MB" is what every full
+scan reads; "resident MB" is an in-memory build, which for reduced precisions
+also holds the float32 rescoring matrix. Served from the index artifacts that
+matrix is memory-mapped and resident memory is close to "scan MB".
+
+    python -m benchmarks.embeddings
+    python -m benchmarks.embeddings --sizes 360 100000 --dim 384
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.config import EMBEDDING_RESCORE_CANDIDATES
+from app.vectors import PRECISIONS, NormalizedEmbeddings, l2_normalize
+
+
+def renorm_score(doc_mat: np.ndarray, q_vec: np.ndarray) -> np.ndarray:
+    """The pre-normalization per-query scoring, kept as the baseline."""
+    q_norm = q_vec / (np.linalg.norm(q_vec) + 1e-8)
+    d_norm = doc_mat / (np.linalg.norm(doc_mat, axis=1, keepdims=True) + 1e-8)
+    return d_norm @ q_norm
+
+
+def measure(fn, queries, repeat: int):
+    fn(queries[0])
+    tracemalloc.start()
+    fn(queries[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(queries[i % len(queries)])
+    return (time.perf_counter() - start) / repeat * 1e6, peak
+
+
+def recall_at(approx: np.ndarray, exact: np.ndarray, n: int) -> float:
+    a = set(np.argpartition(-approx, n - 1)[:n].tolist())
+    e = set(np.argpartition(-exact, n - 1)[:n].tolist())
+    return len(a & e) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[360, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--candidates", type=int, default=30, help="top-n used for the recall column")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(
+        f"{'rows':>8} {'variant':>16} {'scan MB':>8} {'resident MB':>12} {'peak alloc KB':>14} "
+        f"{'us/query':>10} {'recall@' + str(args.candidates):>10}"
+    )
+    for size in args.sizes:
+        raw = rng.standard_normal((size, args.dim)).astype(np.float32)
+        queries = [rng.standard_normal(args.dim).astype(np.float32) for _ in range(16)]
+        exact = NormalizedEmbeddings.build(raw, "float32")
+        n = min(args.candidates, size)
+
+        us, peak = measure(lambda q: renorm_score(raw, q), queries, args.repeat)
+        print(
+            f"{size:>8} {'renorm':>16} {raw.nbytes / 1e6:>8.2f} {raw.nbytes / 1e6:>12.2f} "
+            f"{peak / 1e3:>14.1f} {us:>10.1f} {1.0:>10.3f}"
+        )
+
+        for precision in PRECISIONS:
+            store = exact if precision == "float32" else NormalizedEmbeddings.build(raw, precision)
+            rescores = [0] if precision == "float32" else [0, EMBEDDING_RESCORE_CANDIDATES]
+            for rescore in rescores:
+                label = precision if not rescore else f"{precision}+rescore"
+                us, peak = measure(
+                    lambda q: store.score(l2_normalize(q[None, :]), rescore=rescore), queries, args.repeat
+                )
+                recalls = [
+                    recall_at(
+                        store.score(l2_normalize(q[None, :]), rescore=rescore)[0],
+                        exact.score(l2_normalize(q[None, :]))[0],
+                        n,
+                    )
+                    for q in queries
+                ]
+                print(
+                    f"{size:>8} {label:>16} {store.scan_nbytes() / 1e6:>8.2f} {store.resident_nbytes() / 1e6:>12.2f} "
+                    f"{peak / 1e3:>14.1f} {us:>10.1f} {np.mean(recalls):>10.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# benchmarks/load.py
+"""
+In-process load test of the FastAPI app.
+
+Requests go through httpx's ASGI transport straight into `app.api.app` (the
+full middleware / validation / executor / cache stack, without sockets), from
+`concurrency` concurrent clients per level. Reports throughput, latency
+percentiles and non-200 responses (503 = scoring queue full) per level.
+
+By default every request carries a distinct query so the response cache is
+missed and scoring is measured; --cached replays the same few queries.
+
+    python -m benchmarks.load
+    python -m benchmarks.load --concurrency 1 8 32 128 --requests 1000 --out results/load.json
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import httpx
+
+from benchmarks.common import load_queries, summarize, write_results
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Run the app's startup / shutdown handlers via the ASGI lifespan protocol."""
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+    task = asyncio.create_task(app(scope, inbox.get, outbox.put))
+
+    await inbox.put({"type": "lifespan.startup"})
+    message = await outbox.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"app startup failed: {message.get('message', message['type'])}")
+    try:
+        yield
+    finally:
+        await inbox.put({"type": "lifespan.shutdown"})
+        await outbox.get()
+        await task
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, n_requests: int, queries) -> dict:
+    latencies, statuses = [], Counter()
+    remaining = itertools.count()
+
+    async def worker():
+        while next(remaining) < n_requests:
+            start = time.perf_counter()
+            resp = await client.post("/recommend", json={"query": next(queries)})
+            latencies.append(time.perf_counter() - start)
+            statuses[resp.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stats = summarize(latencies, unit="ms")
+    stats["throughput_rps"] = len(latencies) / elapsed
+    stats["errors"] = sum(n for status, n in statuses.items() if status != 200)
+    stats["statuses"] = {str(status): n for status, n in sorted(statuses.items())}
+    return stats
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 600.0) -> None:
+    """Poll /ready until the index has loaded in the background."""
+    deadline = time.perf_counter() + timeout
+    while True:
+        response = await client.get("/ready")
+        if response.status_code == 200:
+            return
+        if response.json().get("status") == "failed" or time.perf_counter() > deadline:
+            raise RuntimeError(f"app did not become ready: {response.json()}")
+        await asyncio.sleep(0.05)
+
+
+def query_stream(base, cached: bool):
+    if cached:
+        return itertools.cycle(base)
+    # A request number makes every query unique, so each one misses the response cache
+    return (f"{q} #{i}" for i, q in enumerate(itertools.cycle(base)))
+
+
+async def run(args) -> dict:
+    from app.api import app
+
+    results = {}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await wait_ready(client)
+            queries = query_stream(load_queries(), args.cached)
+            await run_level(client, 1, args.warmup, queries)
+
+            print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for concurrency in args.concurrency:
+                stats = await run_level(client, concurrency, args.requests, queries)
+                results[f"c={concurrency}"] = stats
+                print(
+                    f"{concurrency:>8} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} "
+                    f"{stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['errors']:>7}"
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the API.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cached", action="store_true", help="repeat queries so the response cache answers")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.out:
+        params = {"concurrency": args.concurrency, "requests": args.requests, "cached": args.cached}
+        write_results(args.out, "load", params, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/micro.py
+"""
+Micro-benchmarks of the recommender hot path, each stage timed in isolation:
+
+    __init__ (build)   AssessmentRecommender() with no persisted index
+    __init__ (load)    AssessmentRecommender() attaching to saved artifacts
+    _score             query -> similarity vector
+    _search_indices    _score + top-k candidate selection
+    _build_result      one row -> response dict
+    recommend          full request path (analysis, search, ranking)
+
+on the real catalog (size 0) and on synthetic catalogs.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --sizes 0 10000 100000 --mode hybrid --out results/micro.json
+"""
+import argparse
+import tempfile
+import time
+
+from app.recommender import AssessmentRecommender
+from benchmarks.common import QUERIES, catalog_path, summarize, time_calls, write_results
+
+
+def bench_size(n_rows: int, mode, repeat: int, init_repeat: int, k: int):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = catalog_path(n_rows, tmp)
+        index_dir = f"{tmp}/index"
+
+        def build(_):
+            AssessmentRecommender(catalog_path=path, index_dir=None, retrieval_mode=mode).close()
+
+        results["__init__ (build)"] = time_calls(build, init_repeat, warmup=0)
+
+        AssessmentRecommender(catalog_path=path, index_dir=index_dir, retrieval_mode=mode).close()
+
+        def load(_):
+            AssessmentRecommender(catalog_path=path, index_dir=index_dir, retrieval_mode=mode).close()
+
+        results["__init__ (load)"] = time_calls(load, init_repeat, warmup=1)
+
+        rec = AssessmentRecommender(catalog_path=path, index_dir=index_dir, retrieval_mode=mode)
+        try:
+            n = len(rec)
+            query = lambda i: QUERIES[i % len(QUERIES)]  # noqa: E731
+            results["_score"] = time_calls(lambda i: rec._score(query(i)), repeat)
+            results["_search_indices"] = time_calls(lambda i: rec._search_indices(query(i), top_k=k), repeat)
+            results["_build_result"] = time_calls(lambda i: rec._build_result((i * 7919) % n), repeat)
+            results["recommend"] = time_calls(lambda i: rec.recommend(query(i), k=k), repeat)
+        finally:
+            rec.close()
+    return n, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the recommender hot path.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[0, 10000],
+        help="catalog sizes to test; 0 means the real catalog",
+    )
+    parser.add_argument("--mode", default=None, help="retrieval mode (default: RETRIEVAL_MODE)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--init-repeat", type=int, default=3)
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out = {}
+    print(f"{'rows':>8} {'stage':<18} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10}")
+    for size in args.sizes:
+        n, samples = bench_size(size, args.mode, args.repeat, args.init_repeat, args.k)
+        for stage, seconds in samples.items():
+            stats = summarize(seconds)
+            out[f"{n}/{stage}"] = stats
+            print(f"{n:>8} {stage:<18} {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f}")
+    print(f"({time.perf_counter() - start:.1f}s)")
+
+    if args.out:
+        params = {"sizes": args.sizes, "mode": args.mode, "k": args.k, "repeat": args.repeat}
+        write_results(args.out, "micro", params, out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/search.py
+"""
+Per-query latency of candidate selection as the catalog grows.
+
+Compares the old full-sort path (argsort + Python list filter) with the
+argpartition-based `_top_k_indices` used by `AssessmentRecommender`, on the
+real catalog and on synthetic catalogs up to 100k rows.
+
+    python -m benchmarks.search
+    python -m benchmarks.search --sizes 1000 10000 100000 --repeat 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.recommender import _top_k_indices
+from benchmarks.common import QUERIES, build_recommender
+
+
+def argsort_indices(sims: np.ndarray, n: int):
+    """The pre-argpartition selection, kept here as the baseline."""
+    idxs = np.argsort(sims)[::-1]
+    filtered = [i for i in idxs if sims[i] > 0]
+    if not filtered:
+        return list(idxs[:n])
+    return filtered[:n]
+
+
+def time_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[0, 1000, 10000, 100000],
+        help="catalog sizes to test; 0 means the real catalog",
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    n = args.k * 3
+    print(f"{'rows':>8} {'score us':>10} {'argsort us':>11} {'argpart us':>11} {'search us':>10}")
+    for size in args.sizes:
+        rec = build_recommender(size)
+        sims = [rec._score(q) for q in QUERIES]
+
+        score_us = time_per_call(lambda i: rec._score(QUERIES[i % len(QUERIES)]), args.repeat)
+        old_us = time_per_call(lambda i: argsort_indices(sims[i % len(sims)], n), args.repeat)
+        new_us = time_per_call(lambda i: _top_k_indices(sims[i % len(sims)], n), args.repeat)
+        search_us = time_per_call(
+            lambda i: rec._search_indices(QUERIES[i % len(QUERIES)], top_k=args.k), args.repeat
+        )
+        print(
+            f"{len(rec):>8} {score_us:>10.1f} {old_us:>11.1f} "
+            f"{new_us:>11.1f} {search_us:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/startup.py
+"""
+Cold-start cost: how long a fresh process takes to import the app and to
+answer /health (liveness) and /ready (index loaded), as on a new autoscaled
+node.
+
+Every sample is a new interpreter. Import times come from ``python -X
+importtime`` (cumulative time of the module, including everything it pulls
+in); the slowest imports of the last run are listed so a new heavy dependency
+on the startup path shows up by name.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 10 --modules app.api app.recommender --out results/startup.json
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from benchmarks.common import ROOT_DIR, summarize, write_results
+
+
+def import_times(module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Cumulative import time (seconds) of `module` in a new interpreter, plus (cumulative, name) of every import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # One space after the separator, then two more per nesting level
+        entries.append((int(cumulative) / 1e6, name[1:].rstrip()))
+    total = next(seconds for seconds, name in entries if name == module)
+    return total, entries
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_ready(timeout: float) -> Tuple[float, float]:
+    """Seconds from spawning uvicorn until /health, then /ready, first answer 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    marks: Dict[str, float] = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            for path in ("/health", "/ready"):
+                while True:
+                    if proc.poll() is not None:
+                        raise RuntimeError(f"server exited with status {proc.returncode}")
+                    if time.perf_counter() - start > timeout:
+                        raise RuntimeError(f"{path} not ready after {timeout:.0f}s")
+                    try:
+                        if client.get(path).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.01)
+                marks[path] = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+    return marks["/health"], marks["/ready"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time to /health and /ready of a new process.")
+    parser.add_argument("--modules", nargs="+", default=["app.api", "app.recommender"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--no-server", action="store_true", help="only measure imports")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {}
+    for module in args.modules:
+        for _ in range(args.repeat):
+            total, entries = import_times(module)
+            samples.setdefault(f"import {module}", []).append(total)
+        print(f"\nslowest imports under {module} (cumulative ms, last run):")
+        for seconds, name in sorted(entries, reverse=True)[: args.top]:
+            print(f"  {seconds * 1e3:>9.1f}  {name}")
+
+    if not args.no_server:
+        for _ in range(args.repeat):
+            health, ready = time_to_ready(args.timeout)
+            samples.setdefault("start -> /health", []).append(health)
+            samples.setdefault("start -> /ready", []).append(ready)
+
+    out = {}
+    print(f"\n{'case':<28} {'p50 ms':>10} {'min ms':>10} {'mean ms':>10}")
+    for case, seconds in samples.items():
+        stats = out[case] = summarize(seconds, unit="ms")
+        print(f"{case:<28} {stats['p50_ms']:>10.1f} {stats['min_ms']:>10.1f} {stats['mean_ms']:>10.1f}")
+
+    if args.out:
+        params = {"modules": args.modules, "repeat": args.repeat, "server": not args.no_server}
+        write_results(args.out, "startup", params, out)
+
+
+if __name__ == "__main__":
+    main()
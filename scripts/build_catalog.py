@@ -0,0 +1,251 @@
+# scripts/build_catalog.py
+"""
+Build data/catalog.csv, and the index artifacts, from every catalog source.
+
+Product URLs are merged from the sources in priority order and deduplicated
+by normalized URL. Case, scheme, "www.", query string, trailing slash and the
+/solutions prefix of the labelled data are ignored, and the first source's
+spelling of a URL is kept:
+
+    --url-list   products found by the crawler (data/url_list.txt)
+    --train      Assessment_url column of the labelled Train-Set
+    --cache-dir  crawl cache (scrape_catalog.py): each product's latest cached
+                 detail page fills description / duration / test_type / flags
+
+Detail pages are parsed in a process pool and rows are streamed to the CSV in
+URL order as they come back. A manifest (--manifest) records the cached page
+and parser version behind every row. A rebuild reuses each row whose page and
+parser are unchanged and parses only the rest. The CSV is replaced only when
+its contents change, so a no-op rebuild leaves the running API (hot swap) and
+the index artifacts, both keyed by the catalog content hash, alone. Index
+artifacts are then built for the catalog unless they already exist.
+
+    python scripts/build_catalog.py
+    python scripts/build_catalog.py --workers 8 --no-index
+    python scripts/build_catalog.py --full        # ignore the manifest, reparse every page
+    python scripts/build_catalog.py --train ""    # crawled products only
+"""
+import argparse
+import csv
+import filecmp
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.catalog import CATALOG_COLUMNS  # noqa: E402
+from app.config import CATALOG_PATH, INDEX_DIR  # noqa: E402
+from app.index_store import file_sha256  # noqa: E402
+from crawl_cache import CrawlJournal, PageCache  # noqa: E402
+from product_page import minimal_row, parse_cached_detail  # noqa: E402
+
+TRAIN_XLSX = "data/Gen_AI Dataset.xlsx"
+URL_LIST = "data/url_list.txt"
+CACHE_DIR = "data/crawl_cache"
+MANIFEST_PATH = "data/catalog_manifest.jsonl"
+
+# Rows parsed by another version of the page parser are parsed again
+PARSER_VERSION = file_sha256(os.path.join(os.path.dirname(os.path.abspath(__file__)), "product_page.py"))[:16]
+
+# Detail pages handed to a parse worker at a time
+PARSE_CHUNK = 16
+
+
+def normalize_url(url: str) -> str:
+    """Dedup key of a product URL."""
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc.removeprefix("www.")
+    path = parts.path.rstrip("/")
+    if path.startswith("/solutions/products/"):
+        path = path[len("/solutions") :]
+    return host + path
+
+
+def read_url_list(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+
+
+def read_train_urls(path: str) -> Iterator[str]:
+    import pandas as pd
+
+    df = pd.read_excel(path, sheet_name="Train-Set", usecols=["Assessment_url"])
+    for url in df["Assessment_url"].dropna().astype(str):
+        if url.strip():
+            yield url.strip()
+
+
+def merge_sources(sources: Iterable[Iterable[str]]) -> Dict[str, str]:
+    """normalized URL -> URL; the first source (and first occurrence) wins."""
+    urls: Dict[str, str] = {}
+    for source in sources:
+        for url in source:
+            urls.setdefault(normalize_url(url), url)
+    return urls
+
+
+def read_sources(url_list: str = URL_LIST, train: str = TRAIN_XLSX) -> Dict[str, str]:
+    """merge_sources over the URL list, then the Train-Set; '' or a missing file skips a source."""
+    sources = []
+    for path, read in ((url_list, read_url_list), (train, read_train_urls)):
+        if not path:
+            continue
+        if not os.path.exists(path):
+            print(f"Skipping missing source {path}")
+            continue
+        sources.append(read(path))
+    return merge_sources(sources)
+
+
+def cached_pages(journal: CrawlJournal, cache: PageCache) -> Dict[str, Tuple[str, str]]:
+    """normalized URL -> (sha, path) of the latest cached page of every crawled URL."""
+    return {
+        normalize_url(url): (entry["sha"], cache.path(entry["sha"]))
+        for url, entry in journal.pages.items()
+        if cache.has(entry["sha"])
+    }
+
+
+def read_manifest(path: str) -> Dict[str, Dict]:
+    entries: Dict[str, Dict] = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["key"]] = entry
+    return entries
+
+
+def _tmp_beside(path: str, suffix: str) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".build-", suffix=suffix, dir=directory)
+    os.close(fd)
+    return tmp
+
+
+def build(
+    urls: Dict[str, str],
+    pages: Dict[str, Tuple[str, str]],
+    out_path: str = CATALOG_PATH,
+    manifest_path: str = MANIFEST_PATH,
+    pool: Optional[Executor] = None,
+    workers: Optional[int] = None,
+    full: bool = False,
+) -> Dict[str, int]:
+    """
+    Write the catalog rows of `urls` (from merge_sources), enriched from
+    `pages` (from cached_pages), to `out_path`. Detail pages are parsed in
+    `pool`, or in a new process pool of `workers`. Returns row counts.
+    """
+    previous = {} if full else read_manifest(manifest_path)
+    stats = {"rows": len(urls), "reused": 0, "parsed": 0, "unenriched": 0}
+    stats["dropped"] = len(previous.keys() - urls.keys())
+
+    # (key, url, page sha, row); rows still to be parsed are None
+    plan = []
+    jobs = []
+    for key in sorted(urls, key=urls.get):
+        url = urls[key]
+        sha, path = pages.get(key, ("", None))
+        entry = previous.get(key)
+        if entry and (entry["url"], entry["page"], entry["parser"]) == (url, sha, PARSER_VERSION):
+            row = entry["row"]
+            stats["reused"] += 1
+        elif path is None:
+            row = minimal_row(url)
+            stats["unenriched"] += 1
+        else:
+            row = None
+            jobs.append((path, url))
+        plan.append((key, url, sha, row))
+    stats["parsed"] = len(jobs)
+
+    own_pool = pool is None and bool(jobs)
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    csv_tmp, manifest_tmp = _tmp_beside(out_path, ".csv"), _tmp_beside(manifest_path, ".jsonl")
+    try:
+        # Results come back in submission order, i.e. in the order of `plan`
+        parsed = pool.map(parse_cached_detail, *zip(*jobs), chunksize=PARSE_CHUNK) if jobs else iter(())
+        with open(csv_tmp, "w", newline="", encoding="utf-8") as f, open(
+            manifest_tmp, "w", encoding="utf-8"
+        ) as manifest:
+            writer = csv.DictWriter(f, fieldnames=list(CATALOG_COLUMNS))
+            writer.writeheader()
+            for key, url, sha, row in plan:
+                if row is None:
+                    row = next(parsed)
+                writer.writerow(row)
+                entry = {"key": key, "url": url, "page": sha, "parser": PARSER_VERSION, "row": row}
+                manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        stats["changed"] = int(not (os.path.exists(out_path) and filecmp.cmp(csv_tmp, out_path, shallow=False)))
+        if stats["changed"]:
+            os.replace(csv_tmp, out_path)
+        os.replace(manifest_tmp, manifest_path)
+    finally:
+        if own_pool:
+            pool.shutdown()
+        for tmp in (csv_tmp, manifest_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return stats
+
+
+def build_index(catalog_path: str, index_dir: str) -> None:
+    """Load the index artifacts of `catalog_path`, building and saving them if they are missing."""
+    from app.recommender import AssessmentRecommender
+
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir)
+    print(f"[INDEX] {rec.index_version} ({len(rec)} items) in {index_dir}")
+    rec.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the catalog CSV and index from all catalog sources.")
+    parser.add_argument("--out", default=CATALOG_PATH)
+    parser.add_argument("--url-list", default=URL_LIST, help="crawled product URLs ('' to skip)")
+    parser.add_argument("--train", default=TRAIN_XLSX, help="labelled dataset ('' to skip)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="crawl cache for detail pages ('' to skip)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--full", action="store_true", help="reparse every row, ignoring the manifest")
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    parser.add_argument("--no-index", dest="index", action="store_false")
+    args = parser.parse_args()
+
+    urls = read_sources(args.url_list, args.train)
+    if not urls:
+        sys.exit("No product URLs in any source")
+
+    pages = {}
+    if args.cache_dir and os.path.isdir(args.cache_dir):
+        journal = CrawlJournal(os.path.join(args.cache_dir, "journal.jsonl"))
+        pages = cached_pages(journal, PageCache(args.cache_dir))
+
+    stats = build(urls, pages, args.out, args.manifest, workers=args.workers, full=args.full)
+    print(
+        f"[CATALOG] {stats['rows']} rows ({stats['reused']} unchanged, {stats['parsed']} parsed, "
+        f"{stats['unenriched']} without a cached page, {stats['dropped']} dropped) -> {args.out}"
+        + ("" if stats["changed"] else " (unchanged)")
+    )
+    if args.index:
+        build_index(args.out, args.index_dir)
+
+
+if __name__ == "__main__":
+    main()
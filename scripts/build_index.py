@@ -0,0 +1,38 @@
+# scripts/build_index.py
+"""
+Build the on-disk index artifacts for the current catalog.
+
+The API loads (memory-maps) these at startup instead of refitting TF-IDF or
+re-encoding the catalog. Artifacts are keyed by the catalog content hash, so
+re-running this after a catalog change writes a new directory alongside the
+old one.
+
+    python scripts/build_index.py
+    python scripts/build_index.py --catalog data/catalog.csv --index-dir data/index
+"""
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.config import CATALOG_PATH, INDEX_DIR  # noqa: E402
+from app.recommender import AssessmentRecommender  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build index artifacts for the catalog.")
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    # index_dir=None forces a fresh fit instead of loading existing artifacts
+    rec = AssessmentRecommender(catalog_path=args.catalog, index_dir=None)
+    path = rec.save_index(args.index_dir)
+    print(f"Built index {rec.index_version} ({len(rec)} items) -> {path}")
+
+
+if __name__ == "__main__":
+    main()
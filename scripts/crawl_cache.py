@@ -0,0 +1,164 @@
+# scripts/crawl_cache.py
+"""
+On-disk crawl cache and crawl-state journal.
+
+Layout of the cache directory (data/crawl_cache/ by default):
+
+    objects/<aa>/<sha256>.gz   gzip-compressed page bodies, named by the
+                               sha256 of their content (identical pages are
+                               stored once)
+    journal.jsonl              append-only crawl log, one JSON object per line
+
+The journal maps URLs to cached bodies and records each run's progress:
+
+    {"event": "start", "run": ...}
+    {"event": "page", "run": ..., "url": ..., "sha": ..., "etag": ..., "last_modified": ...}
+    {"event": "fail", "run": ..., "url": ..., "error": ...}
+    {"event": "listing", "run": ..., "urls": [...]}
+    {"event": "done", "run": ...}
+
+Replaying it gives the latest cached body and validators for every URL (across
+runs) plus what the last run had already finished, so an interrupted run picks
+up where it stopped and parsing can be redone offline from the cache alone.
+A torn last line (crash mid-write) is ignored on replay.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+class PageCache:
+    def __init__(self, root: str):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+
+    def path(self, sha: str) -> str:
+        return os.path.join(self.objects, sha[:2], f"{sha}.gz")
+
+    def has(self, sha: str) -> bool:
+        return os.path.exists(self.path(sha))
+
+    def put(self, body: bytes) -> str:
+        """Store `body` (if not already present) and return its content hash."""
+        sha = hashlib.sha256(body).hexdigest()
+        final = self.path(sha)
+        if os.path.exists(final):
+            return sha
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(final), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(body, compresslevel=6))
+            os.replace(tmp, final)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return sha
+
+
+def read_page(path: str) -> str:
+    """Decoded body of a cached page (used by parse workers, which only get the path)."""
+    with gzip.open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="replace")
+
+
+class CrawlJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.pages: Dict[str, Dict] = {}  # url -> latest "page" entry, any run
+        self.run: Optional[str] = None
+        self.run_pages: set = set()  # URLs fetched (or confirmed unchanged) in this run
+        self.listing: Optional[List[str]] = None  # product URLs, once this run's pagination finished
+        self.resumed = False
+
+        self._last_run: Optional[str] = None
+        self._last_run_done = True
+        self._last_run_pages: set = set()
+        self._last_listing: Optional[List[str]] = None
+        self._replay()
+        self._fh = None
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                event = entry.get("event")
+                if event == "start":
+                    self._last_run, self._last_run_done = entry["run"], False
+                    self._last_run_pages, self._last_listing = set(), None
+                elif event == "page":
+                    self.pages[entry["url"]] = entry
+                    if entry.get("run") == self._last_run:
+                        self._last_run_pages.add(entry["url"])
+                elif event == "listing" and entry.get("run") == self._last_run:
+                    self._last_listing = entry["urls"]
+                elif event == "done" and entry.get("run") == self._last_run:
+                    self._last_run_done = True
+
+    def start(self, fresh: bool = False) -> None:
+        """Resume the last run if it did not finish (unless `fresh`), else start a new one."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        torn = False
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if torn:
+            # Terminate a torn last line so the next record does not land on it
+            self._fh.write("\n")
+        if not fresh and self._last_run is not None and not self._last_run_done:
+            self.run, self.resumed = self._last_run, True
+            self.run_pages = set(self._last_run_pages)
+            self.listing = self._last_listing
+            return
+        # Pid and random suffix: two runs started within the same second stay apart
+        self.run = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{os.urandom(2).hex()}"
+        self._append({"event": "start"})
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _append(self, entry: Dict) -> None:
+        entry = {**entry, "run": self.run, "ts": round(time.time(), 3)}
+        self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # Flushed per record so a killed process loses at most the line in flight
+        self._fh.flush()
+
+    def record_page(self, url: str, sha: str, etag: str = "", last_modified: str = "") -> None:
+        entry = {"event": "page", "url": url, "sha": sha, "etag": etag, "last_modified": last_modified}
+        self._append(entry)
+        self.pages[url] = entry
+        self.run_pages.add(url)
+
+    def record_failure(self, url: str, error: str) -> None:
+        self._append({"event": "fail", "url": url, "error": error})
+
+    def record_listing(self, urls: List[str]) -> None:
+        self._append({"event": "listing", "urls": urls})
+        self.listing = list(urls)
+
+    def finish(self) -> None:
+        self._append({"event": "done"})
+
+    def validators(self) -> Dict[str, Dict[str, str]]:
+        """ETag / Last-Modified of every cached URL, for conditional re-fetches."""
+        return {
+            url: {"etag": e.get("etag", ""), "last_modified": e.get("last_modified", "")}
+            for url, e in self.pages.items()
+            if e.get("etag") or e.get("last_modified")
+        }
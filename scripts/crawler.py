@@ -0,0 +1,207 @@
+# scripts/crawler.py
+"""
+Asyncio HTTP fetcher used by the catalog scrapers.
+
+- One pooled httpx.AsyncClient (keep-alive connections are reused across
+  requests) with at most `concurrency` requests in flight.
+- Per-host rate limit: requests to the same host are spaced at least
+  1 / `rate_per_host` seconds apart, however many workers are waiting.
+- Retries transport errors, 429 and 5xx with exponential backoff and full
+  jitter, honouring Retry-After when the server sends it.
+- Conditional GETs: the ETag / Last-Modified of every 200 response are kept in
+  `validators` (callers persist the dict between runs) and sent back as
+  If-None-Match / If-Modified-Since, so an unchanged page costs a 304 with no
+  body.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: Optional[int]  # None when no response was received
+    text: Optional[str] = None  # body of a 200; None for 304s and failures
+    error: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class HostRateLimiter:
+    """Spaces requests to each host at least `1 / rate` seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserve the next slot before sleeping, so concurrent callers queue up
+        slot = max(now, self._next.get(host, 0.0))
+        self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Crawler:
+    def __init__(
+        self,
+        concurrency: int = 8,
+        rate_per_host: float = 2.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 20.0,
+        validators: Optional[Dict[str, Dict[str, str]]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.validators = validators if validators is not None else {}
+        self._limiter = HostRateLimiter(rate_per_host)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport,
+        )
+
+        self.requests = 0
+        self.not_modified = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def __aenter__(self) -> "Crawler":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        saved = self.validators.get(url) or {}
+        headers = {}
+        if saved.get("etag"):
+            headers["If-None-Match"] = saved["etag"]
+        if saved.get("last_modified"):
+            headers["If-Modified-Since"] = saved["last_modified"]
+        return headers
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def fetch(self, url: str, conditional: bool = True) -> FetchResult:
+        """
+        GET `url`. Returns a 200 with its text, a 304 (when `conditional` and the
+        page is unchanged since its saved validators), or the final error
+        after retries. Never raises for HTTP or network errors.
+        """
+        host = urlsplit(url).netloc
+        headers = self._conditional_headers(url) if conditional else {}
+        result = FetchResult(url=url, status=None)
+
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            delay = None
+            # Hold a concurrency slot only while on the wire, not while backing off
+            async with self._semaphore:
+                await self._limiter.wait(host)
+                self.requests += 1
+                try:
+                    resp = await self._client.get(url, headers=headers)
+                except httpx.TransportError as e:
+                    resp = None
+                    result.status, result.error = None, f"{type(e).__name__}: {e}"
+
+            if resp is not None:
+                result.status = resp.status_code
+                if resp.status_code == 304:
+                    self.not_modified += 1
+                    return result
+                if resp.status_code == 200:
+                    result.text, result.error = resp.text, None
+                    self._remember(url, resp)
+                    return result
+                result.error = f"HTTP {resp.status_code}"
+                if resp.status_code not in RETRY_STATUSES:
+                    break
+                delay = _retry_after(resp)
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+
+        self.failures += 1
+        return result
+
+    def _remember(self, url: str, resp: httpx.Response) -> None:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.validators[url] = {"etag": etag or "", "last_modified": last_modified or ""}
+        else:
+            self.validators.pop(url, None)
+
+    async def fetch_all(self, urls: Iterable[str], conditional: bool = True) -> List[FetchResult]:
+        """Fetch every URL concurrently (bounded by `concurrency`); results keep input order."""
+        return await asyncio.gather(*(self.fetch(u, conditional) for u in urls))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
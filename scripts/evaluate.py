@@ -1,40 +1,123 @@
+# scripts/evaluate.py
+"""
+Evaluate the recommender on the labelled Train-Set queries.
+
+    python scripts/evaluate.py                                  # current RETRIEVAL_MODE
+    python scripts/evaluate.py --modes tfidf embeddings hybrid  # compare configurations
+    python scripts/evaluate.py --workers 4 --out reports/eval.json
+    python scripts/evaluate.py --compare reports/old.json reports/new.json --max-quality-drop 0.01
+
+With several modes, each one after the first is diffed against the first.
+--max-quality-drop / --max-latency-increase turn regressions into a non-zero
+exit status.
+"""
+import argparse
+import json
 import os
 import sys
+import time
+from typing import Dict, List
+
+from evaluation import (
+    DEFAULT_KS,
+    TRAIN_XLSX,
+    EvalConfig,
+    diff_reports,
+    evaluate,
+    find_regressions,
+    load_labelled_queries,
+)
 
-# ✨ Force Python to see the project root so "app" becomes importable
-ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.append(ROOT_DIR)
 
-import pandas as pd
-from app.recommender import AssessmentRecommender
+def print_report(report: Dict) -> None:
+    cfg = report["config"]
+    print(f"\n== {cfg['name']} ({report['n_queries']} queries, {report['scoring']})")
+    for k in report["ks"]:
+        m = report["metrics"]
+        print(f"  @{k:<3} recall {m[f'recall@{k}']:.3f}   map {m[f'map@{k}']:.3f}   ndcg {m[f'ndcg@{k}']:.3f}")
+    print(f"  MRR {report['metrics']['mrr']:.3f}")
+    lat = report["latency"]
+    if lat:
+        print(
+            f"  latency p50 {lat['p50_ms']:.2f}ms  p95 {lat['p95_ms']:.2f}ms  p99 {lat['p99_ms']:.2f}ms  "
+            f"({report['queries_per_second']:.1f} q/s, index ready in {report['build_seconds']:.2f}s)"
+        )
 
-TRAIN_XLSX = "data/Gen_AI Dataset.xlsx"
 
+def print_diff(diff: Dict) -> None:
+    print(f"\n== {diff['other']} vs {diff['base']}")
+    for name, d in diff["metrics"].items():
+        if d["delta"]:
+            print(f"  {name:<10} {d['base']:.3f} -> {d['other']:.3f} ({d['delta']:+.3f})")
+    for name, d in diff["latency"].items():
+        print(f"  {name:<10} {d['base']:.2f} -> {d['other']:.2f} ({d['change']:+.1%})")
+    print(f"  {len(diff['changed_queries'])} queries changed MRR")
 
-def load_train_queries():
-    xls = pd.ExcelFile(TRAIN_XLSX)
-    df = pd.read_excel(xls, "Train-Set")
 
-    grouped = df.groupby("Query")["Assessment_url"].apply(list).to_dict()
-    return grouped
+def compare_files(base_path: str, other_path: str) -> List[Dict]:
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)["configs"]
+    with open(other_path, encoding="utf-8") as f:
+        other = json.load(f)["configs"]
+    shared = [name for name in other if name in base]
+    if shared:
+        return [diff_reports(base[name], other[name]) for name in shared]
+    if len(base) == 1 and len(other) == 1:
+        return [diff_reports(next(iter(base.values())), next(iter(other.values())))]
+    sys.exit(f"No configuration in common between {base_path} and {other_path}")
 
 
 def main():
-    train_queries = load_train_queries()
-    rec = AssessmentRecommender()
+    parser = argparse.ArgumentParser(description="Evaluate ranking quality and latency.")
+    parser.add_argument("--dataset", default=TRAIN_XLSX)
+    parser.add_argument("--sheet", default="Train-Set")
+    parser.add_argument("--modes", nargs="+", default=[None], help="retrieval modes to evaluate")
+    parser.add_argument("--k", nargs="+", type=int, default=list(DEFAULT_KS))
+    parser.add_argument("--workers", type=int, default=0, help="score with a process pool of this size")
+    parser.add_argument("--latency-repeat", type=int, default=3, help="timed passes in batch scoring")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "OTHER"), help="diff two saved reports")
+    parser.add_argument("--max-quality-drop", type=float, help="fail if any metric drops by more than this")
+    parser.add_argument("--max-latency-increase", type=float, help="fail if p95 grows by more than this fraction")
+    args = parser.parse_args()
 
-    recalls = []
-    for query, relevant_urls in train_queries.items():
-        recs = rec.recommend(query, k=10)
-        pred_urls = [r["url"] for r in recs]
+    if args.compare:
+        diffs = compare_files(*args.compare)
+    else:
+        labelled = load_labelled_queries(args.dataset, args.sheet)
+        reports = {}
+        for mode in args.modes:
+            config = EvalConfig(name=mode or "default", retrieval_mode=mode)
+            reports[config.name] = evaluate(config, labelled, args.k, args.workers, args.latency_repeat)
+            print_report(reports[config.name])
 
-        relevant = set(relevant_urls)
-        hits = len(set(pred_urls) & relevant)
-        recall = hits / len(relevant) if len(relevant) > 0 else 0
-        recalls.append(recall)
+        names = list(reports)
+        diffs = [diff_reports(reports[names[0]], reports[name]) for name in names[1:]]
+        if args.out:
+            os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "dataset": args.dataset,
+                        "sheet": args.sheet,
+                        "configs": reports,
+                        "diffs": diffs,
+                    },
+                    f,
+                    indent=2,
+                )
+            print(f"\n[REPORT] Saved to {args.out}")
 
-    mean = sum(recalls) / len(recalls)
-    print(f"Mean Recall@10 on Train-Set: {mean:.3f}")
+    regressions = []
+    for diff in diffs:
+        print_diff(diff)
+        regressions += find_regressions(diff, args.max_quality_drop, args.max_latency_increase)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,278 @@
+# scripts/evaluation.py
+"""
+Ranking-quality and latency evaluation of AssessmentRecommender configurations.
+
+A configuration (retrieval mode + catalog + index dir) is scored on the
+labelled queries either through `recommend_many` (the batch path) or with a
+process pool whose workers each load the index and call `recommend` per query.
+The report holds Recall@k, MAP@k, nDCG@k and MRR averaged over queries, the
+per-query latency distribution, and per-query details. Two reports (or two
+configurations evaluated together) can be diffed to spot regressions.
+
+URLs are compared by their catalog slug: the labelled data uses
+/solutions/products/... URLs while the crawled catalog uses /products/....
+"""
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from app.config import CATALOG_PATH, INDEX_DIR  # noqa: E402
+from app.recommender import AssessmentRecommender  # noqa: E402
+
+TRAIN_XLSX = "data/Gen_AI Dataset.xlsx"
+DEFAULT_KS = (1, 3, 5, 10)
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass(frozen=True)
+class EvalConfig:
+    name: str
+    retrieval_mode: Optional[str] = None  # None: RETRIEVAL_MODE from app.config
+    catalog_path: str = CATALOG_PATH
+    index_dir: Optional[str] = INDEX_DIR
+
+    def build(self, max_k: int) -> AssessmentRecommender:
+        return AssessmentRecommender(
+            catalog_path=self.catalog_path,
+            max_k=max_k,
+            index_dir=self.index_dir,
+            retrieval_mode=self.retrieval_mode,
+        )
+
+
+def normalize_url(url: str) -> str:
+    """Catalog slug of a product URL (the part after /view/), lowercased."""
+    url = str(url).strip().rstrip("/").lower()
+    return url.split("/view/", 1)[-1] if "/view/" in url else url.rsplit("/", 1)[-1]
+
+
+def load_labelled_queries(xlsx_path: str = TRAIN_XLSX, sheet: str = "Train-Set") -> Dict[str, List[str]]:
+    """Query -> relevant assessment URLs, in sheet order."""
+    df = pd.read_excel(xlsx_path, sheet_name=sheet)
+    df = df[df["Query"].notna() & df["Assessment_url"].notna()]
+    return df.groupby("Query", sort=False)["Assessment_url"].apply(list).to_dict()
+
+
+# ---------------------------------------------------------------------------
+# Metrics (binary relevance; `predicted` is a ranked list of normalized URLs)
+# ---------------------------------------------------------------------------
+
+
+def recall_at_k(predicted: Sequence[str], relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(predicted[:k]) & relevant) / len(relevant)
+
+
+def average_precision_at_k(predicted: Sequence[str], relevant: set, k: int) -> float:
+    if not relevant:
+        return 0.0
+    hits, total = 0, 0.0
+    for rank, url in enumerate(predicted[:k], start=1):
+        if url in relevant:
+            hits += 1
+            total += hits / rank
+    return total / min(k, len(relevant))
+
+
+def ndcg_at_k(predicted: Sequence[str], relevant: set, k: int) -> float:
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, url in enumerate(predicted[:k], start=1) if url in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(k, len(relevant)) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def reciprocal_rank(predicted: Sequence[str], relevant: set) -> float:
+    for rank, url in enumerate(predicted, start=1):
+        if url in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def query_metrics(predicted: Sequence[str], relevant: Iterable[str], ks: Sequence[int]) -> Dict[str, float]:
+    relevant = set(relevant)
+    out = {}
+    for k in ks:
+        out[f"recall@{k}"] = recall_at_k(predicted, relevant, k)
+        out[f"map@{k}"] = average_precision_at_k(predicted, relevant, k)
+        out[f"ndcg@{k}"] = ndcg_at_k(predicted, relevant, k)
+    out["mrr"] = reciprocal_rank(predicted, relevant)
+    return out
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds, dtype=float) * 1000.0
+    if not ms.size:
+        return {}
+    out = {f"p{p}_ms": float(np.percentile(ms, p)) for p in LATENCY_PERCENTILES}
+    out.update(mean_ms=float(ms.mean()), max_ms=float(ms.max()), samples=int(ms.size))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+
+def _urls(recs: List[Dict]) -> List[str]:
+    return [normalize_url(r["url"]) for r in recs]
+
+
+def _score_batch(
+    rec: AssessmentRecommender, queries: List[str], k: int, latency_repeat: int
+) -> Tuple[List[List[str]], List[List[float]], float]:
+    start = time.perf_counter()
+    predicted = [_urls(recs) for recs in rec.recommend_many(queries, k=k)]
+    batch_seconds = time.perf_counter() - start
+
+    # Per-query latency is what a single /recommend call sees
+    latencies: List[List[float]] = [[] for _ in queries]
+    for _ in range(latency_repeat):
+        for i, query in enumerate(queries):
+            t = time.perf_counter()
+            rec.recommend(query, k=k)
+            latencies[i].append(time.perf_counter() - t)
+    return predicted, latencies, batch_seconds
+
+
+_worker_rec: Optional[AssessmentRecommender] = None
+_worker_k = 10
+
+
+def _init_worker(config: EvalConfig, k: int) -> None:
+    global _worker_rec, _worker_k
+    # Artifacts are memory-mapped from index_dir, so each worker attaches cheaply
+    _worker_rec, _worker_k = config.build(k), k
+
+
+def _score_in_worker(query: str) -> Tuple[List[str], float]:
+    t = time.perf_counter()
+    recs = _worker_rec.recommend(query, k=_worker_k)
+    return _urls(recs), time.perf_counter() - t
+
+
+def _score_pool(
+    config: EvalConfig, queries: List[str], k: int, workers: int
+) -> Tuple[List[List[str]], List[List[float]], float]:
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(config, k)) as pool:
+        # Spin every worker up before timing
+        list(pool.map(_score_in_worker, queries[:1] * workers))
+        start = time.perf_counter()
+        results = list(pool.map(_score_in_worker, queries, chunksize=max(1, len(queries) // (workers * 4))))
+        batch_seconds = time.perf_counter() - start
+    return [urls for urls, _ in results], [[seconds] for _, seconds in results], batch_seconds
+
+
+def evaluate(
+    config: EvalConfig,
+    labelled: Dict[str, List[str]],
+    ks: Sequence[int] = DEFAULT_KS,
+    workers: int = 0,
+    latency_repeat: int = 3,
+) -> Dict:
+    """Report for one configuration. `workers` > 0 scores with a process pool instead of the batch path."""
+    ks = sorted(set(ks))
+    max_k = ks[-1]
+    queries = list(labelled)
+
+    start = time.perf_counter()
+    if workers > 0:
+        # The parent builds (and persists) the index once so workers only load it
+        config.build(max_k).close()
+        build_seconds = time.perf_counter() - start
+        predicted, latencies, batch_seconds = _score_pool(config, queries, max_k, workers)
+    else:
+        rec = config.build(max_k)
+        build_seconds = time.perf_counter() - start
+        try:
+            predicted, latencies, batch_seconds = _score_batch(rec, queries, max_k, latency_repeat)
+        finally:
+            rec.close()
+
+    per_query = []
+    for query, urls, seconds in zip(queries, predicted, latencies):
+        relevant = [normalize_url(u) for u in labelled[query]]
+        per_query.append(
+            {
+                "query": query,
+                "relevant": relevant,
+                "predicted": urls,
+                "metrics": query_metrics(urls, relevant, ks),
+                "latency_ms": float(np.median(seconds) * 1000.0),
+            }
+        )
+
+    names = per_query[0]["metrics"].keys() if per_query else []
+    metrics = {name: float(np.mean([q["metrics"][name] for q in per_query])) for name in names}
+    return {
+        "config": asdict(config),
+        "ks": ks,
+        "n_queries": len(queries),
+        "scoring": f"process pool ({workers} workers)" if workers > 0 else "batch",
+        "metrics": metrics,
+        "latency": latency_summary([s for seconds in latencies for s in seconds]),
+        "build_seconds": build_seconds,
+        "queries_per_second": len(queries) / batch_seconds if batch_seconds else None,
+        "queries": per_query,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+# ---------------------------------------------------------------------------
+
+
+def diff_reports(base: Dict, other: Dict) -> Dict:
+    """Metric deltas (other - base) and relative latency change of `other` against `base`."""
+    metrics = {
+        name: {"base": base["metrics"][name], "other": value, "delta": value - base["metrics"][name]}
+        for name, value in other["metrics"].items()
+        if name in base["metrics"]
+    }
+    latency = {}
+    for name, value in other["latency"].items():
+        if name.endswith("_ms") and base["latency"].get(name):
+            latency[name] = {
+                "base": base["latency"][name],
+                "other": value,
+                "change": value / base["latency"][name] - 1.0,
+            }
+
+    changed = []
+    for b, o in zip(base["queries"], other["queries"]):
+        if b["query"] == o["query"] and b["metrics"]["mrr"] != o["metrics"]["mrr"]:
+            changed.append({"query": b["query"], "mrr_base": b["metrics"]["mrr"], "mrr_other": o["metrics"]["mrr"]})
+    return {
+        "base": base["config"]["name"],
+        "other": other["config"]["name"],
+        "metrics": metrics,
+        "latency": latency,
+        "changed_queries": changed,
+    }
+
+
+def find_regressions(
+    diff: Dict, max_quality_drop: Optional[float] = None, max_latency_increase: Optional[float] = None
+) -> List[str]:
+    """Human-readable regressions beyond the given thresholds (absolute metric drop, relative p95 increase)."""
+    problems = []
+    if max_quality_drop is not None:
+        for name, d in diff["metrics"].items():
+            if d["delta"] < -max_quality_drop:
+                problems.append(f"{diff['other']}: {name} {d['base']:.3f} -> {d['other']:.3f}")
+    p95 = diff["latency"].get("p95_ms")
+    if max_latency_increase is not None and p95 and p95["change"] > max_latency_increase:
+        problems.append(f"{diff['other']}: p95 {p95['base']:.1f}ms -> {p95['other']:.1f}ms")
+    return problems
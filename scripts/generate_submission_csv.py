@@ -51,20 +51,17 @@ def load_test_queries(xlsx_path: str):
     return df["Query"].tolist()
 
 
-def ensure_top_k_urls(recommender: AssessmentRecommender, query: str, k: int) -> list[str]:
+def fill_top_k_urls(recs: list[dict], fallback_recs: list[dict], k: int) -> list[str]:
     """
-    Ask the recommender for k URLs, and if it returns fewer,
+    Take the k URLs recommended for a query, and if there are fewer,
     fill the gap with generic fallback recommendations so we
     always end up with exactly k URLs (or fewer if catalog is tiny).
     """
-    recs = recommender.recommend(query, k=k)
     urls = [r["url"] for r in recs if r.get("url")]
 
     if len(urls) >= k:
         return urls[:k]
 
-    # Fallback: use a generic query to get more URLs
-    fallback_recs = recommender.recommend("general assessment for hiring", k=k)
     for r in fallback_recs:
         url = r.get("url")
         if not url:
@@ -81,13 +78,19 @@ def main():
     recommender = AssessmentRecommender()
     queries = load_test_queries(DATASET_XLSX)
 
+    # Score every test query (plus the generic fallback) in one batch pass
+    batch = recommender.recommend_many(
+        queries + ["general assessment for hiring"], k=MAX_URLS_PER_QUERY
+    )
+    fallback_recs = batch.pop()
+
     total_rows = 0
     with open(OUT_PATH, "w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Query", "Assessment_url"])
 
-        for q in queries:
-            urls = ensure_top_k_urls(recommender, q, MAX_URLS_PER_QUERY)
+        for q, recs in zip(queries, batch):
+            urls = fill_top_k_urls(recs, fallback_recs, MAX_URLS_PER_QUERY)
 
             if not urls:
                 
@@ -0,0 +1,109 @@
+# scripts/product_page.py
+"""
+Parsing of SHL product detail pages into catalog rows.
+
+Shared by the crawler (scrape_catalog.py) and the catalog build pipeline
+(build_catalog.py), which parse cached pages in worker processes.
+"""
+import re
+from typing import Dict
+
+from bs4 import BeautifulSoup
+
+from crawl_cache import read_page
+
+# Letter keys shown next to "Test Type:" on catalog pages
+TEST_TYPE_KEYS = {
+    "A": "Ability & Aptitude",
+    "B": "Biodata & Situational Judgement",
+    "C": "Competencies",
+    "D": "Development & 360",
+    "E": "Assessment Exercises",
+    "K": "Knowledge & Skills",
+    "P": "Personality & Behavior",
+    "S": "Simulations",
+}
+
+
+def slug_to_name(url: str) -> str:
+    """Convert last URL segment into a readable name."""
+    slug = url.rstrip("/").split("/")[-1]
+    slug = slug.replace("-", " ")
+    return " ".join(word.capitalize() for word in slug.split())
+
+
+def _sections(soup: BeautifulSoup) -> Dict[str, str]:
+    """Heading text (lowercased) -> text of the elements following it, up to the next heading."""
+    headings = ["h2", "h3", "h4", "h5"]
+    out = {}
+    for h in soup.find_all(headings):
+        parts = []
+        for sib in h.find_next_siblings():
+            if sib.name in headings:
+                break
+            parts.append(sib.get_text(" ", strip=True))
+        out.setdefault(h.get_text(" ", strip=True).lower().rstrip(":"), " ".join(p for p in parts if p))
+    return out
+
+
+def _yes_no_flag(soup: BeautifulSoup, label: str) -> str:
+    """"Yes"/"No" from the ●-style indicator next to `label`, or "Unknown" if the label is absent."""
+    node = soup.find(string=re.compile(label, re.I))
+    if node is None:
+        return "Unknown"
+    holder = node.parent
+    circle = holder.find(class_=re.compile("circle")) or holder.find_next_sibling(class_=re.compile("circle"))
+    if circle is None:
+        return "Unknown"
+    return "Yes" if any(c in ("-yes", "yes") for c in circle.get("class", [])) else "No"
+
+
+def parse_duration(text: str) -> int:
+    m = re.search(r"minutes\s*=\s*(\d+)", text, re.I) or re.search(r"(\d+)\s*(?:minutes|mins?)\b", text, re.I)
+    return int(m.group(1)) if m else 0
+
+
+def parse_detail_page(html: str, url: str) -> Dict:
+    """Catalog row fields from a product detail page."""
+    soup = BeautifulSoup(html, "html.parser")
+    sections = _sections(soup)
+
+    h1 = soup.find("h1")
+    name = h1.get_text(" ", strip=True) if h1 else ""
+
+    duration = parse_duration(sections.get("assessment length", ""))
+    if not duration:
+        duration = parse_duration(soup.get_text(" ", strip=True))
+
+    keys = [el.get_text(strip=True) for el in soup.find_all(class_=re.compile("catalogue__key"))]
+    if not keys:
+        m = re.search(r"Test Type:\s*((?:[A-Z]\s+)*[A-Z])\b", soup.get_text(" ", strip=True))
+        keys = m.group(1).split() if m else []
+    test_types = list(dict.fromkeys(TEST_TYPE_KEYS[k] for k in keys if k in TEST_TYPE_KEYS))
+
+    return {
+        "url": url,
+        "name": name or slug_to_name(url),
+        "description": sections.get("description", ""),
+        "duration": duration,
+        "test_type": ";".join(test_types),
+        "remote_support": _yes_no_flag(soup, r"Remote Testing"),
+        "adaptive_support": _yes_no_flag(soup, r"Adaptive"),
+    }
+
+
+def minimal_row(url: str) -> Dict:
+    """Row for a product whose detail page is unavailable."""
+    return {
+        "url": url,
+        "name": slug_to_name(url),
+        "description": "",
+        "duration": 0,
+        "test_type": "",
+        "remote_support": "Unknown",
+        "adaptive_support": "Unknown",
+    }
+
+
+def parse_cached_detail(path: str, url: str) -> Dict:
+    return parse_detail_page(read_page(path), url)
@@ -1,44 +1,52 @@
-import time
-import csv
-import re
+# scripts/scrape_catalog.py
+"""
+Crawl the SHL product catalog into data/catalog.csv.
+
+Listing pages are fetched concurrently, a wave at a time, until a wave adds no
+new products. Then every product detail page is fetched, and the catalog is
+written by the build pipeline (build_catalog.py) from the same sources as a
+plain rebuild: the crawled URL list plus the products of the labelled
+Train-Set (--train). It parses the cached detail pages for the description,
+duration, test types, remote testing and adaptive support, reusing the rows
+of pages that did not change.
+
+Every fetched page is kept, compressed, in data/crawl_cache/ and logged in its
+journal (see crawl_cache.py):
+- re-crawls send each page's ETag / Last-Modified; unchanged pages answer 304
+  and are reparsed from the cache;
+- an interrupted or partly failed run resumes where it stopped on the next
+  invocation (--fresh starts over);
+- --offline rebuilds the catalog from the cache alone, e.g. after a parser
+  change.
+Pages are parsed in a process pool straight from the cache.
+
+    python scripts/scrape_catalog.py
+    python scripts/scrape_catalog.py --concurrency 16 --rate 4
+    python scripts/scrape_catalog.py --offline      # reparse cached pages only
+    python scripts/scrape_catalog.py --no-details   # URL list + names only
+"""
+import argparse
+import asyncio
 import os
-import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 from urllib.parse import urljoin
 
-import requests
 from bs4 import BeautifulSoup
 
+from build_catalog import MANIFEST_PATH, TRAIN_XLSX, build, cached_pages, read_sources
+from crawl_cache import CrawlJournal, PageCache, read_page
+from crawler import Crawler
+
 BASE_SEARCH_URL = "https://www.shl.com/solutions/products/product-catalog/"
 PRODUCT_BASE = "https://www.shl.com"
+PAGE_SIZE = 12
 
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/122.0.0.0 Safari/537.36"
-    ),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-US,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate, br",
-    "Connection": "keep-alive",
-    "Upgrade-Insecure-Requests": "1",
-}
-
-
-def fetch(url: str) -> str:
-    """Fetch a URL with basic retry + realistic headers."""
-    for attempt in range(1, 6):
-        try:
-            print(f"Fetching {url} (attempt {attempt})")
-            resp = requests.get(url, headers=HEADERS, timeout=20)
-            resp.raise_for_status()
-            return resp.text
-        except Exception as e:
-            print(f"Fetch failed: {e}")
-            time.sleep(1 + random.random())
-    print(f"FAILED after retries: {url}")
-    return ""
+def listing_url(page: int, base_url: str = BASE_SEARCH_URL) -> str:
+    if page == 1:
+        return base_url
+    return f"{base_url}?start={(page - 1) * PAGE_SIZE}&type=1"
 
 
 def debug_dump_html(html: str, filename: str = "debug_catalog_page1.html"):
@@ -50,7 +58,7 @@ def debug_dump_html(html: str, filename: str = "debug_catalog_page1.html"):
     print("Open this file in your browser and inspect how product links are structured.")
 
 
-def parse_search_page(html: str, is_first_page: bool = False):
+def parse_search_page(html: str, is_first_page: bool = False, base: str = PRODUCT_BASE) -> List[str]:
     """
     Parse one catalog page and extract product detail URLs.
     """
@@ -59,19 +67,13 @@ def parse_search_page(html: str, is_first_page: bool = False):
     # DEBUG: show first 50 hrefs the first time so you can see patterns
     if is_first_page:
         print("DEBUG: first 50 hrefs on the page:")
-        hrefs = []
-        for a in soup.find_all("a", href=True):
-            hrefs.append(a["href"])
-            if len(hrefs) >= 50:
-                break
-        for h in hrefs:
-            print("  ", h)
+        for a in soup.find_all("a", href=True)[:50]:
+            print("  ", a["href"])
         print("DEBUG: end of href preview")
 
     links = []
     for a in soup.find_all("a", href=True):
-        href = a["href"]
-        full = urljoin(PRODUCT_BASE, href)
+        full = urljoin(base, a["href"])
 
         # Detail pages look like /products/product-catalog/view/<slug>/ or /solutions/...
         if "/product-catalog/view/" not in full:
@@ -83,94 +85,190 @@ def parse_search_page(html: str, is_first_page: bool = False):
 
         links.append(full)
 
-    links = sorted(set(links))
-    print(f"  Parsed {len(links)} catalog detail links on this page.")
-    return links
-
-
-def slug_to_name(url: str) -> str:
-    """Convert last URL segment into a readable name."""
-    slug = url.rstrip("/").split("/")[-1]
-    slug = slug.replace("-", " ")
-    return " ".join(word.capitalize() for word in slug.split())
-
-
-def save_catalog_from_urls(urls, out_path="data/catalog.csv"):
-    os.makedirs("data", exist_ok=True)
-    rows = []
-    for u in sorted(urls):
-        rows.append(
-            {
-                "url": u,
-                "name": slug_to_name(u),
-                "description": "",
-                "duration": 0,
-                "test_type": "",
-                "remote_support": "Unknown",
-                "adaptive_support": "Unknown",
-            }
-        )
+    return sorted(set(links))
 
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "url",
-                "name",
-                "description",
-                "duration",
-                "test_type",
-                "remote_support",
-                "adaptive_support",
-            ],
-        )
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"[CATALOG] Saved {len(rows)} rows to {out_path}")
 
+class CrawlError(RuntimeError):
+    pass
 
-def main():
+
+def parse_cached_listing(path: str, is_first_page: bool, base: str) -> List[str]:
+    return parse_search_page(read_page(path), is_first_page, base)
+
+
+class CachedFetcher:
+    """
+    Fetches through the page cache. Every body that arrives is stored in the
+    cache and journaled before it is parsed; URLs already fetched by a resumed
+    run, and all URLs in offline mode, come from the cache without a request.
+    """
+
+    def __init__(self, crawler: Optional[Crawler], cache: PageCache, journal: CrawlJournal, concurrency: int):
+        self.crawler = crawler
+        self.cache = cache
+        self.journal = journal
+        self.concurrency = concurrency
+        self.failed: List[str] = []
+        self.from_cache = 0
+
+    @property
+    def offline(self) -> bool:
+        return self.crawler is None
+
+    async def get(self, url: str) -> Tuple[Optional[str], bool]:
+        """
+        (path of the cached body, fresh). `fresh` is False when the fetch failed;
+        the path then points at an older cached copy, or is None if there is none.
+        """
+        entry = self.journal.pages.get(url)
+        cached = self.cache.path(entry["sha"]) if entry and self.cache.has(entry["sha"]) else None
+        if self.offline:
+            return cached, cached is not None
+        if cached and url in self.journal.run_pages:
+            self.from_cache += 1
+            return cached, True
+
+        res = await self.crawler.fetch(url, conditional=cached is not None)
+        if res.ok:
+            sha = self.cache.put(res.text.encode("utf-8"))
+            saved = self.crawler.validators.get(url, {})
+            self.journal.record_page(url, sha, saved.get("etag", ""), saved.get("last_modified", ""))
+            return self.cache.path(sha), True
+        if res.not_modified and cached:
+            self.journal.record_page(url, entry["sha"], entry.get("etag", ""), entry.get("last_modified", ""))
+            return cached, True
+
+        error = res.error or f"HTTP {res.status}"
+        print(f"  FAILED {url}: {error} after {res.attempts} attempt(s)")
+        self.journal.record_failure(url, error)
+        self.failed.append(url)
+        return cached, False
+
+
+async def collect_product_urls(
+    fetcher: CachedFetcher,
+    pool: ProcessPoolExecutor,
+    max_pages: int,
+    debug: bool,
+    base_url: str = BASE_SEARCH_URL,
+) -> List[str]:
+    loop = asyncio.get_running_loop()
     all_urls = set()
+    pages = [listing_url(p, base_url) for p in range(1, max_pages + 1)]
+
+    for start in range(0, len(pages), fetcher.concurrency):
+        wave = pages[start : start + fetcher.concurrency]
+        fetched = await asyncio.gather(*(fetcher.get(u) for u in wave))
+
+        for i, (page_url, (path, fresh)) in enumerate(zip(wave, fetched)):
+            first = start + i == 0
+            if path is None and fetcher.offline:
+                print(f"Stopping pagination at {page_url} (not in cache)")
+                return sorted(all_urls)
+            if not fresh:
+                # A failed page is not the end of the catalog; stop the run so it can resume
+                raise CrawlError(f"listing page {page_url} could not be fetched; rerun to resume")
+            if first and debug:
+                debug_dump_html(read_page(path))
+            urls = await loop.run_in_executor(pool, parse_cached_listing, path, first and debug, base_url)
+            if not urls:
+                print(f"Stopping pagination at {page_url} (no product links)")
+                return sorted(all_urls)
+
+            new_urls = set(urls) - all_urls
+            print(f"  {page_url}: {len(urls)} urls, {len(new_urls)} new")
+            if not new_urls:
+                print("No new URLs found on this page. Stopping pagination.")
+                return sorted(all_urls)
+            all_urls.update(new_urls)
+
+    return sorted(all_urls)
+
+
+async def fetch_details(fetcher: CachedFetcher, urls: List[str]) -> None:
+    """Bring every detail page into the cache; build_catalog.py parses them from there."""
+    await asyncio.gather(*(fetcher.get(u) for u in urls))
+
+
+async def crawl(args) -> int:
+    cache = PageCache(args.cache_dir)
+    journal = CrawlJournal(os.path.join(args.cache_dir, "journal.jsonl"))
+    crawler = None
+    if not args.offline:
+        journal.start(fresh=args.fresh)
+        if journal.resumed:
+            print(f"Resuming crawl {journal.run} ({len(journal.run_pages)} pages already fetched)")
+        crawler = Crawler(
+            concurrency=args.concurrency,
+            rate_per_host=args.rate,
+            max_retries=args.retries,
+            validators=journal.validators(),
+        )
+    fetcher = CachedFetcher(crawler, cache, journal, args.concurrency)
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # 1) COLLECT PRODUCT URLS (a resumed run that finished pagination reuses its list)
+            urls = journal.listing if not args.offline else None
+            if urls is None:
+                urls = await collect_product_urls(fetcher, pool, args.max_pages, args.debug, args.base_url)
+                if not args.offline:
+                    journal.record_listing(urls)
+            print(f"Collected {len(urls)} product URLs")
+
+            # 2) Save URL list for future reuse / rebuilding
+            os.makedirs(os.path.dirname(args.url_list) or ".", exist_ok=True)
+            with open(args.url_list, "w", encoding="utf-8") as f:
+                for u in urls:
+                    f.write(u + "\n")
+            print(f"[URL LIST] Saved {len(urls)} URLs to {args.url_list}")
+
+            # 3) Detail pages fill description / duration / test_type / flags
+            pages = {}
+            if args.details:
+                await fetch_details(fetcher, urls)
+                pages = cached_pages(journal, cache)
+            stats = build(read_sources(args.url_list, args.train), pages, args.out, args.manifest, pool=pool)
+            print(f"[CATALOG] Saved {stats['rows']} rows ({stats['parsed']} parsed) to {args.out}")
+    finally:
+        if crawler is not None:
+            print(f"Crawler stats: {crawler.stats()}, from cache: {fetcher.from_cache}")
+            await crawler.close()
+
+    if fetcher.failed:
+        # The run stays open in the journal; the next invocation refetches only these
+        print(f"{len(fetcher.failed)} page(s) failed (older cached copies used where available); rerun to retry them")
+        journal.close()
+        return 1
+    if not args.offline:
+        journal.finish()
+    journal.close()
+    return 0
+
 
-    # 1) COLLECT PRODUCT URLS
-    for page in range(1, 30):
-        if page == 1:
-            page_url = BASE_SEARCH_URL
-        else:
-            offset = (page - 1) * 12
-            page_url = f"{BASE_SEARCH_URL}?start={offset}&type=1"
-
-        html = fetch(page_url)
-        if not html:
-            print(f"Stopping pagination due to empty HTML at {page_url}")
-            break
-
-        if page == 1:
-            debug_dump_html(html)
-
-        urls = parse_search_page(html, is_first_page=(page == 1))
-        new_urls = [u for u in urls if u not in all_urls]
-        print(f"  Found {len(urls)} urls on page, {len(new_urls)} new")
-
-        if not new_urls:
-            print("No new URLs found on this page. Stopping pagination.")
-            break
-
-        all_urls.update(new_urls)
-        time.sleep(1.0)
-
-    print(f"Collected {len(all_urls)} product URLs")
-
-    # 2) Save URL list for future reuse / rebuilding
-    os.makedirs("data", exist_ok=True)
-    url_list_path = "data/url_list.txt"
-    with open(url_list_path, "w", encoding="utf-8") as f:
-        for u in sorted(all_urls):
-            f.write(u + "\n")
-    print(f"[URL LIST] Saved {len(all_urls)} URLs to {url_list_path}")
-
-    # 3) Build a minimal catalog directly from URLs (no detail-page scraping)
-    save_catalog_from_urls(all_urls, out_path="data/catalog.csv")
+def main():
+    parser = argparse.ArgumentParser(description="Crawl the SHL product catalog.")
+    parser.add_argument("--base-url", default=BASE_SEARCH_URL, help="catalog listing URL")
+    parser.add_argument("--out", default="data/catalog.csv")
+    parser.add_argument("--url-list", default="data/url_list.txt")
+    parser.add_argument("--train", default=TRAIN_XLSX, help="labelled dataset whose products are added ('' to skip)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="incremental build manifest (build_catalog.py)")
+    parser.add_argument("--cache-dir", default="data/crawl_cache")
+    parser.add_argument("--max-pages", type=int, default=29)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="max requests per second per host")
+    parser.add_argument("--retries", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--offline", action="store_true", help="reparse from the cache without any requests")
+    parser.add_argument("--fresh", action="store_true", help="start a new crawl instead of resuming")
+    parser.add_argument("--no-details", dest="details", action="store_false")
+    parser.add_argument("--debug", action="store_true", help="dump page 1 and preview its links")
+    try:
+        code = asyncio.run(crawl(parser.parse_args()))
+    except CrawlError as e:
+        print(f"Crawl interrupted: {e}")
+        code = 1
+    sys.exit(code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+# scripts/serve.py
+"""
+Serve the API from several uvicorn worker processes sharing one index.
+
+The index artifacts for the current catalog are built once, before any worker
+starts (in a short-lived child process, so the supervisor stays small). Every
+worker then memory-maps the same read-only artifacts: the index arrays and
+the row metadata are shared through the OS page cache instead of being copied
+N times. What a worker holds privately is mostly the embedding model (dense
+modes) plus the TF-IDF / BM25 vocabularies.
+
+    python scripts/serve.py                       # SERVE_WORKERS (default: one per CPU)
+    python scripts/serve.py --workers 4 --port 8000
+
+Each worker keeps its own response cache, metrics and live-update state. An
+admin catalog update would only change the worker that handled it, so with
+several workers the admin write endpoints answer 409; update data/catalog.csv
+instead. Every worker hot-swaps to the new catalog, and the first one to notice
+builds the index for the rest. Use --workers 1 for the admin catalog API.
+
+The worker count reaches the app as API_WORKER_PROCESSES. When running
+`uvicorn app.api:app --workers N` directly, export API_WORKER_PROCESSES=N
+too (or use WEB_CONCURRENCY=N instead of --workers), otherwise the workers
+do not know they are several.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import uvicorn
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from app.config import CATALOG_PATH, INDEX_DIR, SERVE_WORKERS  # noqa: E402
+
+
+def _ensure_index(catalog_path: str, index_dir: str):
+    from app.recommender import AssessmentRecommender
+
+    # Loads the artifacts if they exist, otherwise builds and saves them
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir)
+    try:
+        return rec.index_version, len(rec)
+    finally:
+        rec.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS or os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if not INDEX_DIR:
+        sys.exit("INDEX_DIR is None: workers would each build a private index; set it in app/config.py")
+
+    os.chdir(ROOT_DIR)
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        version, items = pool.submit(_ensure_index, CATALOG_PATH, INDEX_DIR).result()
+    print(f"Index {version} ({items} items) ready in {INDEX_DIR}; starting {args.workers} workers")
+
+    # Read by app/api.py in every worker; always the effective count, whatever its source
+    os.environ["API_WORKER_PROCESSES"] = str(args.workers)
+    uvicorn.run("app.api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
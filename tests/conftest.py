@@ -0,0 +1,63 @@
+# tests/conftest.py
+import os
+import sys
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# app.* from the repository root; the scripts import their siblings by module name
+for path in (ROOT_DIR, os.path.join(ROOT_DIR, "scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Rows of data/catalog.csv copied into the small test catalogs
+CATALOG_ROWS = 50
+
+
+def make_record(slug: str, name: str, **fields) -> dict:
+    """An admin API catalog entry (catalog.csv columns) for a product that is not in the catalog."""
+    record = {
+        "url": f"https://www.shl.com/products/product-catalog/view/{slug}/",
+        "name": name,
+        "description": "",
+        "duration": 20,
+        "test_type": ["Knowledge & Skills"],
+        "remote_support": "Yes",
+        "adaptive_support": "No",
+    }
+    record.update(fields)
+    return record
+
+
+@pytest.fixture
+def catalog_path(tmp_path) -> str:
+    """A writable copy of the first CATALOG_ROWS rows of the real catalog."""
+    path = tmp_path / "catalog.csv"
+    pd.read_csv(os.path.join(ROOT_DIR, "data", "catalog.csv")).head(CATALOG_ROWS).to_csv(path, index=False)
+    return str(path)
+
+
+class HashingEmbedder:
+    """SentenceTransformer stand-in: hashed bag-of-words vectors, so dense modes run without the model."""
+
+    def __init__(self, name: str = "", dim: int = 64):
+        self.dim = dim
+
+    def encode(self, texts, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        out = np.full((len(texts), self.dim), 0.01, dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in str(text).lower().split():
+                h = zlib.crc32(word.encode())
+                out[i, h % self.dim] += 1.0 + (h >> 8) % 3
+        return out
+
+
+@pytest.fixture
+def hashing_embedder(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = HashingEmbedder
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
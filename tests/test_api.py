@@ -0,0 +1,118 @@
+# tests/test_api.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api
+from app.executor import BoundedExecutor
+from app.recommender import AssessmentRecommender
+from app.reloader import RecommenderReloader
+
+TOKEN = "test-token"
+ASSESSMENT = {
+    "url": "https://example.com/a",
+    "name": "A",
+    "adaptive_support": "No",
+    "description": "",
+    "duration": 10,
+    "remote_support": "Yes",
+    "test_type": ["Knowledge & Skills"],
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", TOKEN)
+    # Not entered as a context manager: the startup handler (index load) does not run
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def loaded(catalog_path, monkeypatch):
+    """A small TF-IDF recommender (max_k=3) behind api.reloader."""
+    reloader = RecommenderReloader(
+        lambda: AssessmentRecommender(catalog_path=catalog_path, max_k=3, index_dir=None, retrieval_mode="tfidf"),
+        catalog_path=catalog_path,
+        poll_seconds=0,
+        warmup_queries=[],
+    )
+    reloader.load()
+    monkeypatch.setattr(api, "reloader", reloader)
+    yield reloader
+    reloader.close()
+
+
+@pytest.mark.parametrize(
+    "method, path, body",
+    [
+        ("post", "/admin/assessments", {"assessments": [ASSESSMENT]}),
+        ("put", "/admin/assessments", {"assessments": [ASSESSMENT]}),
+        ("post", "/admin/assessments/delete", {"urls": ["https://example.com/a"]}),
+        ("post", "/admin/compact", None),
+    ],
+)
+def test_catalog_writes_are_rejected_with_several_workers(client, monkeypatch, method, path, body):
+    monkeypatch.setattr(api, "WORKER_PROCESSES", 4)
+    response = client.request(method, path, json=body, headers={"X-Admin-Token": TOKEN})
+    assert response.status_code == 409
+    assert "workers" in response.json()["detail"]
+
+
+def test_catalog_reads_stay_available_with_several_workers(client, monkeypatch):
+    monkeypatch.setattr(api, "WORKER_PROCESSES", 4)
+    response = client.get("/admin/index", headers={"X-Admin-Token": TOKEN})
+    assert response.status_code == 200
+
+
+def test_batch_query_limit(client, loaded, monkeypatch):
+    monkeypatch.setattr(api, "MAX_BATCH_QUERIES", 3)
+
+    response = client.post("/recommend/batch", json={"queries": ["sales"] * 3, "k": 2})
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 3
+
+    response = client.post("/recommend/batch", json={"queries": ["sales"] * 4, "k": 2})
+    assert response.status_code == 400
+    assert "at most 3" in response.json()["detail"]
+
+
+def test_batch_k_is_capped_at_max_k(client, loaded):
+    response = client.post("/recommend/batch", json={"queries": ["sales", "accounts payable"], "k": 50})
+    assert response.status_code == 200
+    assert [len(r["recommended_assessments"]) for r in response.json()["results"]] == [3, 3]
+
+    assert client.post("/recommend/batch", json={"queries": ["sales"], "k": 0}).status_code == 400
+
+
+def test_saturated_executor_answers_503_with_retry_after(client, loaded, monkeypatch):
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    monkeypatch.setattr(api, "scoring_executor", executor)
+    release = threading.Event()
+    render = api._render_recommendations
+
+    def blocking_render(*args):
+        release.wait(10)
+        return render(*args)
+
+    monkeypatch.setattr(api, "_render_recommendations", blocking_render)
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            # One job running, one queued: the executor is full
+            busy = [pool.submit(client.post, "/recommend", json={"query": q}) for q in ("sales", "accounts")]
+            deadline = time.monotonic() + 10
+            while executor.pending < executor.capacity and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            response = client.post("/recommend", json={"query": "manager"})
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(api.OVERLOAD_RETRY_AFTER_SECONDS)
+            assert executor.rejected == 1
+
+            release.set()
+            assert [f.result(timeout=10).status_code for f in busy] == [200, 200]
+    finally:
+        release.set()
+        executor.shutdown()
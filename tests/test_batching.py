@@ -0,0 +1,69 @@
+# tests/test_batching.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.batching import MicroBatcher
+
+
+class Abort(BaseException):
+    pass
+
+
+def test_submit_after_close_raises():
+    batcher = MicroBatcher(lambda items: [item * 2 for item in items])
+    assert batcher.submit(21) == 42
+    batcher.close()
+    batcher.close()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
+
+
+def test_exception_reaches_every_caller_in_the_batch():
+    def fail(items):
+        raise ValueError(items)
+
+    batcher = MicroBatcher(fail, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(batcher.submit, i) for i in range(4)]
+            for fut in futures:
+                with pytest.raises(ValueError):
+                    fut.result(timeout=5)
+        # The loop survives ordinary exceptions
+        with pytest.raises(ValueError):
+            batcher.submit(0)
+    finally:
+        batcher.close()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_base_exception_fails_running_and_queued_callers():
+    entered, release = threading.Event(), threading.Event()
+
+    def abort(items):
+        entered.set()
+        release.wait(5)
+        raise Abort()
+
+    batcher = MicroBatcher(abort, max_batch_size=1)
+    with ThreadPoolExecutor(2) as pool:
+        running = pool.submit(batcher.submit, "running")
+        assert entered.wait(5)
+        queued = pool.submit(batcher.submit, "queued")
+        while batcher._queue.empty():
+            time.sleep(0.001)
+        release.set()
+
+        with pytest.raises(Abort):
+            running.result(timeout=5)
+        with pytest.raises(RuntimeError):
+            queued.result(timeout=5)
+
+    batcher._thread.join(5)
+    with pytest.raises(RuntimeError):
+        batcher.submit("late")
+    batcher.close()
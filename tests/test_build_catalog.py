@@ -0,0 +1,27 @@
+# tests/test_build_catalog.py
+import pandas as pd
+
+from build_catalog import read_sources
+
+CRAWLED = "https://www.shl.com/products/product-catalog/view/java-8-new/"
+TRAIN_ONLY = "https://www.shl.com/solutions/products/product-catalog/view/automata-fix-new/"
+
+
+def test_read_sources_merges_crawled_and_train_urls(tmp_path):
+    url_list = tmp_path / "url_list.txt"
+    url_list.write_text(CRAWLED + "\n\n", encoding="utf-8")
+    train = tmp_path / "train.xlsx"
+    pd.DataFrame(
+        {
+            "Query": ["q1", "q2", "q3"],
+            # The same product under /solutions and another case is one product
+            "Assessment_url": [CRAWLED.replace("/products/", "/solutions/products/").upper(), TRAIN_ONLY, None],
+        }
+    ).to_excel(train, sheet_name="Train-Set", index=False)
+
+    urls = read_sources(str(url_list), str(train))
+    # The crawled spelling wins, and Train-Set products the crawl did not find are kept
+    assert list(urls.values()) == [CRAWLED, TRAIN_ONLY]
+
+    assert list(read_sources(str(url_list), "").values()) == [CRAWLED]
+    assert list(read_sources(str(url_list), str(tmp_path / "missing.xlsx")).values()) == [CRAWLED]
@@ -0,0 +1,64 @@
+# tests/test_cache.py
+from app.cache import ResponseCache, make_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_are_per_index_version():
+    cache = ResponseCache(maxsize=10)
+    key = make_key("Java  Developer", 10)
+
+    assert cache.get(key, "v1") is None
+    cache.put(key, "from v1", "v1")
+    assert cache.get(make_key("java developer", 10), "v1") == "from v1"
+    assert cache.get(key, "v2") is None
+
+
+def test_old_and_new_index_during_a_swap_keep_their_entries():
+    cache = ResponseCache(maxsize=10)
+    key = make_key("sales manager", 5)
+    cache.get(key, "old")
+    cache.put(key, "old answer", "old")
+
+    # Requests on the old and the new instance interleave while the swap drains
+    for _ in range(3):
+        assert cache.get(key, "new") in (None, "new answer")
+        cache.put(key, "new answer", "new")
+        assert cache.get(key, "old") == "old answer"
+
+    assert cache.get(key, "new") == "new answer"
+    assert len(cache) == 2
+
+
+def test_versions_beyond_the_last_two_are_dropped():
+    cache = ResponseCache(maxsize=10)
+    for version in ("v1", "v2"):
+        cache.get("q", version)
+        cache.put("q", version, version)
+
+    cache.get("q", "v3")
+    assert cache.versions() == ["v2", "v3"]
+    assert len(cache) == 1 and cache.get("q", "v2") == "v2"
+    # A response computed on the dropped version is not stored
+    cache.put("q", "late v1", "v1")
+    assert len(cache) == 1 and set(cache.versions()) == {"v2", "v3"}
+
+
+def test_lru_eviction_and_ttl():
+    clock = Clock()
+    cache = ResponseCache(maxsize=2, ttl=10.0, clock=clock)
+    for q in ("a", "b"):
+        cache.get(q, "v1")
+        cache.put(q, q.upper(), "v1")
+    assert cache.get("a", "v1") == "A"
+    cache.put("c", "C", "v1")
+    assert cache.get("b", "v1") is None and cache.stats()["evictions"] == 1
+
+    clock.now = 11.0
+    assert cache.get("a", "v1") is None and cache.stats()["expirations"] == 1
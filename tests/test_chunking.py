@@ -0,0 +1,81 @@
+# tests/test_chunking.py
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from app.chunking import pool_scores, split_query
+from app.config import QUERY_CHUNK_OVERLAP, QUERY_CHUNK_WORDS, QUERY_MAX_CHUNKS
+from app.recommender import AssessmentRecommender
+
+
+def _words(n: int) -> str:
+    return " ".join(f"w{i}" for i in range(n))
+
+
+def test_short_queries_are_never_chunked():
+    text = "  Java developer\twith SQL  "
+    assert split_query(text, chunk_words=4) == [text]
+    assert split_query(_words(4), chunk_words=4, overlap=1) == [_words(4)]
+    # 0 turns chunking off at any length
+    assert split_query(_words(500), chunk_words=0) == [_words(500)]
+
+
+def test_one_word_over_the_limit_gives_two_overlapping_windows():
+    assert split_query(_words(5), chunk_words=4, overlap=1) == ["w0 w1 w2 w3", "w3 w4"]
+    assert split_query(_words(5), chunk_words=4) == ["w0 w1 w2 w3", "w4"]
+
+
+def test_windows_cover_the_text_and_share_the_overlap():
+    chunks = [c.split() for c in split_query(_words(20), chunk_words=5, overlap=2, max_chunks=100)]
+
+    assert all(len(c) == 5 for c in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert prev[-2:] == nxt[:2]
+    assert chunks[0][0] == "w0" and chunks[-1][-1] == "w19"
+
+
+def test_chunk_cap_keeps_evenly_spaced_windows():
+    chunks = split_query(_words(100), chunk_words=10, max_chunks=4)
+
+    assert [c.split()[0] for c in chunks] == ["w0", "w30", "w60", "w90"]
+    assert len(split_query(_words(100), chunk_words=10, max_chunks=1)) == 1
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_max_and_mean_pooling(sparse):
+    scores = np.array(
+        [
+            [0.1, 0.8, 0.0],  # query 0, chunk 0
+            [0.5, 0.2, 0.0],  # query 0, chunk 1
+            [0.3, 0.0, 0.9],  # query 1
+        ],
+        dtype=np.float32,
+    )
+    block = sp.csr_matrix(scores) if sparse else scores
+
+    def dense(x):
+        return x.toarray() if sp.issparse(x) else x
+
+    np.testing.assert_allclose(dense(pool_scores(block, [2, 1], "max")), [[0.5, 0.8, 0.0], [0.3, 0.0, 0.9]])
+    np.testing.assert_allclose(dense(pool_scores(block, [2, 1], "mean")), [[0.3, 0.5, 0.0], [0.3, 0.0, 0.9]])
+    # One chunk per query: the block comes back as is
+    assert pool_scores(block, [1, 1, 1], "mean") is block
+
+
+@pytest.mark.parametrize("pooling", ["max", "mean"])
+def test_long_queries_are_pooled_over_their_chunks(catalog_path, monkeypatch, pooling):
+    monkeypatch.setattr("app.recommender.QUERY_CHUNK_POOLING", pooling)
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="tfidf")
+    try:
+        names = [row[1] for row in rec._snapshot.rows[:40]]
+        long_query = " ".join(names * 10)
+        chunks = split_query(long_query, QUERY_CHUNK_WORDS, QUERY_CHUNK_OVERLAP, QUERY_MAX_CHUNKS)
+        assert len(chunks) == QUERY_MAX_CHUNKS
+
+        pooled = rec._score_many([names[0], long_query])
+        per_chunk = rec._score_many(chunks)
+        expected = per_chunk.max(axis=0) if pooling == "max" else per_chunk.mean(axis=0)
+        np.testing.assert_allclose(pooled[1], expected, rtol=1e-5, atol=1e-7)
+        np.testing.assert_allclose(pooled[0], rec._score_many([names[0]])[0])
+    finally:
+        rec.close()
@@ -0,0 +1,268 @@
+# tests/test_crawler.py
+import asyncio
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import crawler as crawler_module
+from crawl_cache import CrawlJournal, PageCache, read_page
+from crawler import Crawler
+from scrape_catalog import CachedFetcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ETAG = '"product-v1"'
+
+
+def _fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+class StubSite:
+    """
+    Fixture pages on a local http.server. `fail[path]` is a list of statuses
+    answered (in order) before the page itself; `delay` slows every response
+    down so concurrent requests overlap.
+    """
+
+    def __init__(self):
+        self.pages = {"/catalog/": _fixture("listing.html"), "/product/": _fixture("product.html")}
+        self.fail = {}
+        self.retry_after = None
+        self.delay = 0.0
+        self.hits = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        path = request.path.split("?")[0]
+        with self._lock:
+            self.hits[path] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            pending = self.fail.get(path)
+            status = pending.pop(0) if pending else None
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if status is not None:
+                request.send_response(status)
+                if self.retry_after is not None:
+                    request.send_header("Retry-After", str(self.retry_after))
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+            elif path not in self.pages:
+                request.send_response(404)
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+            elif request.headers.get("If-None-Match") == ETAG:
+                request.send_response(304)
+                request.end_headers()
+            else:
+                body = self.pages[path]
+                request.send_response(200)
+                request.send_header("Content-Type", "text/html; charset=utf-8")
+                request.send_header("Content-Length", str(len(body)))
+                request.send_header("ETag", ETAG)
+                request.end_headers()
+                request.wfile.write(body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def site():
+    site = StubSite()
+    site.thread.start()
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the crawler backs off for; the waits themselves are skipped."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(crawler_module.asyncio, "sleep", sleep)
+    return delays
+
+
+async def _fetch(urls, **kwargs):
+    async with Crawler(rate_per_host=0, **kwargs) as crawler:
+        results = await crawler.fetch_all(urls)
+    return crawler, results
+
+
+def test_retries_5xx_with_exponential_backoff(site, sleeps, monkeypatch):
+    monkeypatch.setattr(crawler_module.random, "uniform", lambda low, high: high)
+    site.fail["/product/"] = [503, 500, 502]
+
+    crawler, [result] = asyncio.run(_fetch([site.url("/product/")], max_retries=4, backoff_base=0.5))
+
+    assert result.ok and result.attempts == 4
+    assert site.hits["/product/"] == 4
+    assert crawler.stats()["retries"] == 3
+    # Full jitter is drawn from [0, base * 2^attempt]; uniform is pinned to the upper bound
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_429_honours_retry_after(site, sleeps):
+    site.fail["/product/"] = [429]
+    site.retry_after = 7
+
+    _, [result] = asyncio.run(_fetch([site.url("/product/")]))
+
+    assert result.ok and result.attempts == 2
+    assert sleeps == [7.0]
+
+
+def test_gives_up_after_max_retries_and_on_other_errors(site, sleeps):
+    site.fail["/product/"] = [503] * 10
+
+    crawler, [exhausted, missing] = asyncio.run(_fetch([site.url("/product/"), site.url("/missing/")], max_retries=2))
+
+    assert exhausted.status == 503 and exhausted.attempts == 3 and exhausted.text is None
+    # A 404 is not retried
+    assert missing.status == 404 and missing.attempts == 1
+    assert site.hits["/product/"] == 3 and site.hits["/missing/"] == 1
+    assert crawler.stats()["failures"] == 2
+
+
+def test_concurrency_limit(site):
+    site.delay = 0.05
+    urls = [site.url(f"/catalog/?start={i}") for i in range(12)]
+
+    _, results = asyncio.run(_fetch(urls, concurrency=3))
+
+    assert all(r.ok for r in results)
+    assert site.hits["/catalog/"] == 12
+    assert site.max_in_flight == 3
+
+
+def test_conditional_get_sends_saved_validators(site):
+    url = site.url("/product/")
+
+    async def run():
+        async with Crawler(rate_per_host=0) as crawler:
+            first = await crawler.fetch(url)
+            second = await crawler.fetch(url)
+        return crawler, first, second
+
+    crawler, first, second = asyncio.run(run())
+    assert first.ok and first.text == _fixture("product.html").decode("utf-8")
+    assert crawler.validators[url]["etag"] == ETAG
+    # The saved ETag goes back as If-None-Match: an unchanged page is a 304 with no body
+    assert second.not_modified and second.text is None
+    assert crawler.stats()["not_modified"] == 1
+
+
+def test_conditional_get_answers_from_the_cache(site, tmp_path):
+    cache = PageCache(str(tmp_path))
+    url = site.url("/product/")
+
+    async def run():
+        journal = CrawlJournal(str(tmp_path / "journal.jsonl"))
+        journal.start(fresh=True)
+        crawler = Crawler(rate_per_host=0, validators=journal.validators())
+        fetcher = CachedFetcher(crawler, cache, journal, concurrency=2)
+        try:
+            path, fresh = await fetcher.get(url)
+        finally:
+            await crawler.close()
+            journal.finish()
+            journal.close()
+        return path, fresh, crawler
+
+    first_path, fresh, crawler = asyncio.run(run())
+    assert fresh and read_page(first_path) == _fixture("product.html").decode("utf-8")
+    assert crawler.stats()["not_modified"] == 0
+
+    # The next run sends the saved ETag and gets a 304 with no body
+    second_path, fresh, crawler = asyncio.run(run())
+    assert fresh and second_path == first_path
+    assert crawler.stats()["not_modified"] == 1
+    assert site.hits["/product/"] == 2
+
+
+def test_interrupted_run_resumes_from_the_journal(site, tmp_path):
+    cache = PageCache(str(tmp_path))
+    journal_path = str(tmp_path / "journal.jsonl")
+    done, failing = site.url("/catalog/"), site.url("/product/")
+    site.fail["/product/"] = [503]
+
+    async def run(fresh=False):
+        journal = CrawlJournal(journal_path)
+        journal.start(fresh=fresh)
+        crawler = Crawler(rate_per_host=0, max_retries=0, validators=journal.validators())
+        fetcher = CachedFetcher(crawler, cache, journal, concurrency=2)
+        try:
+            results = await asyncio.gather(fetcher.get(done), fetcher.get(failing))
+        finally:
+            await crawler.close()
+        if not fetcher.failed:
+            journal.finish()
+        journal.close()
+        return journal, fetcher, results
+
+    journal, fetcher, results = asyncio.run(run(fresh=True))
+    assert fetcher.failed == [failing] and results[1] == (None, False)
+    run_id = journal.run
+
+    journal, fetcher, results = asyncio.run(run())
+    assert journal.resumed and journal.run == run_id
+    # The page fetched before the interruption comes from the cache; only the failed one is requested again
+    assert fetcher.from_cache == 1 and not fetcher.failed
+    assert site.hits["/catalog/"] == 1 and site.hits["/product/"] == 2
+    assert all(fresh for _, fresh in results)
+
+    # That run finished, so the next one starts over
+    journal, _, _ = asyncio.run(run())
+    # Started within the same second, still a different run
+    assert not journal.resumed and journal.run != run_id
+
+
+def test_records_after_a_torn_line_survive(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = CrawlJournal(journal_path)
+    journal.start()
+    journal.record_page("https://example.com/a", "a" * 64)
+    journal.close()
+    # Killed mid-write
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write('{"event": "page", "url": ')
+
+    journal = CrawlJournal(journal_path)
+    journal.start()
+    assert journal.resumed
+    journal.record_page("https://example.com/b", "b" * 64)
+    journal.close()
+
+    assert set(CrawlJournal(journal_path).pages) == {"https://example.com/a", "https://example.com/b"}
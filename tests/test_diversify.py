@@ -0,0 +1,59 @@
+# tests/test_diversify.py
+import numpy as np
+
+from app.diversify import quota_targets, select_mmr, select_quota
+
+
+def _members(n: int, *categories) -> np.ndarray:
+    out = np.zeros((len(categories), n), dtype=bool)
+    for c, positions in enumerate(categories):
+        out[c, list(positions)] = True
+    return out
+
+
+def test_category_short_of_its_quota_is_filled_by_score():
+    candidates = np.arange(10, 20)
+    # Only one personality candidate for a quota of 3
+    members = _members(10, range(8), [8])
+
+    selected = select_quota(candidates, members, [0.5, 0.5], k=6)
+
+    assert selected == [10, 18, 11, 12, 13, 14]
+
+
+def test_odd_k_gives_the_last_category_the_remainder():
+    assert quota_targets([0.5, 0.5], 5) == [2, 3]
+    candidates = np.arange(10)
+    members = _members(10, range(0, 10, 2), range(1, 10, 2))
+
+    selected = select_quota(candidates, members, [0.5, 0.5], k=5)
+
+    assert selected == [0, 1, 2, 3, 5]
+
+
+def test_rows_in_several_categories_count_for_none():
+    candidates = np.arange(4)
+    members = _members(4, [0, 1], [0, 2])
+
+    assert select_quota(candidates, members, [0.5, 0.5], k=2) == [1, 2]
+    # Fewer candidates than k: every candidate, no padding
+    assert select_quota(candidates, members, [0.5, 0.5], k=6) == [1, 2, 0, 3]
+
+
+def test_mmr_lambda_one_is_score_order():
+    candidates = np.array([7, 3, 9, 1])
+    scores = np.array([0.9, 0.2, 0.5, 0.7])
+    bits = np.array([1, 1, 2, 1], dtype=np.uint64)
+
+    assert select_mmr(candidates, scores, bits, k=4, lam=1.0) == [7, 1, 9, 3]
+
+
+def test_mmr_lambda_zero_only_avoids_overlap():
+    candidates = np.array([7, 3, 9, 1])
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    bits = np.array([1, 1, 2, 3], dtype=np.uint64)
+
+    # First pick is a tie broken by position; then the row sharing no test type
+    # with it, then the one overlapping least (1/2 beats 1/1)
+    assert select_mmr(candidates, scores, bits, k=3, lam=0.0) == [7, 9, 1]
+    assert select_mmr(candidates, scores, bits, k=3, lam=1.0) == [7, 3, 9]
@@ -0,0 +1,69 @@
+# tests/test_filters.py
+import pandas as pd
+import pytest
+
+from app.filters import RecommendFilters
+from app.recommender import AssessmentRecommender
+
+from conftest import make_record
+
+QUERY = "programming"
+KNOWLEDGE = "Knowledge & Skills"
+TYPED = [make_record(f"language-{i}", f"Language {i} Programming") for i in range(12)]
+
+
+@pytest.fixture
+def rec(catalog_path):
+    # The first catalog rows have no test types; add a dozen that do
+    df = pd.read_csv(catalog_path)
+    typed = pd.DataFrame(TYPED).assign(test_type=lambda d: d["test_type"].str.join(";"))
+    pd.concat([df, typed]).to_csv(catalog_path, index=False)
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="tfidf")
+    yield rec
+    rec.close()
+
+
+def _urls(results) -> list:
+    return [r["url"] for r in results]
+
+
+def test_filtered_request_returns_k_rows_when_enough_match(rec):
+    results = rec.recommend(QUERY, k=10, filters=RecommendFilters.build(test_types=[KNOWLEDGE]))
+
+    assert len(results) == 10
+    assert set(_urls(results)) <= {r["url"] for r in TYPED}
+
+
+def test_test_type_filter_is_case_insensitive(rec):
+    lower = RecommendFilters.build(test_types=[KNOWLEDGE.lower()])
+    upper = RecommendFilters.build(test_types=[KNOWLEDGE.upper(), " "])
+
+    assert lower == upper
+    assert _urls(rec.recommend(QUERY, k=5, filters=upper)) == _urls(rec.recommend(QUERY, k=5, filters=lower))
+
+
+def test_deleted_rows_are_never_returned(rec):
+    filters = RecommendFilters.build(test_types=[KNOWLEDGE])
+    deleted = {r["url"] for r in TYPED[:10]}
+    rec.delete_assessments(sorted(deleted))
+
+    # Only two matching rows are left: no tombstoned row fills the other slots
+    results = rec.recommend(QUERY, k=10, filters=filters)
+    assert set(_urls(results)) == {r["url"] for r in TYPED[10:]}
+    assert not deleted & set(_urls(rec.recommend(QUERY, k=10)))
+
+
+def test_mask_cache_is_rebuilt_after_add(rec):
+    filters = RecommendFilters.build(test_types=[KNOWLEDGE], max_duration=30)
+    rec.delete_assessments([r["url"] for r in TYPED[:10]])
+    before = rec._snapshot
+    assert len(rec.recommend(QUERY, k=10, filters=filters)) == 2
+
+    added = make_record("language-new", "Language New Programming")
+    rec.add_assessments([added])
+
+    assert rec._snapshot.filters is not before.filters
+    results = rec.recommend(QUERY, k=10, filters=filters)
+    assert len(results) == 3 and added["url"] in _urls(results)
+    # The old snapshot keeps its own cached mask
+    assert before.filters.mask(filters).sum() == len(TYPED)
@@ -0,0 +1,71 @@
+# tests/test_hybrid.py
+import numpy as np
+import pytest
+
+from app.config import RRF_K
+from app.recommender import AssessmentRecommender
+
+QUERY = "apache development"
+
+
+@pytest.fixture
+def rec(catalog_path, hashing_embedder):
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="hybrid")
+    yield rec
+    rec.close()
+
+
+def test_filtered_out_lexical_matches_get_no_lexical_credit(rec):
+    snap = rec._snapshot
+    lexical = snap.bm25_score([QUERY])[0]
+    assert (lexical > 0).any()
+    # The filter excludes every row BM25 matched
+    allowed = lexical <= 0
+
+    fused = rec._score_hybrid([QUERY], snap, allowed)[0]
+
+    assert fused.any() and not fused[~allowed].any()
+    # Each row is ranked by the dense retriever only: at most one 1 / (k + rank) term
+    assert fused.max() <= 1.0 / (RRF_K + 1) + 1e-6
+
+
+def test_deleted_lexical_matches_are_not_returned(rec):
+    snap = rec._snapshot
+    matched = np.flatnonzero(snap.bm25_score([QUERY])[0] > 0)
+    rec.delete_assessments([snap.rows[i][0] for i in matched])
+
+    results = rec.recommend(QUERY, k=5)
+
+    deleted = {snap.rows[i][0] for i in matched}
+    assert len(results) == 5 and not deleted & {r["url"] for r in results}
+
+
+def test_large_exact_catalog_falls_back_to_dense_scan(rec, monkeypatch):
+    snap = rec._snapshot
+    lexical = snap.bm25_score([QUERY])[0]
+    allowed = lexical <= 0
+    expected = rec._score_hybrid([QUERY], snap, allowed)[0]
+
+    # Too large for a full dense scan: BM25 alone would leave every row at 0
+    monkeypatch.setattr("app.recommender.HYBRID_FULL_SCAN_MAX_ROWS", 0)
+    fused = rec._score_hybrid([QUERY, "apache"], snap, allowed)
+
+    np.testing.assert_allclose(fused[0], expected)
+    assert fused[1].any()
+
+
+def test_built_reduced_precision_index_rescores_from_the_mapped_matrix(
+    catalog_path, hashing_embedder, tmp_path, monkeypatch
+):
+    monkeypatch.setattr("app.recommender.EMBEDDING_PRECISION", "int8")
+    in_memory = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="hybrid")
+    built = AssessmentRecommender(catalog_path=catalog_path, index_dir=str(tmp_path / "index"), retrieval_mode="hybrid")
+    try:
+        vectors = built._snapshot.doc_vectors
+        assert isinstance(vectors.exact, np.memmap)
+        assert vectors.resident_nbytes() == vectors.scan_nbytes()
+        assert in_memory._snapshot.doc_vectors.resident_nbytes() > vectors.scan_nbytes()
+        assert built.recommend(QUERY, k=5) == in_memory.recommend(QUERY, k=5)
+    finally:
+        in_memory.close()
+        built.close()
@@ -0,0 +1,71 @@
+# tests/test_query_analysis.py
+import re
+
+import pytest
+
+from app.query_analysis import KEYWORD_CATEGORIES, KeywordMatch, analyze_query_rule_based, match_keywords
+
+KEYWORDS = [(word, category) for category, words in KEYWORD_CATEGORIES.items() for word in words]
+
+
+def _substring_loop(text: str) -> set:
+    """The keyword loop KeywordMatcher replaced: plain substring tests."""
+    q = text.lower()
+    return {category for category, words in KEYWORD_CATEGORIES.items() if any(w in q for w in words)}
+
+
+def _word_loop(text: str) -> set:
+    """One whole-word regex per keyword, longest keyword first at each position."""
+    hits = {}
+    for word, category in KEYWORDS:
+        body = r"[\s\-]+".join(re.escape(part) for part in word.split())
+        for m in re.finditer(rf"(?<!\w){body}s?(?!\w)", text, re.IGNORECASE):
+            hits.setdefault(m.start(), []).append((m.end(), word, category))
+    out, covered = set(), -1
+    for start in sorted(hits):
+        if start < covered:
+            continue
+        end = max(e for e, _, _ in hits[start])
+        out |= {(w, c, start, e) for e, w, c in hits[start] if e == end}
+        covered = end
+    return out
+
+
+@pytest.mark.parametrize("word, category", KEYWORDS)
+def test_every_keyword_matches_like_the_loops(word, category):
+    # "leadership" also contains "lead": only the substring loop sees both
+    contains_other = any(other != word and other in word for other, _ in KEYWORDS)
+    for text in (f"need {word} now", f"NEED {word.upper()} NOW"):
+        found = {m.category for m in match_keywords(text)}
+        assert category in found
+        if not contains_other:
+            assert found == _substring_loop(text)
+    # Plurals and hyphenated multi-word keywords are new; compare with the whole-word loop
+    for text in (f"need {word} now", f"NEED {word.upper()}S NOW", f"need {word.replace(' ', '-')}"):
+        assert {(m.keyword, m.category, m.start, m.end) for m in match_keywords(text)} == _word_loop(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Senior Java developer with SQL and AWS, strong stakeholder communication",
+        "Entry level QA engineer: Selenium automation, people skills",
+        "Head of  data   structures; C++ / C# coding, node & react",
+        "graduate programmers with teamwork, conflict resolution and ownership",
+        "lead-engineer, principal cloud azure kubernetes docker databases",
+    ],
+)
+def test_sentences_match_the_per_keyword_loop(text):
+    matches = match_keywords(text)
+    assert {(m.keyword, m.category, m.start, m.end) for m in matches} == _word_loop(text)
+    assert [m.start for m in matches] == sorted(m.start for m in matches)
+    assert {m.category for m in matches} == _substring_loop(text)
+
+
+def test_keywords_inside_longer_words_no_longer_match():
+    # The substring loop fired on these
+    assert _substring_loop("javascript leadership") == {"technical", "behavioral", "senior"}
+    profile = analyze_query_rule_based("javascript leadership")
+    assert [m.keyword for m in profile.matches] == ["javascript", "leadership"]
+    assert profile.has_technical and profile.has_behavioral and profile.seniority == "mid"
+    assert match_keywords("nodejs sqlite reacts") == [KeywordMatch("react", "technical", 14, 20)]
@@ -0,0 +1,141 @@
+# tests/test_recommender.py
+import csv
+import os
+
+import pandas as pd
+import pytest
+
+from app.catalog import CATALOG_COLUMNS
+from app.filters import RecommendFilters
+from app.recommender import AssessmentRecommender
+
+from conftest import make_record
+
+
+@pytest.fixture
+def index_dir(tmp_path) -> str:
+    return str(tmp_path / "index")
+
+
+@pytest.fixture
+def rec(catalog_path, index_dir):
+    AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir, retrieval_mode="tfidf").close()
+    # Reopened from the artifacts: memory-mapped rows and URL lookup
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir, retrieval_mode="tfidf")
+    yield rec
+    rec.close()
+
+
+def _url(slug: str) -> str:
+    return make_record(slug, "")["url"]
+
+
+def test_updates_overlay_the_base_without_copying_it(rec):
+    base = rec._snapshot
+    deleted = base.rows[3][0]
+
+    rec.add_assessments([make_record("a", "Java Streams"), make_record("b", "Java Records")])
+    rec.delete_assessments([deleted, _url("a")])
+    # Delta rows are scored with the base vocabulary, so reuse words it has
+    name = base.rows[0][1] + " Advanced"
+    rec.update_assessments([make_record("b", name)])
+
+    snap = rec._snapshot
+    assert snap.rows.base is base.rows
+    assert snap.url_to_row.maps[-1] is base.url_to_row
+    assert base.live is None and base.row_of(deleted) == 3
+
+    assert snap.row_of(deleted) is None and snap.row_of(_url("a")) is None
+    assert snap.rows[snap.row_of(_url("b"))][1] == name
+    assert len(rec) == base.n_rows - 1 + 1 == int(snap.live.sum())
+    assert snap.pending_changes == 3 + 3
+    assert len(rec.catalog_df) == len(rec) and deleted not in set(rec.catalog_df["url"])
+
+    urls = [r["url"] for r in rec.recommend(base.rows[0][1], k=5)]
+    assert _url("b") in urls and deleted not in urls
+
+
+def test_write_during_compaction_is_replayed(rec, monkeypatch):
+    rec.add_assessments([make_record("a", "Java Streams")])
+    build_snapshot = rec._build_snapshot
+
+    def build_with_concurrent_write(*args, **kwargs):
+        # Lands while the compacted index is being built, after its rows were taken
+        rec.add_assessments([make_record("b", "Java Records")])
+        return build_snapshot(*args, **kwargs)
+
+    monkeypatch.setattr(rec, "_build_snapshot", build_with_concurrent_write)
+    rec.compact()
+
+    snap = rec._snapshot
+    # "a" was folded into the new base; "b" was replayed on top of it
+    assert snap.row_of(_url("a")) < snap.n_base <= snap.row_of(_url("b"))
+    assert snap.pending_changes == 1
+    assert {_url("a"), _url("b")} <= set(rec.catalog_df["url"])
+
+
+def test_write_back_version_matches_the_rebuilt_index(rec, catalog_path, index_dir, monkeypatch):
+    monkeypatch.setattr("app.recommender.CATALOG_WRITE_BACK", True)
+    previous = rec.index_version
+    deleted = rec._snapshot.rows[0][0]
+    rec.add_assessments([make_record("a", "Java Streams")])
+    rec.delete_assessments([deleted])
+
+    version = rec.compact()
+
+    assert version == rec.index_version == rec.base_version == rec.file_version()
+    written = set(pd.read_csv(catalog_path)["url"])
+    assert _url("a") in written and deleted not in written
+    assert os.path.isdir(os.path.join(index_dir, version))
+    assert not os.path.exists(os.path.join(index_dir, previous))
+
+    # A restart on the written file loads the artifacts saved for that version
+    restarted = AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir, retrieval_mode="tfidf")
+    try:
+        assert restarted.index_version == version
+        assert type(restarted._snapshot.rows).__name__ == "RowTable"
+        assert set(restarted.catalog_df["url"]) == set(rec.catalog_df["url"])
+    finally:
+        restarted.close()
+
+
+def test_write_back_round_trips_a_built_catalog(catalog_path, index_dir, monkeypatch):
+    monkeypatch.setattr("app.recommender.CATALOG_WRITE_BACK", True)
+    # Rewritten in the scripts/build_catalog.py dialect (CRLF)
+    with open(catalog_path, newline="", encoding="utf-8") as f:
+        records = list(csv.DictReader(f))
+    with open(catalog_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(CATALOG_COLUMNS))
+        writer.writeheader()
+        writer.writerows(records)
+    with open(catalog_path, "rb") as f:
+        original = f.read()
+
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=index_dir, retrieval_mode="tfidf")
+    try:
+        version = rec.index_version
+        rec.add_assessments([make_record("a", "Java Streams")])
+        rec.delete_assessments([_url("a")])
+        assert rec.compact() == version
+    finally:
+        rec.close()
+
+    with open(catalog_path, "rb") as f:
+        assert f.read() == original
+    assert os.path.isdir(os.path.join(index_dir, version))
+
+
+@pytest.mark.parametrize("filtered", [False, True])
+def test_recommend_many_matches_recommend(rec, monkeypatch, filtered):
+    # Several score chunks, a query long enough to be split, and a duplicate
+    monkeypatch.setattr("app.recommender.BATCH_SCORE_CHUNK", 2)
+    names = [row[1] for row in rec._snapshot.rows[:40]]
+    queries = [names[0], "account manager with sql skills", " ".join(names * 10), names[5], names[0]]
+    rec.add_assessments([make_record(s, f"{names[i]} Remote") for i, s in enumerate("abc")])
+    rec.delete_assessments([rec._snapshot.rows[5][0]])
+    # The base rows' remote support is unknown: only the added rows pass
+    filters = RecommendFilters.build(remote_support="Yes") if filtered else None
+
+    assert rec.recommend_many(queries, k=7, filters=filters) == [
+        rec.recommend(q, k=7, filters=filters) for q in queries
+    ]
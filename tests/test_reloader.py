@@ -0,0 +1,94 @@
+# tests/test_reloader.py
+import pandas as pd
+import pytest
+
+from app.recommender import AssessmentRecommender, IndexRetired
+from app.reloader import RecommenderReloader
+
+from conftest import make_record
+
+ADMIN_ROW = make_record("rust-programming-new", "Rust Programming New")
+EXTERNAL_ROW = make_record("golang-programming-new", "Golang Programming New", test_type="Knowledge & Skills")
+DURING_BUILD_ROW = make_record("kotlin-programming-new", "Kotlin Programming New")
+
+
+@pytest.fixture(autouse=True)
+def write_back(monkeypatch):
+    monkeypatch.setattr("app.recommender.CATALOG_WRITE_BACK", True)
+    monkeypatch.setattr("app.reloader.CATALOG_WRITE_BACK", True)
+
+
+def _urls(rec: AssessmentRecommender) -> set:
+    return set(rec.catalog_df["url"])
+
+
+def _file_urls(path: str) -> set:
+    return set(pd.read_csv(path)["url"])
+
+
+def _reloader(catalog_path: str, factory=None) -> RecommenderReloader:
+    factory = factory or (lambda: AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="tfidf"))
+    reloader = RecommenderReloader(factory, catalog_path=catalog_path, poll_seconds=0, warmup_queries=[])
+    reloader.load()
+    return reloader
+
+
+def test_rebuild_keeps_external_rewrite_and_pending_updates(catalog_path):
+    reloader = _reloader(catalog_path)
+    try:
+        reloader.write(lambda rec: rec.add_assessments([ADMIN_ROW]))
+
+        # Someone else rewrites the catalog while the update is still pending
+        df = pd.read_csv(catalog_path)
+        pd.concat([df, pd.DataFrame([EXTERNAL_ROW])]).to_csv(catalog_path, index=False)
+
+        reloader._rebuild()
+        assert EXTERNAL_ROW["url"] in _file_urls(catalog_path)
+        assert {ADMIN_ROW["url"], EXTERNAL_ROW["url"]} <= _urls(reloader.current)
+
+        # The new instance's write-back has both
+        reloader.current.compact()
+        assert {ADMIN_ROW["url"], EXTERNAL_ROW["url"]} <= _file_urls(catalog_path)
+    finally:
+        reloader.close()
+
+
+def test_updates_acknowledged_during_rebuild_reach_the_new_instance(catalog_path):
+    acknowledged = []
+
+    def factory():
+        rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="tfidf")
+        if reloader.current is not None:
+            # Lands on the old instance, which is still active while this one builds
+            acknowledged.append(reloader.write(lambda old: old.add_assessments([DURING_BUILD_ROW])))
+        return rec
+
+    reloader = RecommenderReloader(factory, catalog_path=catalog_path, poll_seconds=0, warmup_queries=[])
+    reloader.load()
+    try:
+        old = reloader.current
+        reloader._rebuild()
+        new = reloader.current
+
+        assert acknowledged and new is not old
+        assert DURING_BUILD_ROW["url"] in _urls(new)
+        with pytest.raises(IndexRetired):
+            old.delete_assessments([DURING_BUILD_ROW["url"]])
+        reloader.write(lambda rec: rec.delete_assessments([DURING_BUILD_ROW["url"]]))
+        assert DURING_BUILD_ROW["url"] not in _urls(new)
+    finally:
+        reloader.close()
+
+
+def test_compaction_does_not_overwrite_external_rewrite(catalog_path):
+    rec = AssessmentRecommender(catalog_path=catalog_path, index_dir=None, retrieval_mode="tfidf")
+    try:
+        rec.add_assessments([ADMIN_ROW])
+        df = pd.read_csv(catalog_path)
+        pd.concat([df, pd.DataFrame([EXTERNAL_ROW])]).to_csv(catalog_path, index=False)
+
+        rec.compact()
+        assert EXTERNAL_ROW["url"] in _file_urls(catalog_path)
+        assert ADMIN_ROW["url"] in _urls(rec)
+    finally:
+        rec.close()
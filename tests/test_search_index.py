@@ -0,0 +1,56 @@
+# tests/test_search_index.py
+import numpy as np
+import scipy.sparse as sp
+
+from app.chunking import pool_scores
+from app.recommender import _top_k_indices
+from app.search_index import ExactIndex, IVFIndex
+from app.vectors import NormalizedEmbeddings, l2_normalize
+
+
+def _vectors(n_rows: int = 400, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return NormalizedEmbeddings.build(rng.standard_normal((n_rows, dim)).astype(np.float32)), rng
+
+
+def test_ivf_scores_only_the_probed_rows():
+    vectors, rng = _vectors()
+    ivf = IVFIndex.build(vectors, nlist=16, nprobe=2)
+    queries = l2_normalize(rng.standard_normal((3, 16)).astype(np.float32))
+
+    sims = ivf.score(queries)
+    exact = ExactIndex(vectors).score(queries)
+
+    assert sp.issparse(sims) and sims.shape == (3, 400)
+    sizes = np.diff(ivf.list_offsets)
+    for i, row in enumerate(sims):
+        assert 0 < row.nnz < 400
+        assert np.all(np.diff(row.indices) > 0)
+        # Exactly the members of the probed lists, with their exact scores
+        probed = np.argsort(-(queries[i] @ ivf.centroids.T))[:2]
+        assert row.nnz == sizes[probed].sum()
+        np.testing.assert_allclose(row.data, exact[i, row.indices], rtol=1e-5)
+
+
+def test_top_k_over_candidates_matches_the_dense_selection():
+    vectors, rng = _vectors()
+    ivf = IVFIndex.build(vectors, nlist=16, nprobe=4)
+    sims = ivf.score(l2_normalize(rng.standard_normal((5, 16)).astype(np.float32)))
+    live = rng.random(400) < 0.8
+
+    for row in sims:
+        dense = row.toarray().ravel()
+        for allowed, fill in ((None, False), (live, False), (live, True)):
+            np.testing.assert_array_equal(
+                _top_k_indices(row, 30, allowed, fill), _top_k_indices(dense, 30, allowed, fill)
+            )
+
+
+def test_pooling_candidate_blocks_matches_dense_pooling():
+    block = sp.random(6, 50, density=0.2, format="csr", random_state=2, dtype=np.float32)
+    block.data -= 0.3  # some negative scores, as with cosine similarity
+    counts = [1, 3, 2]
+    for method in ("max", "mean"):
+        pooled = pool_scores(block, counts, method)
+        assert sp.issparse(pooled)
+        np.testing.assert_allclose(pooled.toarray(), pool_scores(block.toarray(), counts, method), rtol=1e-6)